@@ -0,0 +1,190 @@
+"""Local Python equivalent of the payment_type MapReduce job.
+
+The Hadoop job (PaymentTypeMapper, a combiner and PaymentTypeReducer) counts
+payment_type, field 11 of the Yellow Taxi CSV, over the March 2016 file. This
+script does the same on one machine:
+
+- Splits: the file is cut into byte ranges (64 MB by default, like the tuned
+  Hadoop split size). As in Hadoop's line reader, a split skips its first
+  partial line and finishes the line that crosses its end, so every line is
+  read exactly once.
+- Map + combine: each split is streamed in blocks. Field 11 of every line is
+  pulled out by one compiled regular expression per block instead of splitting
+  rows into fields, and counted into the split's own Counter (the combiner).
+  Lines starting with VendorID (the header) and lines with fewer than 12 fields
+  are skipped, like in the mapper.
+- Reduce: splits are spread over a process pool and their counters are summed.
+
+Fields are assumed unquoted, as in the TLC files.
+
+Usage:
+    python payment_type_counts.py yellow_tripdata_2016-03.csv --workers 8
+    python payment_type_counts.py --generate 2000000 sample.csv   # Synthetic file with the 2016 schema
+    python payment_type_counts.py sample.csv --baseline           # Compare with pandas read_csv + value_counts
+"""
+import argparse
+import os
+import random
+import re
+import resource
+import time
+from collections import Counter
+from multiprocessing import Pool, get_context
+
+PAYMENT_FIELD = 11
+PAYMENT_TYPES = {"1": "Credit Card", "2": "Cash", "3": "No Charge", "4": "Dispute", "5": "Unknown",
+                 "6": "Voided Trip"}
+HEADER = ("VendorID,tpep_pickup_datetime,tpep_dropoff_datetime,passenger_count,trip_distance,pickup_longitude,"
+          "pickup_latitude,RatecodeID,store_and_fwd_flag,dropoff_longitude,dropoff_latitude,payment_type,"
+          "fare_amount,extra,mta_tax,tip_amount,tolls_amount,improvement_surcharge,total_amount")
+
+# Start of a line that is not the header, 11 fields, then field 11 captured
+PAYMENT_PATTERN = re.compile(rb"^(?!VendorID)(?:[^,\r\n]*,){%d}([^,\r\n]*)" % PAYMENT_FIELD, re.MULTILINE)
+
+
+def split_ranges(path, split_size=64 << 20):
+    """Byte ranges (start, end) covering the file, split_size bytes each."""
+    size = os.path.getsize(path)
+    return [(start, min(start + split_size, size)) for start in range(0, size, split_size)]
+
+
+def count_split(args):
+    """Map and combine one split: return {payment_type: count} for the lines starting in [start, end)."""
+    path, start, end, block_size = args
+    counts = Counter()
+    with open(path, "rb") as file:
+        if start:
+            # Skip the partial first line; it belongs to the previous split
+            file.seek(start - 1)
+            file.readline()
+        remaining = end - file.tell()
+        carry = b""
+        while remaining > 0:
+            block = file.read(min(block_size, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            data = carry + block
+            if remaining > 0:
+                cut = data.rfind(b"\n") + 1
+                carry = data[cut:]
+            else:
+                if not data.endswith(b"\n"):
+                    data += file.readline()  # Finish the line that crosses the end of the split
+                cut = len(data)
+            counts.update(PAYMENT_PATTERN.findall(data, 0, cut))
+    return counts
+
+
+def count_payment_types(path, workers=None, split_size=64 << 20, block_size=8 << 20):
+    """Count payment_type over the whole file; returns a Counter keyed by the field's text."""
+    tasks = [(path, start, end, block_size) for start, end in split_ranges(path, split_size)]
+    totals = Counter()
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            totals.update(count_split(task))
+    else:
+        with Pool(processes=workers) as pool:
+            for counts in pool.imap_unordered(count_split, tasks):
+                totals.update(counts)  # Reduce
+    return Counter({key.decode(): count for key, count in totals.items()})
+
+
+def pandas_counts(path):
+    """The naive baseline: parse every row and column, then value_counts()."""
+    import pandas as pd
+    df = pd.read_csv(path)
+    return Counter({str(key): int(count) for key, count in df["payment_type"].value_counts().items()})
+
+
+def generate(path, rows, seed=42):
+    """Write a synthetic file with the March 2016 schema and roughly its payment type mix."""
+    rng = random.Random(seed)
+    payment_types = ["1", "2", "3", "4"]
+    weights = [8127391, 4020408, 46913, 16240]
+    with open(path, "w") as file:
+        file.write(HEADER + "\n")
+        batch = []
+        for i in range(rows):
+            minute = i % 1440
+            fare = rng.randint(25, 600) / 10
+            batch.append(
+                f"{rng.randint(1, 2)},2016-03-{1 + i % 31:02d} {minute // 60:02d}:{minute % 60:02d}:00,"
+                f"2016-03-{1 + i % 31:02d} {minute // 60:02d}:{minute % 60:02d}:42,{rng.randint(1, 6)},"
+                f"{rng.randint(1, 250) / 10},-73.{rng.randint(0, 999999):06d},40.{rng.randint(0, 999999):06d},1,N,"
+                f"-73.{rng.randint(0, 999999):06d},40.{rng.randint(0, 999999):06d},"
+                f"{rng.choices(payment_types, weights)[0]},{fare},0.5,0.5,{rng.randint(0, 50) / 10},0,0.3,"
+                f"{fare + 1.3:.2f}\n")
+            if len(batch) == 100000:
+                file.writelines(batch)
+                batch.clear()
+        file.writelines(batch)
+
+
+def _measure(name, path, workers, queue):
+    start = time.perf_counter()
+    counts = count_payment_types(path, workers) if name == "engine" else pandas_counts(path)
+    elapsed = time.perf_counter() - start
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    queue.put((counts, elapsed, max(own, children)))
+
+
+def measure(name, path, workers=None):
+    """Run one method in a fresh process; return (counts, seconds, peak RSS in KB of its largest process)."""
+    context = get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_measure, args=(name, path, workers, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def print_counts(counts):
+    print(f"{'payment_type':<13}{'Meaning':<14}{'Count':>12}")
+    for payment_type, count in sorted(counts.items(), key=lambda item: -item[1]):
+        print(f"{payment_type:<13}{PAYMENT_TYPES.get(payment_type, ''):<14}{count:>12,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count payment_type in a Yellow Taxi CSV, MapReduce style.")
+    parser.add_argument("path", help="CSV file to count (or to write with --generate)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--split-size", type=int, default=64, help="Split size in MB")
+    parser.add_argument("--baseline", action="store_true",
+                        help="Also run pandas read_csv + value_counts; report rows/s and peak memory of both")
+    parser.add_argument("--generate", type=int, metavar="ROWS", help="Write a synthetic CSV with this many rows")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate(args.path, args.generate)
+        print(f"Wrote {args.generate:,} rows to {args.path} ({os.path.getsize(args.path) / 1e6:,.0f} MB)")
+        return
+
+    if not args.baseline:
+        start = time.perf_counter()
+        counts = count_payment_types(args.path, args.workers, args.split_size << 20)
+        elapsed = time.perf_counter() - start
+        print_counts(counts)
+        rows = sum(counts.values())
+        print(f"{rows:,} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s, {args.workers} workers)")
+        return
+
+    results = {}
+    for name in ("engine", "pandas"):
+        results[name] = measure(name, args.path, args.workers)
+    counts = results["engine"][0]
+    print_counts(counts)
+    if counts != results["pandas"][0]:
+        print("WARNING: pandas counts differ:", dict(results["pandas"][0]))
+    print(f"\n{'Method':<34}{'Seconds':>9}{'Rows/s':>14}{'Peak RSS':>11}")
+    labels = {"engine": f"Split streaming ({args.workers} workers)", "pandas": "pandas read_csv + value_counts"}
+    for name, (method_counts, elapsed, peak_kb) in results.items():
+        rows = sum(method_counts.values())
+        print(f"{labels[name]:<34}{elapsed:>9.2f}{rows / elapsed:>14,.0f}{peak_kb / 1024:>8,.0f} MB")
+    print("Peak RSS is the largest single process (the engine's workers each hold one block at a time).")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,166 +1,500 @@
 import random
 import time
+from itertools import product
 import tkinter as tk
 from tkinter import simpledialog
 from collections import defaultdict
 from tabulate import tabulate
 
+from cluedo_deduction import DeductionEngine
+from cluedo_estimator import EnvelopeEstimator
+from cluedo_events import SOLUTION, DEAL, SUGGESTION, PASS, REFUTATION, ACCUSATION, ELIMINATION
+from cluedo_ismcts import ISMCTSStrategy
+from cluedo_snapshot import GameSnapshot
+from cluedo_strategy import Strategy, RuleStrategy, EstimatorStrategy
+
+
+class GameResult:
+    """Outcome of a finished game, returned by CluedoGame.game_loop()."""
+
+    def __init__(self, winner, solution, turns, rounds, eliminated):
+        self.winner = winner            # Name of the winning player, or None
+        self.solution = solution
+        self.turns = turns              # Number of turns played by active players
+        self.rounds = rounds
+        self.eliminated = eliminated    # List of (player name, turn) pairs in elimination order
+
+    def __repr__(self):
+        return f"GameResult(winner={self.winner!r}, turns={self.turns}, eliminated={len(self.eliminated)})"
+
+
+# Clue sheet states, stored per card as a small integer
+UNKNOWN, SEEN, MAYBE_IN_ENVELOPE, NOT_IN_ENVELOPE = 0, 1, 2, 3
+CLUE_SHEET_LABELS = ("Unknown", "Seen", "Maybe in Envelope", "Not in Envelope")
+
+# Category names of the classic game, used as the keys of solutions and accusations
+CLASSIC_KEYS = ("suspect", "weapon", "room")
+
+
+class CardIndex:
+    """Maps every card of a game to one bit of an integer mask.
+
+    Built once per CluedoGame from its card categories (suspects, weapons and rooms
+    in the classic game, any number of categories of any size in variants), so that
+    hands, known cards and suggestions can be handled as integer masks.
+    category_masks holds one mask per category, in the order of keys.
+    """
+    __slots__ = ("names", "bits", "positions", "lower_bits", "keys", "count_keys", "category_masks", "suspects_mask",
+                 "weapons_mask", "rooms_mask", "all_mask", "_names")
+
+    def __init__(self, *categories, keys=None):
+        if keys is None:
+            keys = CLASSIC_KEYS if len(categories) == 3 else tuple(f"category{i + 1}" for i in range(len(categories)))
+        if len(keys) != len(categories):
+            raise ValueError("Every card category needs a key!")
+        self.keys = tuple(keys)
+        self.count_keys = tuple(f"{key}s" for key in self.keys)  # Keys of the suggestion count tables
+        self.names = [name for cards in categories for name in cards]
+        self.bits = {name: 1 << i for i, name in enumerate(self.names)}
+        self.positions = {name: i for i, name in enumerate(self.names)}
+        if len(self.bits) != len(self.names):
+            raise ValueError("Card names must be unique across all categories!")
+        self.lower_bits = {name.lower(): bit for name, bit in self.bits.items()}
+        self.category_masks = tuple(self.mask_of(cards) for cards in categories)
+        # Classic names for the first three categories
+        self.suspects_mask, self.weapons_mask, self.rooms_mask = (self.category_masks + (0, 0, 0))[:3]
+        self.all_mask = (1 << len(self.names)) - 1
+        self._names = {}  # mask -> tuple of card names, filled lazily
+
+    def mask_of(self, cards):
+        """Return the mask of the given card names (case-insensitive)."""
+        mask = 0
+        for card in cards:
+            mask |= self.lower_bits[card.lower()]
+        return mask
+
+    def names_of(self, mask):
+        """Return the card names in the mask, in deck order."""
+        names = self._names.get(mask)
+        if names is None:
+            names = tuple(name for i, name in enumerate(self.names) if mask >> i & 1)
+            self._names[mask] = names
+        return names
+
+    def name_of(self, bit):
+        """Return the card name of a single-bit mask."""
+        return self.names[bit.bit_length() - 1]
+
 
 class Player:
-    def __init__(self, name, is_human=False):
+    __slots__ = ("name", "is_human", "rng", "card_index", "seat", "hand", "known", "clue_sheet", "deduction",
+                 "estimator", "strategy", "active", "refutation_history", "previous_suggestions", "suggestion_counts")
+
+    def __init__(self, name, is_human=False, rng=None, card_index=None):
+        """card_index is the game's CardIndex; the classic deck is used if it is omitted."""
+        if card_index is None:
+            card_index = CardIndex(suspects, weapons, rooms)
         self.name = name
         self.is_human = is_human
-        self.cards = []
-        self.known_cards = set()
+        self.rng = rng or random  # Shared with the game so seeded runs are reproducible
+        self.card_index = card_index
+        self.seat = None  # Position at the table, set by the game
+        self.hand = 0  # Bitmask of the cards in hand
+        self.known = 0  # Bitmask of the cards seen, held or deduced to be outside the envelope
+        self.clue_sheet = bytearray(len(card_index.names))  # Clue sheet state per card index
+        self.deduction = None  # DeductionEngine, created once the cards are dealt
+        self.estimator = None  # Optional EnvelopeEstimator guiding AI suggestions and accusations
+        self.strategy = None  # Strategy choosing an AI player's suggestions and risky accusations
         self.active = True
-        self.private_clue_sheet = defaultdict(lambda: "Unknown")  # Keeps track of suspects, weapons, and rooms
         self.refutation_history = []
         self.previous_suggestions = set()  # Track unique suggestions
-        self.suggestion_counts = {"suspects": defaultdict(int), "weapons": defaultdict(int), "rooms": defaultdict(int)}
+        self.suggestion_counts = {key: defaultdict(int) for key in card_index.count_keys}
+
+    @property
+    def cards(self):
+        """The player's hand as card names."""
+        return list(self.card_index.names_of(self.hand))
+
+    @property
+    def known_cards(self):
+        """Cards the player has seen or holds, as card names."""
+        return set(self.card_index.names_of(self.known))
+
+    @property
+    def private_clue_sheet(self):
+        """The clue sheet as {card: status}, keeps track of every card of every category."""
+        return {name: CLUE_SHEET_LABELS[state] for name, state in zip(self.card_index.names, self.clue_sheet)}
+
+    def add_card(self, card):
+        """Deal a card into the player's hand."""
+        self.hand |= self.card_index.bits[card]
+        self.add_known_card(card)
 
     def add_known_card(self, card):
-       
-        self.known_cards.add(card)
-        self.private_clue_sheet[card] = "Seen"
+        bit = self.card_index.bits[card]
+        self.known |= bit
+        self.clue_sheet[bit.bit_length() - 1] = SEEN
 
     def get_matching_cards(self, suggestion):
-        return [card for card in suggestion if card.lower() in (c.lower() for c in self.cards)]
+        return list(self.card_index.names_of(self.hand & self.card_index.mask_of(suggestion)))
 
     def update_clue_sheet(self, suggestion, refuted_card=None):
         """Update the private clue sheet dynamically."""
-        for card in suggestion:
-            
-            if card not in self.known_cards and card != refuted_card:
-                self.private_clue_sheet[card] = "Maybe in Envelope"
-    
+        index = self.card_index
+        maybe = index.mask_of(suggestion) & ~self.known
+        if refuted_card is not None:
+            maybe &= ~index.bits[refuted_card]
+        while maybe:
+            bit = maybe & -maybe
+            self.clue_sheet[bit.bit_length() - 1] = MAYBE_IN_ENVELOPE
+            maybe ^= bit
+
+    def start_deduction(self, hand_sizes):
+        """Create the deduction engine once every player's hand size is known."""
+        self.deduction = DeductionEngine(self.card_index, hand_sizes, self.seat, self.hand)
+        self._sync_deductions()
+
+    def start_estimator(self, confidence):
+        """Let an EnvelopeEstimator choose suggestions and decide on risky accusations."""
+        index = self.card_index
+        self.estimator = EnvelopeEstimator(index, index.category_masks, self.rng, confidence)
+        self.estimator.set_hand(self.hand)
+        self.estimator.exclude(self.known)
+
+    def observe_suggestion(self, suggestion_mask, passed, refuter=None, shown=0, suggester=None):
+        """Learn from a suggestion made at the table (by anyone, including this player).
+
+        passed: seats that could not refute, refuter: seat that refuted (or None),
+        shown: bit of the card shown if this player was the one shown it,
+        suggester: seat that made the suggestion, if known.
+        """
+        if self.strategy is not None:
+            self.strategy.observe(self, suggester, suggestion_mask, passed, refuter, shown)
+        if self.deduction is None:
+            return
+        if refuter == self.seat:
+            refuter = None  # We know our own hand already
+        self.deduction.record_suggestion(suggestion_mask, passed, refuter, shown)
+        self._sync_deductions()
+        if self.estimator is not None:
+            self.estimator.observe(self.deduction, suggestion_mask, passed, refuter)
+
+    def snapshot(self):
+        """The player's state as a tuple of immutable values (see cluedo_snapshot)."""
+        return (
+            self.name, self.is_human, self.hand, self.known, bytes(self.clue_sheet), self.active,
+            frozenset(self.previous_suggestions),
+            tuple(tuple(counts.items()) for counts in self.suggestion_counts.values()),
+            self.deduction.snapshot() if self.deduction is not None else None,
+            self.estimator.snapshot() if self.estimator is not None else None,
+            self.strategy.snapshot() if self.strategy is not None else None,
+        )
+
+    def restore(self, state, hand_sizes, confidence):
+        """Load the state of snapshot() into a fresh Player (the strategy is restored by the game)."""
+        (_name, _is_human, self.hand, self.known, clue_sheet, self.active, previous_suggestions, counts,
+         deduction, estimator, _strategy) = state
+        self.clue_sheet = bytearray(clue_sheet)
+        self.previous_suggestions = set(previous_suggestions)
+        self.suggestion_counts = {key: defaultdict(int, items)
+                                  for key, items in zip(self.card_index.count_keys, counts)}
+        if deduction is not None:
+            self.deduction = DeductionEngine.from_snapshot(self.card_index, hand_sizes, deduction)
+        if estimator is not None:
+            self.estimator = EnvelopeEstimator(self.card_index, self.card_index.category_masks, self.rng, confidence)
+            self.estimator.set_hand(self.hand)
+            self.estimator.restore(estimator)
+
+    def _sync_deductions(self):
+        """Fold cards deduced to be outside the envelope into known and the clue sheet."""
+        deduced = self.deduction.envelope_excluded() & ~self.known
+        self.known |= deduced
+        while deduced:
+            bit = deduced & -deduced
+            self.clue_sheet[bit.bit_length() - 1] = NOT_IN_ENVELOPE
+            deduced ^= bit
+
+    def unknown_cards(self, category_mask):
+        """Cards of a category the player has not seen yet, as names."""
+        return self.card_index.names_of(category_mask & ~self.known)
+
     def get_suggestion(self, suspects, weapons, rooms, global_suggestion_counts):
-        """Generate a suggestion using rule-based deductions with randomness."""
-        unknown_suspects = [s for s in suspects if s not in self.known_cards]
-        unknown_weapons = [w for w in weapons if w not in self.known_cards]
-        unknown_rooms = [r for r in rooms if r not in self.known_cards]
-
-        # Generate all possible combinations
-        all_combinations = [
-           (suspect, weapon, room)
-           for suspect in (unknown_suspects or suspects)
-           for weapon in (unknown_weapons or weapons)
-           for room in (unknown_rooms or rooms)
-        ]
-
-        # Filter out previously made suggestions
-        valid_combinations = [combo for combo in all_combinations if combo not in self.previous_suggestions]
-
-        if not valid_combinations:
-           # If no new combinations are left, allow repeats
-           valid_combinations = all_combinations
-
-        # Choose a random combination and save it
-        suggestion = random.choice(valid_combinations)
+        """Generate a suggestion with the player's strategy (random rule-based without one)."""
+        if self.strategy is not None:
+            suggestion = self.strategy.suggest(self)
+        else:
+            suggestion = self.random_suggestion()
+
+        # Save the suggestion
         self.previous_suggestions.add(suggestion)
 
-        # Increment suggestion counts
-        self.suggestion_counts["suspects"][suggestion[0]] += 1
-        self.suggestion_counts["weapons"][suggestion[1]] += 1
-        self.suggestion_counts["rooms"][suggestion[2]] += 1
+        # Increment suggestion counts, and the global counts for the game
+        for key, card in zip(self.card_index.count_keys, suggestion):
+            self.suggestion_counts[key][card] += 1
+            global_suggestion_counts[key][card] += 1
+
+        return suggestion
 
-        # Increment global counts for the game
-        global_suggestion_counts["suspects"][suggestion[0]] += 1
-        global_suggestion_counts["weapons"][suggestion[1]] += 1
-        global_suggestion_counts["rooms"][suggestion[2]] += 1
+    def random_suggestion(self):
+        """Pick an unseen combination using rule-based deductions with randomness."""
+        index = self.card_index
+        unknown = [self.unknown_cards(mask) or index.names_of(mask) for mask in index.category_masks]
+
+        # Draw random combinations until one has not been suggested before. Rejection
+        # sampling picks uniformly among the new combinations without building them all.
+        choice = self.rng.choice
+        suggestion = None
+        for _ in range(32):
+            combo = tuple(choice(cards) for cards in unknown)
+            if combo not in self.previous_suggestions:
+                suggestion = combo
+                break
+
+        if suggestion is None:
+            # Most combinations were already suggested: enumerate the remaining ones
+            all_combinations = list(product(*unknown))
+            valid_combinations = [combo for combo in all_combinations if combo not in self.previous_suggestions]
+
+            if not valid_combinations:
+               # If no new combinations are left, allow repeats
+               valid_combinations = all_combinations
+            suggestion = choice(valid_combinations)
 
         return suggestion
 
-    def deduce_solution(self, suspects, weapons, rooms):
-        """Try to deduce the solution based on known cards."""
-        unknown_suspects = [s for s in suspects if s not in self.known_cards]
-        unknown_weapons = [w for w in weapons if w not in self.known_cards]
-        unknown_rooms = [r for r in rooms if r not in self.known_cards]
+    def best_guess(self):
+        """The accusation to make without certainty: the most likely envelope, or a random unseen one."""
+        index = self.card_index
+        if self.estimator is not None:
+            cell, _probability = self.estimator.top_hypothesis()
+            return dict(zip(index.keys, self.estimator.cell_names(cell)))
+
+        return {key: self.rng.choice(self.unknown_cards(mask)) for key, mask in zip(index.keys, index.category_masks)}
+
+    def deduce_solution(self, suspects=None, weapons=None, rooms=None):
+        """Try to deduce the solution from the cards seen and the deduction engine.
+
+        The card lists are not needed (the player's CardIndex has every category) and
+        are only accepted for existing callers.
+        """
+        index = self.card_index
+        if self.deduction is not None:
+            envelope = self.deduction.solution_mask()
+            if envelope is not None:
+                return {key: index.name_of(envelope & mask) for key, mask in zip(index.keys, index.category_masks)}
 
         # If only one option is left for each category, deduce the solution
-        suspect = unknown_suspects[0] if len(unknown_suspects) == 1 else None
-        weapon = unknown_weapons[0] if len(unknown_weapons) == 1 else None
-        room = unknown_rooms[0] if len(unknown_rooms) == 1 else None
+        solution = {}
+        for key, mask in zip(index.keys, index.category_masks):
+            unknown = mask & ~self.known
+            if not unknown or unknown & (unknown - 1):
+                return None
+            solution[key] = index.name_of(unknown)
+        return solution
 
-        # Return the deduced solution if it's complete
-        if suspect and weapon and room:
-            return {"suspect": suspect, "weapon": weapon, "room": room}
-        return None
+def seat_names(player_names, num_players):
+    """The first num_players names, with "Player N" for seats beyond the given names."""
+    return list(player_names[:num_players]) + [f"Player {i + 1}" for i in range(len(player_names), num_players)]
 
-class CluedoGame:
-    def __init__(self, player_names, suspects, weapons, rooms):
-        self.suspects = suspects
-        self.weapons = weapons
-        self.rooms = rooms
-        self.solution = {
-            "suspect": random.choice(suspects),
-            "weapon": random.choice(weapons),
-            "room": random.choice(rooms)
-        }
-        self.players = []
-        self.current_turn = 0
 
-        # Global counts for all suggestions
-        self.global_suggestion_counts = {
-            "suspects": defaultdict(int),
-            "weapons": defaultdict(int),
-            "rooms": defaultdict(int)
-        }
+class CluedoGame:
+    # AI strategies by name; CluedoGame(ai=...) also accepts a Strategy class or factory
+    STRATEGIES = {"estimator": EstimatorStrategy, "rule": RuleStrategy, "ismcts": ISMCTSStrategy}
+
+    def __init__(self, player_names, suspects=None, weapons=None, rooms=None, num_players=None, seed=None,
+                 headless=False, turn_delay=3, max_turns=None, ai="estimator", confidence=0.9, recorder=None,
+                 categories=None, stats=None):
+        """Create a game.
+
+        In headless mode every player is AI, nothing is printed, there is no pause
+        between turns and game_loop() returns a GameResult instead of prompting.
+        num_players skips the Tk setup dialog (it is required when headless) and seed
+        makes the game reproducible.
+        ai selects the AI players' strategy: "estimator" suggests by expected information
+        gain and only makes a risky accusation once the most likely envelope reaches
+        the given confidence, "rule" keeps the random suggestions and 10% risky accusations,
+        "ismcts" searches sampled deals (see cluedo_ismcts). It may also be a Strategy
+        class or factory, or a list with one of these per seat.
+        recorder is an optional cluedo_events.GameRecorder that receives every event,
+        stats an optional cluedo_stats.SuggestionStats that counts every suggestion.
+        categories replaces suspects, weapons and rooms for variants: an ordered
+        {key: cards} dict with any number of categories of any size, e.g.
+        {"suspect": [...], "weapon": [...], "room": [...], "motive": [...]}. The
+        solution and accusations then have one card per key. Any number of players
+        can take part; seats beyond player_names are called "Player N".
+        """
+        if categories is None:
+            categories = {"suspect": suspects, "weapon": weapons, "room": rooms}
+        self.configure(categories, headless, turn_delay, max_turns, ai, confidence, recorder, stats)
+        self.rng = random.Random(seed)
+        self.solution = {key: self.rng.choice(cards) for key, cards in self.categories.items()}
 
         # Dynamically set up players
-        self.setup_players(player_names)
+        self.setup_players(player_names, num_players)
 
         # Assign cards after players are created
         self.assign_cards()
+        if stats is not None:
+            stats.check_game(self.card_index.names, len(self.players))
+            stats.games += 1
+
+    def configure(self, categories, headless, turn_delay, max_turns, ai, confidence, recorder, stats=None):
+        """Set the rules and options of the game and its empty state (shared with from_snapshot)."""
+        self.categories = {key: list(cards) for key, cards in categories.items()}
+        if any(not cards for cards in self.categories.values()):
+            raise ValueError("Every card category needs at least one card!")
+        for choice in (ai if isinstance(ai, (list, tuple)) else [ai]):
+            if isinstance(choice, str) and choice not in self.STRATEGIES:
+                raise ValueError(f"Unknown AI strategy: {choice}")
+        self.suspects = self.categories.get("suspect")
+        self.weapons = self.categories.get("weapon")
+        self.rooms = self.categories.get("room")
+        self.headless = headless
+        self.turn_delay = 0 if headless else turn_delay
+        self.max_turns = max_turns
+        self.ai = ai
+        self.confidence = confidence
+        self.recorder = recorder
+        self.stats = stats
+        self.card_index = CardIndex(*self.categories.values(), keys=tuple(self.categories))
+        self.players = []
+        self.holders = {}  # Card -> seat holding it (envelope cards are absent), filled by assign_cards
+        self.current_turn = 0
+        self.rounds = 0
+        self.next_seat = 0  # Seat to look at next in the current round
+        self.winner = None
+        self.game_over = False
+        self.eliminated = []
+        self.snapshot_config = None  # Rules shared by every snapshot of the game, built on first use
 
-    def setup_players(self, player_names):
+        # Global counts for all suggestions
+        self.global_suggestion_counts = {key: defaultdict(int) for key in self.card_index.count_keys}
+
+    def setup_players(self, player_names, num_players=None):
         """Dynamically ask how many players will participate and create them."""
-        root = tk.Tk()
-        root.withdraw()
-        num_players = simpledialog.askinteger("Player Setup", "Enter the number of players (3-6):", minvalue=3, maxvalue=6)
-        root.destroy()
+        if num_players is None:
+            if self.headless:
+                raise ValueError("A headless game needs num_players, it cannot ask for it")
+            root = tk.Tk()
+            root.withdraw()
+            num_players = simpledialog.askinteger("Player Setup", "Enter the number of players (3-6):", minvalue=3, maxvalue=6)
+            root.destroy()
 
-        if num_players > len(player_names):
-            raise ValueError("Not enough player names available for the selected number of players!")
+        if num_players < 2:
+            raise ValueError("A game needs at least two players!")
 
-        for i in range(num_players):
-            if i == 0:
+        for i, name in enumerate(seat_names(player_names, num_players)):
+            if i == 0 and not self.headless:
                 # First player is always human
-                self.players.append(Player(player_names[i], is_human=True))
+                self.players.append(Player(name, is_human=True, rng=self.rng, card_index=self.card_index))
             else:
                 # Remaining players are AI
-                self.players.append(Player(player_names[i], is_human=False))
+                self.players.append(Player(name, is_human=False, rng=self.rng, card_index=self.card_index))
+            self.players[i].seat = i
+
+    def announce(self, *args):
+        """Print game output unless running headless."""
+        if not self.headless:
+            print(*args)
 
     def assign_cards(self):
         """Distribute cards to players after setting aside the solution."""
-        remaining_cards = (
-            [s for s in self.suspects if s != self.solution["suspect"]] +
-            [w for w in self.weapons if w != self.solution["weapon"]] +
-            [r for r in self.rooms if r != self.solution["room"]]
-        )
-        random.shuffle(remaining_cards)
+        remaining_cards = [card for key, cards in self.categories.items() for card in cards
+                           if card != self.solution[key]]
+        self.rng.shuffle(remaining_cards)
+        self.holders = {}
         for i, card in enumerate(remaining_cards):
-            self.players[i % len(self.players)].cards.append(card)
-            self.players[i % len(self.players)].add_known_card(card)
+            seat = i % len(self.players)
+            self.players[seat].add_card(card)
+            self.holders[card] = seat
+            self.record_event(DEAL, actor=seat, cards=(card,))
+        self.record_event(SOLUTION, target=len(self.players), cards=self.solution.values())
+
+        # Hand sizes are public, so every player can start deducing
+        hand_sizes = [player.hand.bit_count() for player in self.players]
+        for player in self.players:
+            player.start_deduction(hand_sizes)
+            if not player.is_human:
+                player.strategy = self.make_strategy(player.seat)
+                player.strategy.setup(player, self)
+
+    def make_strategy(self, seat):
+        """Create the Strategy of the AI player at the given seat from the ai argument."""
+        choice = self.ai[seat] if isinstance(self.ai, (list, tuple)) else self.ai
+        if isinstance(choice, str):
+            choice = self.STRATEGIES[choice]
+        strategy = choice()
+        if not isinstance(strategy, Strategy):
+            raise TypeError(f"AI strategy factory returned {type(strategy).__name__}, not a Strategy")
+        return strategy
         
+    def find_refuter(self, seat, suggestion):
+        """Return (refuter seat or None, seats that pass) for a suggestion made at seat.
+
+        Players are asked clockwise from the suggester, so the refuter is the nearest
+        holder of a suggested card in that direction. The holder of every card is
+        looked up in the card -> seat index instead of scanning each hand, so the
+        cost depends on the number of suggested cards, not on the number of players.
+        """
+        num_players = len(self.players)
+        holders = self.holders
+        distance = num_players  # A full round: nobody can refute
+        for card in suggestion:
+            holder = holders.get(card, seat)  # Envelope cards count as the suggester's
+            if holder != seat:
+                holder_distance = (holder - seat) % num_players
+                if holder_distance < distance:
+                    distance = holder_distance
+        refuter = (seat + distance) % num_players if distance < num_players else None
+        return refuter, [(seat + step) % num_players for step in range(1, distance)]
+
     def refute_suggestion(self, suggestion, suggesting_player):
         """Find a player to refute the suggestion and return the refuted card."""
+        suggestion_mask = self.card_index.mask_of(suggestion)
+        seat = suggesting_player.seat
+        self.record_event(SUGGESTION, actor=seat, cards=suggestion)
+        refuter, passed = self.find_refuter(seat, suggestion)
+        for other in passed:
+            self.record_event(PASS, actor=other, target=seat)
+
+        if refuter is None:
+            self.record_event(REFUTATION, target=seat)
+            if self.stats is not None:
+                positions = self.card_index.positions
+                self.stats.record_suggestion(seat, [positions[card] for card in suggestion])
+            self.broadcast_suggestion(suggesting_player, suggestion_mask, passed)
+            return None, None
+
+        player = self.players[refuter]
+        # Show the matching card with the lowest index
+        matching = player.hand & suggestion_mask
+        shown = matching & -matching
+        refuted_card = self.card_index.name_of(shown)
+        self.record_event(REFUTATION, actor=refuter, target=seat, cards=(refuted_card,))
+        if self.stats is not None:
+            positions = self.card_index.positions
+            self.stats.record_suggestion(seat, [positions[card] for card in suggestion], shown.bit_length() - 1)
+        suggesting_player.add_known_card(refuted_card)
+        suggesting_player.update_clue_sheet(suggestion, refuted_card)
+        self.broadcast_suggestion(suggesting_player, suggestion_mask, passed, refuter, shown)
+
+        if suggesting_player.is_human:
+            self.announce(f"{player.name} was refuted: {refuted_card}.")
+
+        return player.name, refuted_card
+
+    def record_event(self, kind, actor=-1, target=-1, cards=(), flags=0):
+        """Send an event to the recorder, if any. Cards are given by name."""
+        if self.recorder is not None:
+            bits = self.card_index.bits
+            self.recorder.record(kind, self.current_turn, actor, target,
+                                 [bits[card].bit_length() - 1 for card in cards], flags)
+
+    def broadcast_suggestion(self, suggesting_player, suggestion_mask, passed, refuter=None, shown=0):
+        """Let every player's deduction engine learn from the outcome of a suggestion."""
         for player in self.players:
-            
-            if player == suggesting_player:
-                continue
-            matching_cards = player.get_matching_cards(suggestion)
-            if matching_cards:
-                refuted_card = random.choice(matching_cards)
-                suggesting_player.add_known_card(refuted_card)
-                suggesting_player.update_clue_sheet(suggestion, refuted_card)
-
-                if suggesting_player.is_human:
-                   
-                   print(f"{player.name} was refuted: {refuted_card}.")
-                
-                return player.name, refuted_card
-        
-        return None, None
+            player.observe_suggestion(suggestion_mask, passed, refuter, shown if player is suggesting_player else 0,
+                                      suggesting_player.seat)
 
     def get_selection(self, options, prompt):
         
@@ -199,12 +533,12 @@ class CluedoGame:
 
     def handle_turn(self, player):
         """Handle a player's turn."""
-        print("\n" + "-" * 30)
+        self.announce("\n" + "-" * 30)
         #print(f"{player.name}'s turn!")
 
 
         if not player.active:
-            print(f"{player.name} is eliminated and skips their turn.")
+            self.announce(f"{player.name} is eliminated and skips their turn.")
             return
 
         if player.is_human:
@@ -213,46 +547,31 @@ class CluedoGame:
             self.ai_turn(player)
               
     def display_global_suggestion_counts(self):
-        """Display the total counts of all suspects, weapons, and rooms suggested so far."""
-        print("\n--- Global Suggestion Counts ---")
-        print("Suspects:")
-        for suspect, count in self.global_suggestion_counts["suspects"].items():
-            print(f"  {suspect}: {count} times")
-
-        print("Weapons:")
-        for weapon, count in self.global_suggestion_counts["weapons"].items():
-            print(f"  {weapon}: {count} times")
-
-        print("Rooms:")
-        for room, count in self.global_suggestion_counts["rooms"].items():
-            print(f"  {room}: {count} times")
+        """Display the total counts of all cards of every category suggested so far."""
+        self.announce("\n--- Global Suggestion Counts ---")
+        for key in self.card_index.count_keys:
+            self.announce(f"{key.capitalize()}:")
+            for card, count in self.global_suggestion_counts[key].items():
+                self.announce(f"  {card}: {count} times")
 
     def manual_turn(self, player):
         """Handle the manual player's turn."""
-        print(f"Your cards: {', '.join(player.cards)}")
+        self.announce(f"Your cards: {', '.join(player.cards)}")
          
         # Dynamically filter out seen cards and cards in hand from options
-        suspects = [s for s in self.suspects if player.private_clue_sheet[s] in ["Maybe in Envelope", "Unknown"]]
-        weapons = [w for w in self.weapons if player.private_clue_sheet[w] in ["Maybe in Envelope", "Unknown"]]
-        rooms = [r for r in self.rooms if player.private_clue_sheet[r] in ["Maybe in Envelope", "Unknown"]]
-
-        # Fallback to all options if the filtered list is empty
-        if not suspects:
-            suspects = self.suspects
-            print("All suspects have been seen. Falling back to all suspects.")
-        if not weapons:
-            weapons = self.weapons
-            print("All weapons have been seen. Falling back to all weapons.")
-        if not rooms:
-            rooms = self.rooms
-            print("All rooms have been seen. Falling back to all rooms.")
-
-        suspect = self.get_selection(suspects, "Choose a suspect:")
-        weapon = self.get_selection(weapons, "Choose a weapon:")
-        room = self.get_selection(rooms, "Choose a room:")
-
-        suggestion = (suspect, weapon, room)
-        print(f"You suggest: {suggestion}")
+        clue_sheet = player.private_clue_sheet
+        suggestion = []
+        for key, cards in self.categories.items():
+            options = [card for card in cards if clue_sheet[card] in ["Maybe in Envelope", "Unknown"]]
+
+            # Fallback to all options if the filtered list is empty
+            if not options:
+                options = cards
+                self.announce(f"All {key}s have been seen. Falling back to all {key}s.")
+            suggestion.append(self.get_selection(options, f"Choose a {key}:"))
+
+        suggestion = tuple(suggestion)
+        self.announce(f"You suggest: {suggestion}")
 
         # Process the suggestion
         refuted_by, refuted_card = self.refute_suggestion(suggestion, player)        
@@ -260,159 +579,260 @@ class CluedoGame:
         if refuted_card:
            pass
         else:
-           print("No one could refute your suggestion.")
+           self.announce("No one could refute your suggestion.")
 
         self.show_clue_sheet(player)
 
         accuse = input("Do you want to make an accusation? (yes/no): ").strip().lower()
         if accuse == "yes":
-           accusation = {
-            "suspect": self.get_selection(self.suspects, "Accuse: Choose a suspect:"),
-            "weapon": self.get_selection(self.weapons, "Accuse: Choose a weapon:"),
-            "room": self.get_selection(self.rooms, "Accuse: Choose a room:")
-           }
-           self.make_accusation(player, accusation)            
+           self.make_accusation(player, self.select_accusation())
+
+    def select_accusation(self):
+        """Let the manual player pick one card of every category to accuse."""
+        return {key: self.get_selection(cards, f"Accuse: Choose a {key}:") for key, cards in self.categories.items()}
 
     def ai_turn(self, player):
         """Handle AI player actions using hybrid logic."""
         if not player.active:
-            print(f"{player.name} is eliminated and skips their turn.")
+            self.announce(f"{player.name} is eliminated and skips their turn.")
             return
 
-        print(f"{player.name}'s turn! Thinking...")
+        self.announce(f"{player.name}'s turn! Thinking...")
 
         # Rule-based deductions for suggestion
         suggestion = player.get_suggestion(self.suspects, self.weapons, self.rooms, self.global_suggestion_counts)
-        print(f"{player.name} suggests: {suggestion}")
+        self.announce(f"{player.name} suggests: {suggestion}")
 
         # Process the suggestion
         refuted_by, refuted_card = self.refute_suggestion(suggestion, player)
         if refuted_card:
-            print(f"{refuted_by} refuted {player.name}'s suggestion.")
+            self.announce(f"{refuted_by} refuted {player.name}'s suggestion.")
             player.add_known_card(refuted_card)
         else:
-            print(f"No one refuted {player.name}'s suggestion.")
+            self.announce(f"No one refuted {player.name}'s suggestion.")
 
         # Deduce and accuse if confident
-        deduced_solution = player.deduce_solution(self.suspects, self.weapons, self.rooms)
+        deduced_solution = player.deduce_solution()
         if deduced_solution:
-           print(f"{player.name} deduces: {deduced_solution}")
+           self.announce(f"{player.name} deduces: {deduced_solution}")
            self.make_accusation(player, deduced_solution)
-        elif self.risk_based_accusation(player):
-           # Make a risky accusation
-           accusation = {
-               "suspect": random.choice([s for s in self.suspects if s not in player.known_cards]),
-               "weapon": random.choice([w for w in self.weapons if w not in player.known_cards]),
-               "room": random.choice([r for r in self.rooms if r not in player.known_cards]),
-           }
-           self.make_accusation(player, accusation)
+        else:
+           # The strategy decides on a risky accusation
+           accusation = player.strategy.risky_accusation(player)
+           if accusation:
+               self.make_accusation(player, accusation)
 
     def make_accusation(self, player, accusation=None):
         """Allow a player to make an accusation."""
         if accusation is None:  # For human players, prompt for input
-           print(f"{player.name}, make an accusation!")
-           suspect = self.get_selection(self.suspects, "Accuse: Choose a suspect:")
-           weapon = self.get_selection(self.weapons, "Accuse: Choose a weapon:")
-           room = self.get_selection(self.rooms, "Accuse: Choose a room:")
-
-           accusation = {"suspect": suspect, "weapon": weapon, "room": room}
-        print(f"{player.name} accuses: {accusation}")
+           self.announce(f"{player.name}, make an accusation!")
+           accusation = self.select_accusation()
+        self.announce(f"{player.name} accuses: {accusation}")
+        self.record_accusation(player, accusation)
 
         if accusation == self.solution:
-            print(f"🎉 {player.name} wins! The solution was: {self.solution}")
-            exit()
+            self.announce(f"🎉 {player.name} wins! The solution was: {self.solution}")
+            self.winner = player
+            self.game_over = True
         else:
-            print(f"❌ {player.name}'s accusation was incorrect!")
+            self.announce(f"❌ {player.name}'s accusation was incorrect!")
             player.active = False
-            print(f"{player.name} is eliminated. They can no longer suggest or accuse but can still refute suggestions.")
+            self.eliminated.append((player.name, self.current_turn))
+            self.record_event(ELIMINATION, actor=player.seat)
+            self.announce(f"{player.name} is eliminated. They can no longer suggest or accuse but can still refute suggestions.")
+
+    def record_accusation(self, player, accusation):
+        self.record_event(ACCUSATION, actor=player.seat,
+                          cards=tuple(accusation[key] for key in self.categories),
+                          flags=int(accusation == self.solution))
 
     def show_clue_sheet(self, player):
         """Display the current player's private clue sheet."""
-        print(f"\n--- {player.name}'s Clue Sheet ---")
+        self.announce(f"\n--- {player.name}'s Clue Sheet ---")
         table = [[key, value] for key, value in player.private_clue_sheet.items()]
-        print(tabulate(table, headers=["Card", "Status"], tablefmt="grid"))
-
-    def risk_based_accusation(self, player):
-        """Decide if the AI should make a risky accusation."""
-        # 10% chance of making a risky accusation
-        return random.random() < 0.1
+        self.announce(tabulate(table, headers=["Card", "Status"], tablefmt="grid"))
 
     def should_accuse(self, player):
         """Determine if the AI should accuse based on confidence."""
-        possible_suspects = [s for s in self.suspects if s not in player.known_cards]
-        possible_weapons = [w for w in self.weapons if w not in player.known_cards]
-        possible_rooms = [r for r in self.rooms if r not in player.known_cards]      
-        return len(possible_suspects) == 1 and len(possible_weapons) == 1 and len(possible_rooms) == 1
+        return player.deduce_solution() is not None
 
     def game_loop(self):
-        """Run the main game loop."""
-        while len([player for player in self.players if player.active]) > 1:
-            for i, player in enumerate(self.players):  # Use enumerate to get the index
+        """Run the main game loop and return a GameResult."""
+        while self.play_turn():
+            if self.turn_delay and not self.game_over:
+                time.sleep(self.turn_delay)  # Pause between turns
+
+        # End the game when someone won or there's only one or no active player left
+        return self.end_game()
+
+    def play_turn(self):
+        """Play the next active player's turn; return False once the game loop is over.
+
+        Rounds go round the table from seat 0. A new round starts only while nobody
+        has won, more than one player is active and max_turns has not been reached.
+        Between two calls the game can be snapshot() and resumed exactly.
+        """
+        while True:
+            if self.next_seat == 0:
+                if self.game_over or sum(player.active for player in self.players) <= 1:
+                    return False
+                if self.rounds and self.max_turns is not None and self.current_turn >= self.max_turns:
+                    return False
+
+            for seat in range(self.next_seat, len(self.players)):
+                player = self.players[seat]
                 if player.active:
+                    self.current_turn += 1
                     self.handle_turn(player)
-                    time.sleep(3)  # Pause between turns
-
-            # Display global suggestion counts at the end of the last player's turn
+                    self.next_seat = seat + 1
+                    if self.game_over:
+                        self.end_round()
+                    return True
+            self.end_round()
+
+    def end_round(self):
+        """Close the current round; the next turn starts a new one from seat 0."""
+        self.rounds += 1
+        self.next_seat = 0
+
+        # Display global suggestion counts at the end of the last player's turn
+        if not self.headless and not (self.max_turns is not None and self.current_turn >= self.max_turns):
             self.display_global_suggestion_counts()
 
-        # End the game when there's only one or no active player left
-        self.end_game()
-    
+    def snapshot(self):
+        """Capture the whole game between two turns as an immutable GameSnapshot.
+
+        The recorder and the suggestion stats are not part of the snapshot. See cluedo_snapshot.
+        """
+        if self.snapshot_config is None:
+            self.snapshot_config = {
+                "categories": {key: tuple(cards) for key, cards in self.categories.items()},
+                "headless": self.headless, "turn_delay": self.turn_delay, "max_turns": self.max_turns,
+                "ai": self.snapshot_ai(), "confidence": self.confidence,
+            }
+        return GameSnapshot(
+            self.snapshot_config,
+            (self.rng.getstate(), tuple(self.solution.values()), self.current_turn, self.rounds, self.next_seat,
+             self.winner.seat if self.winner is not None else None, self.game_over, tuple(self.eliminated),
+             tuple(tuple(counts.items()) for counts in self.global_suggestion_counts.values())),
+            tuple(player.snapshot() for player in self.players),
+        )
+
+    def snapshot_ai(self):
+        """The ai argument for snapshots, with the built-in Strategy classes replaced by their names."""
+        names = {strategy: name for name, strategy in self.STRATEGIES.items()}
+
+        def reference(choice):
+            return names.get(choice, choice) if isinstance(choice, type) else choice
+
+        if isinstance(self.ai, (list, tuple)):
+            return tuple(reference(choice) for choice in self.ai)
+        return reference(self.ai)
+
+    @classmethod
+    def from_snapshot(cls, snapshot, recorder=None, stats=None):
+        """Create a game that carries on exactly where the snapshot was taken."""
+        config = snapshot.config
+        game = cls.__new__(cls)
+        game.configure(config["categories"], config["headless"], config["turn_delay"], config["max_turns"],
+                       config["ai"], config["confidence"], recorder, stats)
+        game.snapshot_config = config
+        (rng_state, solution, game.current_turn, game.rounds, game.next_seat, winner, game.game_over, eliminated,
+         counts) = snapshot.game
+        game.rng = random.Random()
+        game.rng.setstate(rng_state)
+        game.solution = dict(zip(game.categories, solution))
+        game.eliminated = list(eliminated)
+        game.global_suggestion_counts = {key: defaultdict(int, items)
+                                         for key, items in zip(game.card_index.count_keys, counts)}
+
+        hand_sizes = [state[2].bit_count() for state in snapshot.players]
+        for seat, state in enumerate(snapshot.players):
+            player = Player(state[0], is_human=state[1], rng=game.rng, card_index=game.card_index)
+            player.seat = seat
+            player.restore(state, hand_sizes, game.confidence)
+            game.players.append(player)
+            for card in game.card_index.names_of(player.hand):
+                game.holders[card] = seat
+        game.winner = game.players[winner] if winner is not None else None
+
+        for player, state in zip(game.players, snapshot.players):
+            if not player.is_human:
+                player.strategy = game.make_strategy(player.seat)
+                player.strategy.restore(player, game, state[-1])
+        return game
+
+    def fork(self):
+        """An independent copy of the game for what-if analysis; this game is not affected."""
+        return type(self).from_snapshot(self.snapshot())
+
+    def game_result(self):
+        """Summarise the current state of the game as a GameResult."""
+        return GameResult(
+            winner=self.winner.name if self.winner else None,
+            solution=self.solution,
+            turns=self.current_turn,
+            rounds=self.rounds,
+            eliminated=list(self.eliminated),
+        )
+
     def end_game(self):
         """End the game and reveal the solution."""
-        print("\n--- Game Over ---")
+        if self.winner is not None:
+            return self.game_result()
+
+        self.game_over = True
+        self.announce("\n--- Game Over ---")
 
         # Check if a winner exists
         active_players = [player for player in self.players if player.active]
 
         if len(active_players) == 1:
            final_player = active_players[0]
-           print(f"Only {final_player.name} remains active.")
+           self.announce(f"Only {final_player.name} remains active.")
 
            if final_player.is_human:
-              print(f"{final_player.name}, you must make a final accusation to win.")
+              self.announce(f"{final_player.name}, you must make a final accusation to win.")
 
               # Allow manual player to input their final accusation
-              suspect = self.get_selection(self.suspects, "Accuse: Choose a suspect:")
-              weapon = self.get_selection(self.weapons, "Accuse: Choose a weapon:")
-              room = self.get_selection(self.rooms, "Accuse: Choose a room:")
-              accusation = {"suspect": suspect, "weapon": weapon, "room": room}
+              accusation = self.select_accusation()
 
-              print(f"{final_player.name} accuses: {accusation}")
+              self.announce(f"{final_player.name} accuses: {accusation}")
+              self.record_accusation(final_player, accusation)
 
               if accusation == self.solution:
-                  print(f"🎉 {final_player.name} wins! The solution was: {self.solution}")
+                  self.announce(f"🎉 {final_player.name} wins! The solution was: {self.solution}")
+                  self.winner = final_player
               else:
-                  print(f"❌ {final_player.name}'s accusation was incorrect!")
-                  print("No one wins the game!")
-                  print("The solution was:", self.solution)
+                  self.announce(f"❌ {final_player.name}'s accusation was incorrect!")
+                  self.announce("No one wins the game!")
+                  self.announce("The solution was:", self.solution)
            else:
 
-               # Generate an automatic accusation
-               possible_suspects = [s for s in self.suspects if s not in final_player.known_cards]
-               possible_weapons = [w for w in self.weapons if w not in final_player.known_cards]
-               possible_rooms = [r for r in self.rooms if r not in final_player.known_cards]
-
-
-               # Choose random options for the accusation if knowledge is incomplete
-               suspect = possible_suspects[0] if possible_suspects else random.choice(self.suspects)
-               weapon = possible_weapons[0] if possible_weapons else random.choice(self.weapons)
-               room = possible_rooms[0] if possible_rooms else random.choice(self.rooms)
-
-               accusation = {"suspect": suspect, "weapon": weapon, "room": room}
-               print(f"{final_player.name} accuses: {accusation}")
+               # Generate an automatic accusation: the first unseen card of every category,
+               # or a random card of a category with nothing left unseen
+               accusation = {}
+               for key, mask in zip(self.card_index.keys, self.card_index.category_masks):
+                   possible = final_player.unknown_cards(mask)
+                   accusation[key] = possible[0] if possible else self.rng.choice(self.categories[key])
+               self.announce(f"{final_player.name} accuses: {accusation}")
+               self.record_accusation(final_player, accusation)
 
                if accusation == self.solution:
-                  print(f"🎉 {final_player.name} wins! The solution was: {self.solution}")
+                  self.announce(f"🎉 {final_player.name} wins! The solution was: {self.solution}")
+                  self.winner = final_player
                else:
-                  print(f"❌ {final_player.name}'s accusation was incorrect!")
-                  print("No one wins the game!")
-                  print("The solution was:", self.solution)
+                  self.announce(f"❌ {final_player.name}'s accusation was incorrect!")
+                  self.announce("No one wins the game!")
+                  self.announce("The solution was:", self.solution)
+        elif active_players:
+           self.announce("Turn limit reached! No one solved the mystery.")
+           self.announce("The solution was:", self.solution)
         else:
-           print("❌ All players have been eliminated! No one solved the mystery.")
-           print("The solution was:", self.solution)
+           self.announce("❌ All players have been eliminated! No one solved the mystery.")
+           self.announce("The solution was:", self.solution)
 
-        exit()
+        return self.game_result()
 
 # Game setup
 player_names = ["Miss Scarlett", "Professor Plum", "Mrs. Peacock", "Colonel Mustard", "Reverend Green", "Dr. Orchid"]
@@ -421,5 +841,7 @@ weapons = ["Knife", "Candlestick", "Revolver", "Rope", "Lead Pipe", "Wrench"]
 rooms = ["Study", "Hall", "Lounge", "Library", "Billiard Room", "Dining Room", "Kitchen", "Ballroom", "Conservatory"]
 
 
-game = CluedoGame(player_names, suspects, weapons, rooms)
-game.game_loop()  
\ No newline at end of file
+if __name__ == "__main__":
+    game = CluedoGame(player_names, suspects, weapons, rooms)
+    game.game_loop()
+  
\ No newline at end of file
@@ -0,0 +1,231 @@
+"""Benchmarks for the Cluedo AI.
+
+strategies: win rate of the ISMCTS player against rule-based opponents. Game i
+seats the ISMCTS player at seat i % players, and the same seed is replayed with
+a rule player in that seat as the baseline, so both rates are measured on the
+same deals and seats.
+
+scaling: cost of a turn as the deck and the table grow, on synthetic decks of
+C categories x N cards played by rule-based AIs, next to the cost of finding
+the refuter with the card -> holder index and with a scan of the hands.
+
+snapshots: cost of CluedoGame.snapshot() taken after every turn, of
+serializing it and of restoring a fork from it; every fork is checked to finish
+exactly like the original game.
+
+Usage:
+    python cluedo_benchmark.py strategies --games 400 --players 4 --budget 0.1 --workers 8
+    python cluedo_benchmark.py scaling --decks 3x7 4x25 6x50 --players 4 12 24 48
+    python cluedo_benchmark.py snapshots --games 50 --players 4 --ai estimator
+"""
+import argparse
+import os
+import random
+import time
+from functools import partial
+from multiprocessing import Pool
+
+from Cluedo_Game import CluedoGame, player_names, seat_names, suspects, weapons, rooms
+from cluedo_ismcts import ISMCTSStrategy
+from cluedo_snapshot import GameSnapshot
+
+
+def play(seed, ai, num_players):
+    game = CluedoGame(player_names, suspects, weapons, rooms, num_players=num_players, seed=seed, headless=True,
+                      ai=ai)
+    return game, game.game_loop()
+
+
+def run_strategy_chunk(args):
+    """Worker entry point: play a range of seeds with and without the ISMCTS player; return summed counts."""
+    first_seed, count, num_players, opponent, budget, iterations = args
+    totals = {"games": 0, "wins": 0, "eliminated": 0, "baseline_wins": 0, "decisions": 0, "playouts": 0,
+              "search_time": 0.0}
+    for seed in range(first_seed, first_seed + count):
+        seat = seed % num_players
+        name = seat_names(player_names, num_players)[seat]
+        ai = [opponent] * num_players
+        ai[seat] = partial(ISMCTSStrategy, budget=budget, iterations=iterations)
+        game, result = play(seed, ai, num_players)
+        strategy = game.players[seat].strategy
+        totals["games"] += 1
+        totals["wins"] += result.winner == name
+        totals["eliminated"] += any(player == name for player, _turn in result.eliminated)
+        totals["decisions"] += strategy.decisions
+        totals["playouts"] += strategy.playouts
+        totals["search_time"] += strategy.search_time
+
+        _game, baseline = play(seed, opponent, num_players)
+        totals["baseline_wins"] += baseline.winner == name
+    return totals
+
+
+def strategies(args):
+    chunks = [(args.seed + start, min(args.chunk_size, args.games - start), args.players, args.opponent, args.budget,
+               args.iterations)
+              for start in range(0, args.games, args.chunk_size)]
+    totals = {}
+    start = time.perf_counter()
+    with Pool(processes=args.workers) as pool:
+        for partial_totals in pool.imap_unordered(run_strategy_chunk, chunks):
+            for key, value in partial_totals.items():
+                totals[key] = totals.get(key, 0) + value
+    elapsed = time.perf_counter() - start
+
+    games = max(totals["games"], 1)
+    decisions = max(totals["decisions"], 1)
+    print(f"{totals['games']} games, {args.players} players, ISMCTS vs {args.opponent} "
+          f"({'%.3fs budget' % args.budget if args.budget else '%d playouts' % args.iterations} per decision)")
+    rows = [
+        ("ISMCTS win rate", f"{totals['wins'] / games:.1%} (eliminated in {totals['eliminated'] / games:.1%})"),
+        (f"{args.opponent} AI in the same seats", f"{totals['baseline_wins'] / games:.1%}"),
+        ("Fair share", f"{1 / args.players:.1%}"),
+    ]
+    for label, value in rows:
+        print(f"  {label + ':':<30}{value}")
+    print(f"  Search: {totals['playouts'] / decisions:,.0f} playouts and "
+          f"{totals['search_time'] / decisions * 1000:.1f} ms per decision, "
+          f"{totals['playouts'] / max(totals['search_time'], 1e-9):,.0f} playouts/s per process")
+    print(f"  Elapsed: {elapsed:.1f}s")
+
+
+def synthetic_categories(num_categories, cards_per_category):
+    """A deck of num_categories x cards_per_category cards with generated names."""
+    return {f"category{c + 1}": [f"card {c + 1}.{i + 1}" for i in range(cards_per_category)]
+            for c in range(num_categories)}
+
+
+def scan_refuter(game, seat, suggestion_mask):
+    """CluedoGame.find_refuter without the card index: ask every hand clockwise until one matches."""
+    players = game.players
+    num_players = len(players)
+    passed = []
+    for step in range(1, num_players):
+        other = (seat + step) % num_players
+        if players[other].hand & suggestion_mask:
+            return other, passed
+        passed.append(other)
+    return None, passed
+
+
+def time_refutations(game, count, seed):
+    """Mean seconds per refuter lookup (index, scan) over count random suggestions."""
+    rng = random.Random(seed)
+    num_players = len(game.players)
+    queries = []
+    for _ in range(count):
+        suggestion = tuple(rng.choice(cards) for cards in game.categories.values())
+        queries.append((rng.randrange(num_players), suggestion, game.card_index.mask_of(suggestion)))
+    start = time.perf_counter()
+    indexed = [game.find_refuter(seat, suggestion) for seat, suggestion, _mask in queries]
+    index_time = time.perf_counter() - start
+    start = time.perf_counter()
+    scanned = [scan_refuter(game, seat, mask) for seat, _suggestion, mask in queries]
+    scan_time = time.perf_counter() - start
+    if indexed != scanned:
+        raise AssertionError("Indexed and scanned refuters differ")
+    return index_time / count, scan_time / count
+
+
+def scaling(args):
+    print(f"{'cards':>6} {'categories':>10} {'players':>8} {'turns/game':>11} {'ms/turn':>8} "
+          f"{'index us':>9} {'scan us':>8}")
+    for deck in args.decks:
+        num_categories, cards_per_category = (int(part) for part in deck.lower().split("x"))
+        categories = synthetic_categories(num_categories, cards_per_category)
+        for num_players in args.players:
+            turns = 0
+            elapsed = 0.0
+            for seed in range(args.seed, args.seed + args.games):
+                game = CluedoGame(player_names, num_players=num_players, seed=seed, headless=True,
+                                  max_turns=args.max_turns, ai="rule", categories=categories)
+                start = time.perf_counter()
+                result = game.game_loop()
+                elapsed += time.perf_counter() - start
+                turns += result.turns
+            index_time, scan_time = time_refutations(game, args.lookups, args.seed)
+            print(f"{num_categories * cards_per_category:>6} {num_categories:>10} {num_players:>8} "
+                  f"{turns / args.games:>11.1f} {elapsed / max(turns, 1) * 1000:>8.3f} "
+                  f"{index_time * 1e6:>9.2f} {scan_time * 1e6:>8.2f}")
+
+
+def snapshots(args):
+    totals = {"snapshots": 0, "snapshot": 0.0, "bytes": 0, "to_bytes": 0.0, "forks": 0, "fork": 0.0}
+    for seed in range(args.seed, args.seed + args.games):
+        game = CluedoGame(player_names, suspects, weapons, rooms, num_players=args.players, seed=seed, headless=True,
+                          ai=args.ai)
+        taken = []
+        while game.play_turn():
+            start = time.perf_counter()
+            taken.append(game.snapshot())
+            totals["snapshot"] += time.perf_counter() - start
+        result = game.end_game()
+        totals["snapshots"] += len(taken)
+
+        # Serialize and fork from the middle of the game, then play the fork to the end
+        middle = taken[len(taken) // 2]
+        start = time.perf_counter()
+        data = middle.to_bytes()
+        totals["to_bytes"] += time.perf_counter() - start
+        totals["bytes"] += len(data)
+        start = time.perf_counter()
+        fork = CluedoGame.from_snapshot(GameSnapshot.from_bytes(data))
+        totals["fork"] += time.perf_counter() - start
+        totals["forks"] += 1
+        forked = fork.game_loop()
+        if (forked.winner, forked.turns, forked.eliminated) != (result.winner, result.turns, result.eliminated):
+            raise AssertionError(f"Fork of game {seed} ended differently")
+
+    forks = max(totals["forks"], 1)
+    print(f"{args.games} games, {args.players} players, {args.ai} AI: {totals['snapshots']} snapshots")
+    rows = [
+        ("snapshot()", f"{totals['snapshot'] / max(totals['snapshots'], 1) * 1e6:.1f} us"),
+        ("to_bytes()", f"{totals['to_bytes'] / forks * 1e6:.1f} us, {totals['bytes'] / forks:,.0f} bytes"),
+        ("from_bytes() + from_snapshot()", f"{totals['fork'] / forks * 1e6:.1f} us"),
+    ]
+    for label, value in rows:
+        print(f"  {label + ':':<34}{value}")
+    print("  Every fork finished like its original game")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cluedo AI benchmarks.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("strategies", help="ISMCTS win rate against rule-based opponents")
+    command.add_argument("--games", type=int, default=400, help="Games to play (each also replayed as baseline)")
+    command.add_argument("--players", type=int, default=4, help="Players per game (3-6)")
+    command.add_argument("--opponent", choices=sorted(CluedoGame.STRATEGIES), default="rule", help="Opponent AI")
+    command.add_argument("--budget", type=float, default=0.1, help="ISMCTS thinking time per decision in seconds")
+    command.add_argument("--iterations", type=int, default=None,
+                         help="Playouts per decision instead of a time budget (reproducible results)")
+    command.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    command.add_argument("--chunk-size", type=int, default=10, help="Games per worker task")
+    command.add_argument("--seed", type=int, default=0, help="Seed of the first game")
+    command.set_defaults(run=strategies)
+
+    command = commands.add_parser("scaling", help="Per-turn cost as the deck and the table grow")
+    command.add_argument("--decks", nargs="+", default=["3x7", "4x25", "6x50"],
+                         help="Decks as CATEGORIESxCARDS (cards per category)")
+    command.add_argument("--players", type=int, nargs="+", default=[4, 12, 24, 48], help="Table sizes")
+    command.add_argument("--games", type=int, default=5, help="Games per deck and table size")
+    command.add_argument("--max-turns", type=int, default=500, help="Abort games after this many turns")
+    command.add_argument("--lookups", type=int, default=20000, help="Random suggestions for the refuter timing")
+    command.add_argument("--seed", type=int, default=0, help="Seed of the first game")
+    command.set_defaults(run=scaling)
+
+    command = commands.add_parser("snapshots", help="Cost of per-turn snapshots, serialization and forks")
+    command.add_argument("--games", type=int, default=50, help="Games to play")
+    command.add_argument("--players", type=int, default=4, help="Players per game")
+    command.add_argument("--ai", choices=sorted(CluedoGame.STRATEGIES), default="estimator", help="AI strategy")
+    command.add_argument("--seed", type=int, default=0, help="Seed of the first game")
+    command.set_defaults(run=snapshots)
+
+    args = parser.parse_args()
+    if args.command == "strategies" and args.iterations:
+        args.budget = None
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Incremental constraint-propagation deduction for Cluedo.
+
+Each player keeps one DeductionEngine. It tracks, for every owner (each player
+plus the envelope), a bitmask of cards the owner is known to hold and a bitmask
+of cards the owner is known not to hold, using the bits of a CardIndex.
+"""
+
+
+class DeductionEngine:
+    """Player x card possession matrix kept as two bitmasks per owner.
+
+    Owners are the seats 0..n-1 followed by the envelope. Facts from suggestions
+    are added with record_suggestion(); afterwards the constraints below are
+    propagated to a fixed point, revisiting only the owners whose rows changed:
+
+    - a card has exactly one owner;
+    - every player holds exactly their dealt number of cards;
+    - the envelope holds exactly one card of each category;
+    - "X showed one of {a, b, c}" means X holds at least one of them.
+    """
+    __slots__ = ("all_mask", "category_masks", "envelope", "owners", "has", "lacks", "hand_sizes", "clauses")
+
+    def __init__(self, card_index, hand_sizes, seat, hand):
+        self._layout(card_index, hand_sizes)
+        self.has = [0] * len(self.owners)
+        self.lacks = [0] * len(self.owners)
+        self.clauses = [[] for _ in self.owners]  # Per owner: masks of which it holds at least one card
+
+        # We know our own hand exactly
+        self.has[seat] = hand
+        self.lacks[seat] = self.all_mask & ~hand
+        self._propagate({seat}, hand, self.lacks[seat])
+
+    def _layout(self, card_index, hand_sizes):
+        self.all_mask = card_index.all_mask
+        self.category_masks = card_index.category_masks
+        self.envelope = len(hand_sizes)
+        self.owners = range(len(hand_sizes) + 1)
+        self.hand_sizes = list(hand_sizes) + [len(self.category_masks)]
+
+    def snapshot(self):
+        """The has and lacks rows and the clauses as tuples (see cluedo_snapshot)."""
+        return tuple(self.has), tuple(self.lacks), tuple(map(tuple, self.clauses))
+
+    @classmethod
+    def from_snapshot(cls, card_index, hand_sizes, state):
+        """Rebuild an engine from snapshot() without propagating again."""
+        engine = cls.__new__(cls)
+        engine._layout(card_index, hand_sizes)
+        has, lacks, clauses = state
+        engine.has = list(has)
+        engine.lacks = list(lacks)
+        engine.clauses = [list(owner_clauses) for owner_clauses in clauses]
+        return engine
+
+    def record_suggestion(self, suggestion_mask, passed, refuter=None, shown=0):
+        """Add what an observer learned from one suggestion.
+
+        passed: seats that were asked and could not refute.
+        refuter: seat that refuted, or None.
+        shown: bit of the card shown, if the observer saw it (0 otherwise).
+        """
+        has, lacks = self.has, self.lacks
+        dirty = set()
+        new_has = new_lacks = 0
+
+        for seat in passed:
+            if suggestion_mask & ~lacks[seat]:
+                lacks[seat] |= suggestion_mask
+                new_lacks |= suggestion_mask
+                dirty.add(seat)
+
+        if refuter is not None:
+            if shown:
+                if not has[refuter] & shown:
+                    has[refuter] |= shown
+                    new_has |= shown
+                    dirty.add(refuter)
+            elif not has[refuter] & suggestion_mask:
+                self.clauses[refuter].append(suggestion_mask)
+                dirty.add(refuter)
+
+        if dirty:
+            self._propagate(dirty, new_has, new_lacks)
+
+    def envelope_excluded(self):
+        """Mask of cards known not to be in the envelope."""
+        return self.lacks[self.envelope]
+
+    def envelope_cards(self):
+        """Mask of cards known to be in the envelope."""
+        return self.has[self.envelope]
+
+    def solution_mask(self):
+        """Mask of the envelope if every category is solved, else None."""
+        envelope = self.has[self.envelope]
+        if all(envelope & category for category in self.category_masks):
+            return envelope
+        return None
+
+    def _propagate(self, dirty, new_has=0, new_lacks=0):
+        """Apply the constraints until nothing changes.
+
+        new_has/new_lacks are the cards whose column may have changed since the last
+        fixed point; only those columns and the dirty rows are re-examined.
+        """
+        has, lacks, owners = self.has, self.lacks, self.owners
+
+        while dirty or new_has or new_lacks:
+            # Row constraints for each changed owner
+            while dirty:
+                owner = dirty.pop()
+                before_has, before_lacks = has[owner], lacks[owner]
+                self._update_row(owner)
+                new_has |= has[owner] & ~before_has
+                new_lacks |= lacks[owner] & ~before_lacks
+
+            # A card held by one owner is lacked by every other owner
+            if new_has:
+                cards, new_has = new_has, 0
+                for owner in owners:
+                    missing = cards & ~has[owner] & ~lacks[owner]
+                    if missing:
+                        lacks[owner] |= missing
+                        new_lacks |= missing
+                        dirty.add(owner)
+
+            # A card lacked by every owner but one belongs to that owner
+            if new_lacks:
+                cards, new_lacks = new_lacks, 0
+                while cards:
+                    bit = cards & -cards
+                    cards ^= bit
+                    candidate = None
+                    for owner in owners:
+                        if not lacks[owner] & bit:
+                            if candidate is not None:
+                                break
+                            candidate = owner
+                    else:
+                        if candidate is not None and not has[candidate] & bit:
+                            has[candidate] |= bit
+                            new_has |= bit
+                            dirty.add(candidate)
+
+    def _update_row(self, owner):
+        """Apply the hand-size, envelope and clause constraints of one owner to a fixed point."""
+        has, lacks = self.has, self.lacks
+        all_mask = self.all_mask
+        size = self.hand_sizes[owner]
+
+        while True:
+            row_has, row_lacks = has[owner], lacks[owner]
+
+            if owner == self.envelope:
+                for category in self.category_masks:
+                    held = has[owner] & category
+                    if held:
+                        lacks[owner] |= category & ~held
+                    else:
+                        possible = category & ~lacks[owner]
+                        if possible and not possible & (possible - 1):
+                            has[owner] |= possible
+
+            if has[owner].bit_count() >= size:
+                lacks[owner] |= all_mask & ~has[owner]
+            possible = all_mask & ~lacks[owner]
+            if possible.bit_count() == size:
+                has[owner] |= possible
+
+            clauses = self.clauses[owner]
+            if clauses:
+                remaining = []
+                for clause in clauses:
+                    if clause & has[owner]:
+                        continue
+                    possible = clause & ~lacks[owner]
+                    if possible and not possible & (possible - 1):
+                        has[owner] |= possible
+                    elif possible:
+                        remaining.append(clause)
+                self.clauses[owner] = remaining
+
+            if has[owner] == row_has and lacks[owner] == row_lacks:
+                return
@@ -0,0 +1,240 @@
+"""NumPy-backed probability estimate over envelope hypotheses.
+
+An EnvelopeEstimator keeps one weight per (suspect, weapon, room) combination,
+updates the weights in place from what its player observes and uses them to
+choose the suggestion with the highest expected information gain.
+"""
+from itertools import combinations
+
+import numpy as np
+
+
+class EnvelopeEstimator:
+    """Probability tensor over envelope hypotheses, one axis per card category.
+
+    The shape follows the deck (6 x 6 x 9 for the classic game). Cards known to be
+    outside the envelope have their slices zeroed, a refuted suggestion rules out
+    its own cell, and a player who cannot refute makes the suggested cards more
+    likely to be in the envelope.
+    """
+
+    def __init__(self, card_index, category_masks, rng, confidence=0.9):
+        self.card_index = card_index
+        self.rng = rng
+        self.confidence = confidence
+
+        # Card bit position -> (axis, index along that axis)
+        self.axes = {}
+        self.axis_names = []
+        shape = []
+        for axis, category in enumerate(category_masks):
+            positions = [i for i in range(len(card_index.names)) if category >> i & 1]
+            for index, position in enumerate(positions):
+                self.axes[position] = (axis, index)
+            self.axis_names.append([card_index.names[i] for i in positions])
+            shape.append(len(positions))
+        self.shape = tuple(shape)
+        self.ndim = len(shape)
+
+        self.weights = np.ones(self.shape)
+        self.tried = np.zeros(self.shape, dtype=bool)  # Cells already suggested
+        self.own = [np.zeros(n) for n in self.shape]  # 1.0 where the card is in our hand
+        self.excluded = 0  # Cards whose slices are already zeroed
+        self._groups = None  # Cached by _prepare_groups()
+
+        # Every subset of axes, used to split hypotheses by which categories match
+        self._subsets = [frozenset(s) for r in range(self.ndim + 1) for s in combinations(range(self.ndim), r)]
+
+    def _slice(self, position):
+        axis, index = self.axes[position]
+        return (slice(None),) * axis + (index,)
+
+    def _cell(self, suggestion_mask):
+        cell = [0] * self.ndim
+        while suggestion_mask:
+            bit = suggestion_mask & -suggestion_mask
+            suggestion_mask ^= bit
+            axis, index = self.axes[bit.bit_length() - 1]
+            cell[axis] = index
+        return tuple(cell)
+
+    def cell_names(self, cell):
+        """Card names of a cell, one per category."""
+        return tuple(names[index] for names, index in zip(self.axis_names, cell))
+
+    def snapshot(self):
+        """Read-only copies of the weights and tried cells, and the excluded mask (see cluedo_snapshot)."""
+        weights = self.weights.copy()
+        tried = self.tried.copy()
+        weights.flags.writeable = False
+        tried.flags.writeable = False
+        return weights, tried, self.excluded
+
+    def restore(self, state):
+        """Load the state of snapshot(); the hand is set separately with set_hand()."""
+        weights, tried, self.excluded = state
+        self.weights = weights.copy()
+        self.tried = tried.copy()
+
+    def set_hand(self, hand):
+        """Mark our own cards; they can never be shown to us."""
+        while hand:
+            bit = hand & -hand
+            hand ^= bit
+            axis, index = self.axes[bit.bit_length() - 1]
+            self.own[axis][index] = 1.0
+        self._groups = None
+
+    def exclude(self, mask):
+        """Zero every hypothesis containing a card of the mask."""
+        new = mask & ~self.excluded
+        self.excluded |= new
+        while new:
+            bit = new & -new
+            new ^= bit
+            self.weights[self._slice(bit.bit_length() - 1)] = 0.0
+
+    def observe(self, deduction, suggestion_mask, passed, refuter):
+        """Update the weights after a suggestion, once the deduction engine has recorded it."""
+        cell = self._cell(suggestion_mask)
+
+        # A player who cannot refute lacks every suggested card outside the envelope.
+        # That is less likely the more of the unaccounted cards the player could hold,
+        # so hypotheses containing the suggested cards gain weight.
+        if passed:
+            unaccounted = (deduction.all_mask & ~self._accounted(deduction)).bit_count()
+            for seat in passed:
+                slots = deduction.hand_sizes[seat] - deduction.has[seat].bit_count()
+                if unaccounted and 0 < slots < unaccounted:
+                    boost = unaccounted / (unaccounted - slots)
+                    for axis, index in enumerate(cell):
+                        self.weights[(slice(None),) * axis + (index,)] *= boost
+
+        # Someone held one of the cards, so they are not all in the envelope
+        if refuter is not None:
+            self.weights[cell] = 0.0
+
+        self.exclude(deduction.envelope_excluded())
+        solution = deduction.solution_mask()
+        if solution is not None:
+            solved = self._cell(solution)
+            keep = self.weights[solved]
+            self.weights.fill(0.0)
+            self.weights[solved] = keep or 1.0
+
+        # Keep the weights in a sane numeric range
+        total = self.weights.sum()
+        if total > 0 and not 1e-100 < total < 1e100:
+            self.weights /= total
+
+    @staticmethod
+    def _accounted(deduction):
+        accounted = 0
+        for held in deduction.has:
+            accounted |= held
+        return accounted
+
+    def probabilities(self):
+        total = self.weights.sum()
+        if total <= 0:
+            # Inconsistent observations; fall back to a uniform guess over unexcluded cells
+            self.weights = np.ones(self.shape)
+            self.excluded, excluded = 0, self.excluded
+            self.exclude(excluded)
+            total = self.weights.sum()
+        return self.weights / total
+
+    def top_hypothesis(self):
+        """Return (cell, probability) of the most likely envelope."""
+        p = self.probabilities()
+        flat = int(p.argmax())
+        return np.unravel_index(flat, self.shape), float(p.flat[flat])
+
+    def _prepare_groups(self):
+        """Precompute the per-group terms of information_gain() that only depend on our hand.
+
+        Hypotheses are grouped by the set of axes on which they match the suggested
+        cell. For each group we need how many of the differing cards could be shown
+        to us, which share of the outcomes each axis gets, and the log of the count.
+        """
+        axes = range(self.ndim)
+        size = self.weights.size
+        showable = [
+            np.broadcast_to((1.0 - own).reshape([-1 if a == axis else 1 for a in axes]), self.shape).reshape(size)
+            for axis, own in enumerate(self.own)
+        ]
+        groups = len(self._subsets)
+        share = np.zeros((groups, self.ndim, size))
+        silent = np.zeros((groups, size))
+        log_count = np.zeros((groups, size))
+        for g, group in enumerate(self._subsets):
+            count = np.zeros(size)
+            for axis in axes:
+                if axis not in group:
+                    count += showable[axis]
+            safe = np.where(count > 0, count, 1.0)
+            for axis in axes:
+                if axis not in group:
+                    share[g, axis] = showable[axis] / safe
+            silent[g] = count == 0
+            log_count[g] = np.log(safe)
+
+        # Moebius inversion: group mass = sum over supersets T of (-1)^|T - G| * matching[T]
+        moebius = np.zeros((groups, groups))
+        for g, group in enumerate(self._subsets):
+            for t, subset in enumerate(self._subsets):
+                if group <= subset:
+                    moebius[g, t] = -1.0 if (len(subset) - len(group)) % 2 else 1.0
+
+        self._groups = (moebius, share, silent, log_count)
+
+    def information_gain(self):
+        """Expected information (in nats) revealed to us by suggesting each cell.
+
+        The mass of each group of hypotheses is computed from marginals of the
+        probability tensor by inclusion-exclusion, so every cell is scored with a
+        few array operations instead of a loop over hypotheses.
+        """
+        if self._groups is None:
+            self._prepare_groups()
+        moebius, share, silent, log_count = self._groups
+
+        p = self.probabilities()
+        axes = range(self.ndim)
+        size = p.size
+
+        # matching[T]: probability that the envelope agrees with the cell on the axes in T
+        matching = np.empty((len(self._subsets), size))
+        for t, subset in enumerate(self._subsets):
+            other = tuple(a for a in axes if a not in subset)
+            marginal = p.sum(axis=other, keepdims=True) if other else p
+            matching[t] = np.broadcast_to(marginal, self.shape).reshape(size)
+
+        mass = np.clip(moebius @ matching, 0.0, None)
+        outcomes = np.empty((self.ndim + 1, size))
+        outcomes[:self.ndim] = np.einsum("gc,gac->ac", mass, share)
+        outcomes[self.ndim] = (mass * silent).sum(axis=0)
+
+        logs = np.zeros_like(outcomes)
+        np.log(outcomes, out=logs, where=outcomes > 0)
+        entropy = -(outcomes * logs).sum(axis=0)
+        conditional = (mass * log_count).sum(axis=0)
+        return (entropy - conditional).reshape(self.shape)
+
+    def best_suggestion(self):
+        """Return the cell with the highest expected information gain, preferring new suggestions."""
+        gain = self.information_gain()
+        if not self.tried.all():
+            gain = np.where(self.tried, -np.inf, gain)
+        best = gain.max()
+        candidates = np.flatnonzero(gain >= best - 1e-12)
+        flat = int(candidates[self.rng.randrange(len(candidates))])
+        cell = np.unravel_index(flat, self.shape)
+        self.tried[cell] = True
+        return cell
+
+    def mark_tried(self, suggestion_mask):
+        self.tried[self._cell(suggestion_mask)] = True
+
+    def should_accuse(self):
+        return self.top_hypothesis()[1] >= self.confidence
@@ -0,0 +1,195 @@
+"""Structured event log for Cluedo games.
+
+Every event is a fixed-width 20-byte little-endian record, so a log file is a
+plain array of records: it can be appended to by many worker processes and
+loaded straight into NumPy (load_events) or pandas (pd.DataFrame(events))
+without parsing text. Cards are stored as their index in the game's CardIndex.
+
+Record layout (EVENT_FORMAT / EVENT_DTYPE):
+    game    uint32  game id (the seed in tournaments)
+    turn    uint16  turn number, 0 for the deal
+    kind    uint8   one of the event kinds below
+    flags   uint8   1 for a correct accusation
+    actor   int16   seat acting (dealt to, suggesting, passing, refuting, accusing)
+    target  int16   seat on the receiving end (the suggester for a refutation), -1 if none;
+                    the number of players for SOLUTION
+    count   uint16  number of cards of the event
+    card0-2 int16   first three cards involved, -1 if unused
+
+Events with more than three cards (suggestions and accusations in games with
+more than three categories) are followed by CARDS records holding the next
+three cards each, with count the number of cards in that record. Filter them
+out (events[events["kind"] != CARDS]) to get one row per event.
+
+A suggestion is recorded as SUGGESTION, one PASS per player who could not
+refute it, then a REFUTATION (actor -1 and card0 -1 when nobody refuted).
+"""
+import os
+import struct
+
+SOLUTION, DEAL, SUGGESTION, PASS, REFUTATION, ACCUSATION, ELIMINATION, CARDS = range(8)
+EVENT_KINDS = ("solution", "deal", "suggestion", "pass", "refutation", "accusation", "elimination", "cards")
+
+EVENT_FORMAT = "<IHBBhhHhhh"
+EVENT_SIZE = struct.calcsize(EVENT_FORMAT)
+EVENT_FIELDS = [
+    ("game", "<u4"), ("turn", "<u2"), ("kind", "u1"), ("flags", "u1"), ("actor", "<i2"), ("target", "<i2"),
+    ("count", "<u2"), ("card0", "<i2"), ("card1", "<i2"), ("card2", "<i2"),
+]
+
+
+class GameRecorder:
+    """Collects the events of one game in memory; pass it to CluedoGame(recorder=...)."""
+
+    def __init__(self, game_id):
+        self.game_id = game_id
+        self.buffer = bytearray()
+        self._pack = struct.Struct(EVENT_FORMAT).pack
+
+    def record(self, kind, turn, actor=-1, target=-1, cards=(), flags=0):
+        padded = tuple(cards) + (-1, -1, -1)
+        count = len(padded) - 3
+        self.buffer += self._pack(self.game_id, turn, kind, flags, actor, target, count, *padded[:3])
+        for start in range(3, count, 3):
+            self.buffer += self._pack(self.game_id, turn, CARDS, 0, actor, target, min(count - start, 3),
+                                      *padded[start:start + 3])
+
+    def __len__(self):
+        """Number of records, CARDS records included."""
+        return len(self.buffer) // EVENT_SIZE
+
+
+class EventLogWriter:
+    """Appends whole games to a log file.
+
+    The file is opened with O_APPEND and each game is written with a single
+    write() call, so several processes can share one file without interleaving
+    records of different games (on local filesystems).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def append(self, recorder):
+        data = bytes(recorder.buffer)
+        written = os.write(self.fd, data)
+        if written != len(data):
+            raise OSError(f"Short write to {self.path}: {written} of {len(data)} bytes")
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def event_dtype():
+    """NumPy structured dtype matching EVENT_FORMAT."""
+    import numpy as np
+    return np.dtype(EVENT_FIELDS)
+
+
+def load_events(path, mmap=True):
+    """Load a log file as a NumPy structured array (memory-mapped by default)."""
+    import numpy as np
+    if mmap:
+        if os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=event_dtype())
+        return np.memmap(path, dtype=event_dtype(), mode="r")
+    return np.fromfile(path, dtype=event_dtype())
+
+
+def iter_events(data):
+    """Yield event tuples from raw log bytes without NumPy."""
+    yield from struct.iter_unpack(EVENT_FORMAT, data)
+
+
+def game_events(events, game_id):
+    """Select the events of one game from a loaded log, in recorded order."""
+    return events[events["game"] == game_id]
+
+
+def replay_player(events, card_index, seat, turn=None, name=None):
+    """Rebuild a Player's state at the end of the given turn from a game's events.
+
+    events are the records of a single game (see game_events). Only the recorded
+    facts are applied, the AI is not run. turn=None replays the whole game.
+    """
+    from Cluedo_Game import Player
+
+    names = card_index.names
+    player = Player(name or f"Seat {seat}", card_index=card_index)
+    player.seat = seat
+
+    hand_sizes = {}
+    num_players = None  # From the SOLUTION event: seats dealt no card have no DEAL events
+    suggestion = None  # (suggester seat, card names, mask, passed seats)
+
+    for event_turn, kind, flags, actor, target, cards in _with_cards(_rows(events)):
+        if turn is not None and event_turn > turn:
+            break
+
+        if kind == DEAL:
+            hand_sizes[actor] = hand_sizes.get(actor, 0) + 1
+            if actor == seat:
+                player.add_card(names[cards[0]])
+            continue
+        if kind == SOLUTION:
+            num_players = target
+
+        if player.deduction is None and num_players:
+            player.start_deduction([hand_sizes.get(s, 0) for s in range(num_players)])
+
+        if kind == SUGGESTION:
+            cards = tuple(names[card] for card in cards)
+            suggestion = (actor, cards, card_index.mask_of(cards), [])
+        elif kind == PASS:
+            suggestion[3].append(actor)
+        elif kind == REFUTATION:
+            suggester, suggested, mask, passed = suggestion
+            refuter = actor if actor >= 0 else None
+            shown = 1 << cards[0] if cards and suggester == seat else 0
+            if suggester == seat:
+                player.previous_suggestions.add(suggested)
+                for category, card in zip(card_index.count_keys, suggested):
+                    player.suggestion_counts[category][card] += 1
+                if shown:
+                    player.add_known_card(names[cards[0]])
+                    player.update_clue_sheet(suggested, names[cards[0]])
+            player.observe_suggestion(mask, passed, refuter, shown, suggester)
+            suggestion = None
+        elif kind == ELIMINATION and actor == seat:
+            player.active = False
+
+    if player.deduction is None and num_players:
+        player.start_deduction([hand_sizes.get(s, 0) for s in range(num_players)])
+    return player
+
+
+def _with_cards(rows):
+    """Join CARDS records to their event: yield (turn, kind, flags, actor, target, cards)."""
+    event = None
+    for _game, turn, kind, flags, actor, target, count, card0, card1, card2 in rows:
+        if kind == CARDS:
+            event[5].extend((card0, card1, card2)[:count])
+            continue
+        if event is not None:
+            yield event
+        event = (turn, kind, flags, actor, target, [card0, card1, card2][:min(count, 3)])
+    if event is not None:
+        yield event
+
+
+def _rows(events):
+    """Iterate event tuples from a NumPy array, a GameRecorder or raw bytes."""
+    if isinstance(events, GameRecorder):
+        return iter_events(bytes(events.buffer))
+    if isinstance(events, (bytes, bytearray, memoryview)):
+        return iter_events(bytes(events))
+    return (tuple(int(value) for value in row) for row in events.tolist())
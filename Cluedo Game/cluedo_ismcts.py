@@ -0,0 +1,381 @@
+"""Information-set Monte Carlo tree search (ISMCTS) policy for AI players.
+
+The player cannot see the other hands or the envelope, so every search
+iteration first samples a complete deal that is consistent with everything its
+deduction engine knows (a determinization), then picks an action with UCB1 and
+plays the game on to the end with a fast random policy modelled on the rule AI.
+Statistics are shared across determinizations, so the action chosen is the one
+that wins most often over the player's whole information set. The search is
+flat: one level of actions (suggestions, or accuse / keep playing) above the
+random playouts.
+
+Playouts never touch Player or CluedoGame objects. A playout state is a list of
+hand masks, the envelope mask, a known-cards and a lacks mask per seat and an
+active-seat bitmask; hands and the envelope never change during a playout, so a
+clone only copies the two short mask lists and the search runs thousands of
+playouts per decision within its time budget.
+"""
+import math
+import random
+import time
+from itertools import product
+
+from cluedo_strategy import Strategy
+
+
+class HiddenStateSampler:
+    """Samples deals consistent with one player's DeductionEngine.
+
+    The envelope gets one candidate card per category, then every card nobody is
+    known to hold is dealt to a random free slot of a seat that may hold it (the
+    most constrained cards first). Deals violating a "showed one of these" clause
+    are rejected and redrawn.
+    """
+
+    def __init__(self, deduction, max_attempts=20):
+        envelope = deduction.envelope
+        has, lacks = deduction.has, deduction.lacks
+        self.max_attempts = max_attempts
+        self.num_players = envelope
+        self.envelope_options = []
+        for category in deduction.category_masks:
+            held = has[envelope] & category
+            options = held or category & ~lacks[envelope]
+            self.envelope_options.append(_bits(options) or _bits(category))
+        self.hands = has[:envelope]
+        self.free = [size - held.bit_count() for size, held in zip(deduction.hand_sizes, self.hands)]
+        self.clauses = [(seat, clause) for seat in range(envelope) for clause in deduction.clauses[seat]]
+
+        held = 0
+        for hand in self.hands:
+            held |= hand
+        open_cards = [(bit, [seat for seat in range(envelope) if not lacks[seat] & bit])
+                      for bit in _bits(deduction.all_mask & ~held)]
+        open_cards.sort(key=lambda card: len(card[1]))
+        self.open_cards = open_cards
+
+    def sample(self, rng):
+        """Return (hands, envelope) for one consistent deal, or None if none was found."""
+        random = rng.random
+        fallback = None
+        for _ in range(self.max_attempts):
+            envelope = 0
+            for options in self.envelope_options:
+                envelope |= options[int(random() * len(options))]
+
+            hands = list(self.hands)
+            free = list(self.free)
+            for bit, seats in self.open_cards:
+                if bit & envelope:
+                    continue
+                slots = 0
+                for seat in seats:
+                    slots += free[seat]
+                if not slots:
+                    break
+                pick = int(random() * slots)
+                for seat in seats:
+                    pick -= free[seat]
+                    if pick < 0:
+                        break
+                hands[seat] |= bit
+                free[seat] -= 1
+            else:
+                for seat, clause in self.clauses:
+                    if not hands[seat] & clause:
+                        fallback = hands, envelope
+                        break
+                else:
+                    return hands, envelope
+        # Rarely all attempts break a clause; a deal that only breaks a clause still beats none
+        return fallback
+
+
+class Playout:
+    """Random-policy simulator for the rest of a game, on plain integer masks.
+
+    Mirrors CluedoGame: seats take turns in order, refutations go clockwise
+    from the suggester and show the lowest matching card, and the last active player
+    makes a final accusation at the end of a round. Every player knows the cards
+    it has seen and the public "cannot refute" facts (lacks, one mask per seat):
+    a card that everyone else lacks is in the envelope. A player accuses once
+    every category is pinned down, or at random with its risk.
+    """
+
+    def __init__(self, card_index, num_players, risks, max_turns=400):
+        self.category_masks = card_index.category_masks
+        self.options = {}  # Mask -> tuple of its bits, to pick a random card in one lookup
+        self.all_mask = card_index.all_mask
+        self.num_players = num_players
+        # Seats asked to refute, clockwise from each suggester
+        self.order = [[(seat + step) % num_players for step in range(1, num_players)] for seat in range(num_players)]
+        self.risks = risks
+        self.max_turns = max_turns
+
+    def suggest(self, known, rng):
+        """Random suggestion mask of cards outside known (any card of a fully known category)."""
+        random = rng.random
+        options = self.options
+        suggestion = 0
+        for mask in self.category_masks:
+            unknown = mask & ~known or mask
+            bits = options.get(unknown)
+            if bits is None:
+                bits = options[unknown] = tuple(_bits(unknown))
+            suggestion |= bits[int(random() * len(bits))]
+        return suggestion
+
+    def refute(self, hands, known, lacks, seat, suggestion):
+        """Resolve a suggestion: update the suggester's known cards and the lacks of those who pass."""
+        for other in self.order[seat]:
+            matching = hands[other] & suggestion
+            if matching:
+                known[seat] |= matching & -matching
+                return
+            lacks[other] |= suggestion
+
+    def solved(self, known, lacks, seat):
+        """The envelope mask if seat can pin down every category, else 0."""
+        mine = known[seat]
+        elsewhere = self.all_mask & ~mine
+        for other in self.order[seat]:
+            elsewhere &= lacks[other]
+        envelope = 0
+        for mask in self.category_masks:
+            unknown = mask & ~mine
+            card = unknown & elsewhere
+            if card:
+                envelope |= card & -card
+            elif unknown and not unknown & (unknown - 1):
+                envelope |= unknown
+            else:
+                return 0
+        return envelope
+
+    def run(self, hands, envelope, known, lacks, active, seat, rng):
+        """Play on from seat's turn; return the winning seat or -1. known and lacks are modified in place."""
+        random = rng.random
+        risks = self.risks
+        order = self.order
+        suggest, solved = self.suggest, self.solved
+        num_players = self.num_players
+        for _ in range(self.max_turns):
+            if seat == num_players:
+                seat = 0
+                if not active & (active - 1):
+                    break
+            if active >> seat & 1:
+                # refute() inlined: this loop is where playouts spend their time
+                suggestion = suggest(known[seat], rng)
+                for other in order[seat]:
+                    matching = hands[other] & suggestion
+                    if matching:
+                        known[seat] |= matching & -matching
+                        break
+                    lacks[other] |= suggestion
+                accusation = solved(known, lacks, seat)
+                if not accusation and random() < risks[seat]:
+                    accusation = self.suggest(known[seat], rng)
+                if accusation:
+                    if accusation == envelope:
+                        return seat
+                    active &= ~(1 << seat)
+                    if not active:
+                        return -1
+            seat += 1
+
+        # The last active player accuses the first unseen card of every category
+        if active and not active & (active - 1):
+            seat = active.bit_length() - 1
+            accusation = 0
+            for mask in self.category_masks:
+                unknown = mask & ~known[seat]
+                accusation |= unknown & -unknown if unknown else 0
+            if accusation == envelope:
+                return seat
+        return -1
+
+
+class ISMCTSStrategy(Strategy):
+    """Chooses suggestions and risky accusations by Monte Carlo search over sampled deals.
+
+    budget is the thinking time per decision in seconds; iterations caps the
+    playouts per decision (and makes the search independent of machine speed when
+    budget is None). max_actions limits the candidate suggestions, opponent_risk
+    is the chance per turn that a simulated opponent accuses at random (0.1 for the
+    rule AI) and exploration is the UCB1 constant.
+    """
+
+    name = "ismcts"
+
+    def __init__(self, budget=0.1, iterations=None, max_actions=12, opponent_risk=0.1, exploration=0.7,
+                 seed=None):
+        if budget is None and iterations is None:
+            raise ValueError("ISMCTSStrategy needs a time budget or an iteration count")
+        self.budget = budget
+        self.iterations = iterations
+        self.max_actions = max_actions
+        self.opponent_risk = opponent_risk
+        self.exploration = exploration
+        self.seed = seed
+        self.rng = None
+        self.game = None
+        self.playout = None
+        self.history = []  # (suggester, suggestion mask, refuter) for every refuted suggestion
+        self.lacks = []  # Per seat: cards it was seen unable to refute (public knowledge)
+        self.decisions = 0
+        self.playouts = 0
+        self.search_time = 0.0
+
+    def setup(self, player, game):
+        self.game = game
+        # A private generator keeps the game's random sequence independent of how long searches run
+        self.rng = random.Random(self.seed if self.seed is not None else player.rng.getrandbits(64))
+        risks = [0.0 if seat == player.seat else self.opponent_risk for seat in range(len(game.players))]
+        self.playout = Playout(player.card_index, len(game.players), risks)
+        self.lacks = [0] * len(game.players)
+
+    def snapshot(self):
+        return (self.rng.getstate(), tuple(self.history), tuple(self.lacks), self.decisions, self.playouts,
+                self.search_time)
+
+    def restore(self, player, game, state):
+        rng_state, history, lacks, self.decisions, self.playouts, self.search_time = state
+        self.game = game
+        self.rng = random.Random()
+        self.rng.setstate(rng_state)
+        risks = [0.0 if seat == player.seat else self.opponent_risk for seat in range(len(game.players))]
+        self.playout = Playout(player.card_index, len(game.players), risks)
+        self.history = list(history)
+        self.lacks = list(lacks)
+
+    def observe(self, player, suggester, suggestion_mask, passed, refuter, shown):
+        for seat in passed:
+            self.lacks[seat] |= suggestion_mask
+        if refuter is not None and suggester is not None:
+            self.history.append((suggester, suggestion_mask, refuter))
+
+    def suggest(self, player):
+        actions = self._candidate_suggestions(player)
+        if len(actions) == 1:
+            return player.card_index.names_of(actions[0])
+
+        playout = self.playout
+        seat = player.seat
+
+        def evaluate(deal, known, lacks, active, action):
+            hands, envelope = deal
+            playout.refute(hands, known, lacks, seat, action)
+            accusation = playout.solved(known, lacks, seat)
+            if accusation:
+                return 1.0 if accusation == envelope else 0.0
+            return 1.0 if playout.run(hands, envelope, known, lacks, active, seat + 1, self.rng) == seat else 0.0
+
+        visits, _wins = self._search(player, actions, evaluate)
+        best = max(range(len(actions)), key=visits.__getitem__)
+        return player.card_index.names_of(actions[best])
+
+    def risky_accusation(self, player):
+        # Accusing the most likely envelope wins in the deals where it is the envelope;
+        # compare that with the playout win rate of carrying on.
+        envelopes = {}
+        playout = self.playout
+        seat = player.seat
+
+        def evaluate(deal, known, lacks, active, action):
+            hands, envelope = deal
+            envelopes[envelope] = envelopes.get(envelope, 0) + 1
+            return 1.0 if playout.run(hands, envelope, known, lacks, active, seat + 1, self.rng) == seat else 0.0
+
+        visits, wins = self._search(player, [None], evaluate)
+        if not envelopes:
+            return None
+        samples = sum(envelopes.values())
+        guess, count = max(envelopes.items(), key=lambda item: item[1])
+        if count / samples <= wins[0] / max(visits[0], 1):
+            return None
+        index = player.card_index
+        return {key: index.name_of(guess & mask) for key, mask in zip(index.keys, index.category_masks)}
+
+    def _candidate_suggestions(self, player):
+        """Masks of the combinations of unseen cards, untried ones first, at most max_actions.
+
+        Small products are enumerated; on big decks max_actions random combinations
+        are drawn instead, so the cost does not grow with the product of category sizes.
+        """
+        index = player.card_index
+        options = [_bits(mask & ~player.known) or _bits(mask) for mask in index.category_masks]
+        tried = {index.mask_of(suggestion) for suggestion in player.previous_suggestions}
+        size = 1
+        for bits in options:
+            size *= len(bits)
+        if size > 64 * self.max_actions:
+            choice = self.rng.choice
+            fresh = set()
+            for _ in range(4 * self.max_actions):
+                mask = sum(choice(bits) for bits in options)
+                if mask not in tried:
+                    fresh.add(mask)
+                    if len(fresh) == self.max_actions:
+                        break
+            return sorted(fresh) or [sum(choice(bits) for bits in options)]
+        combinations = [sum(combo) for combo in product(*options)]
+        fresh = [mask for mask in combinations if mask not in tried] or combinations
+        if len(fresh) > self.max_actions:
+            fresh = self.rng.sample(fresh, self.max_actions)
+        return fresh
+
+    def _search(self, player, actions, evaluate):
+        """Run UCB1 over actions, one sampled deal per iteration; return (visits, wins) per action."""
+        start = time.perf_counter()
+        deadline = start + self.budget if self.budget is not None else None
+        limit = self.iterations
+        sampler = HiddenStateSampler(player.deduction)
+        rng = self.rng
+        seat = player.seat
+        players = self.game.players
+        active = 0
+        for other in players:
+            if other.active:
+                active |= 1 << other.seat
+        shown_to = [(suggester, mask, refuter) for suggester, mask, refuter in self.history if suggester != seat]
+
+        visits = [0] * len(actions)
+        wins = [0.0] * len(actions)
+        total = 0
+        while (limit is None or total < limit) and (deadline is None or time.perf_counter() < deadline):
+            deal = sampler.sample(rng)
+            if deal is None:
+                break
+            hands, _envelope = deal
+            # What every opponent has seen in this deal: their hand and the cards shown to them
+            known = list(hands)
+            known[seat] = player.known
+            for suggester, mask, refuter in shown_to:
+                matching = hands[refuter] & mask
+                known[suggester] |= matching & -matching
+
+            if total < len(actions):
+                action = total
+            else:
+                log_total = math.log(total)
+                action = max(range(len(actions)), key=lambda a: wins[a] / visits[a] +
+                             self.exploration * math.sqrt(log_total / visits[a]))
+            wins[action] += evaluate(deal, known, list(self.lacks), active, actions[action])
+            visits[action] += 1
+            total += 1
+
+        self.decisions += 1
+        self.playouts += total
+        self.search_time += time.perf_counter() - start
+        return visits, wins
+
+
+def _bits(mask):
+    """Single-bit masks of the set bits of mask, lowest first."""
+    bits = []
+    while mask:
+        bit = mask & -mask
+        bits.append(bit)
+        mask ^= bit
+    return bits
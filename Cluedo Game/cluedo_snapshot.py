@@ -0,0 +1,149 @@
+"""Snapshots of a whole CluedoGame for checkpoints, resumes and what-if forks.
+
+CluedoGame.snapshot() captures everything needed to carry on exactly where a
+game stood between two turns: the random generator, the solution, every hand,
+clue sheet, deduction engine, estimator and strategy, the previous suggestions
+and the suggestion counts. A snapshot is built from immutable values (card
+masks are ints, clue sheets bytes, sets frozensets, arrays read-only), so
+taking one copies each mutable container once and nothing else. Any number of
+games can be restored from the same snapshot, with CluedoGame.from_snapshot()
+or game.fork(), without touching the game it came from.
+
+to_bytes() and from_bytes() convert a snapshot to a compact binary form: card
+names become card indices and suggestions become masks. save_snapshot() and
+load_snapshot() write and read that form atomically, so a long run can resume
+from its last checkpoint after an interruption. The binary form is a pickle:
+only load snapshots from trusted sources. The game's ai must be a strategy
+name, or a Strategy class or factory that pickle can import (a module-level
+class or function, or functools.partial of one); lambdas and local functions
+can be forked in memory but not serialized.
+
+    snapshot = game.snapshot()
+    what_if = CluedoGame.from_snapshot(snapshot)  # Play on without changing game
+    save_snapshot(snapshot, "game.ckpt")
+    game = CluedoGame.from_snapshot(load_snapshot("game.ckpt"))
+    result = game.game_loop()
+"""
+import os
+import pickle
+from array import array
+
+MAGIC = b"CLSN"
+FORMAT_VERSION = 1
+
+# Positions in the tuples of CluedoGame.snapshot() and Player.snapshot()
+GAME_RNG, GAME_SOLUTION, GAME_COUNTS = 0, 1, 8
+PLAYER_SUGGESTIONS, PLAYER_COUNTS = 6, 7
+
+
+class GameSnapshot:
+    """Immutable state of a game between two turns.
+
+    config holds the rules (card categories, AI, options) and is shared by all
+    snapshots of one game; game and players are tuples of plain values.
+    """
+    __slots__ = ("config", "game", "players")
+
+    def __init__(self, config, game, players):
+        self.config = config
+        self.game = game
+        self.players = players
+
+    @property
+    def turn(self):
+        """Number of turns played when the snapshot was taken."""
+        return self.game[2]
+
+    def __repr__(self):
+        return f"GameSnapshot(turn={self.turn}, players={len(self.players)})"
+
+    def to_bytes(self):
+        """Compact binary form: card names as indices, suggestions as masks, generator words as raw bytes."""
+        position = _positions(self.config)
+        game = list(self.game)
+        game[GAME_RNG] = _pack_rng(game[GAME_RNG])
+        game[GAME_SOLUTION] = tuple(position[card] for card in game[GAME_SOLUTION])
+        game[GAME_COUNTS] = _encode_counts(game[GAME_COUNTS], position)
+        players = []
+        for state in self.players:
+            state = list(state)
+            state[PLAYER_SUGGESTIONS] = tuple(sum(1 << position[card] for card in suggestion)
+                                              for suggestion in state[PLAYER_SUGGESTIONS])
+            state[PLAYER_COUNTS] = _encode_counts(state[PLAYER_COUNTS], position)
+            players.append(tuple(state))
+        payload = (FORMAT_VERSION, self.config, tuple(game), tuple(players))
+        try:
+            return MAGIC + pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, AttributeError, TypeError) as error:
+            raise ValueError(f"Cannot serialize the AI strategy {self.config['ai']!r}: use a strategy name or a "
+                             f"module-level Strategy class or factory") from error
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Rebuild a snapshot from to_bytes(). Unpickles data, so it must come from a trusted source."""
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("Not a Cluedo game snapshot")
+        version, config, game, players = pickle.loads(data[len(MAGIC):])
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format version {version}")
+        names = [card for cards in config["categories"].values() for card in cards]
+        game = list(game)
+        game[GAME_RNG] = _unpack_rng(game[GAME_RNG])
+        game[GAME_SOLUTION] = tuple(names[i] for i in game[GAME_SOLUTION])
+        game[GAME_COUNTS] = _decode_counts(game[GAME_COUNTS], names)
+        decoded = []
+        for state in players:
+            state = list(state)
+            state[PLAYER_SUGGESTIONS] = frozenset(_mask_names(mask, names) for mask in state[PLAYER_SUGGESTIONS])
+            state[PLAYER_COUNTS] = _decode_counts(state[PLAYER_COUNTS], names)
+            decoded.append(tuple(state))
+        return cls(config, tuple(game), tuple(decoded))
+
+
+def save_snapshot(snapshot, path):
+    """Write a snapshot to path atomically: a crash leaves either the old or the new checkpoint."""
+    data = snapshot.to_bytes()
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def load_snapshot(path):
+    with open(path, "rb") as file:
+        return GameSnapshot.from_bytes(file.read())
+
+
+def _positions(config):
+    cards = [card for cards in config["categories"].values() for card in cards]
+    return {card: i for i, card in enumerate(cards)}
+
+
+def _mask_names(mask, names):
+    cards = []
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        cards.append(names[bit.bit_length() - 1])
+    return tuple(cards)
+
+
+def _encode_counts(counts, position):
+    return tuple(tuple((position[card], count) for card, count in items) for items in counts)
+
+
+def _decode_counts(counts, names):
+    return tuple(tuple((names[i], count) for i, count in items) for items in counts)
+
+
+def _pack_rng(state):
+    # random.Random.getstate(): (version, 625 words of Mersenne Twister state, gauss_next)
+    version, words, gauss_next = state
+    return version, array("I", words).tobytes(), gauss_next
+
+
+def _unpack_rng(state):
+    version, words, gauss_next = state
+    return version, tuple(array("I", words)), gauss_next
@@ -0,0 +1,67 @@
+"""Pluggable decision policies for AI players.
+
+A Strategy decides what an AI Player suggests and whether it makes a risky
+accusation (one it has not proven). Accusations the player can prove from its
+deduction engine are always made by the game, whatever the strategy.
+
+Every AI player gets its own strategy instance, created by CluedoGame from the
+ai argument (see CluedoGame.STRATEGIES) and set up once the cards are dealt.
+"""
+
+
+class Strategy:
+    """Base class; the default behaviour is the original random rule-based AI."""
+
+    name = "base"
+
+    def setup(self, player, game):
+        """Called once after the deal, when the player's deduction engine exists."""
+
+    def observe(self, player, suggester, suggestion_mask, passed, refuter, shown):
+        """Called after every suggestion at the table (see Player.observe_suggestion)."""
+
+    def suggest(self, player):
+        """Return the suggestion as a tuple of card names, one per category."""
+        return player.random_suggestion()
+
+    def risky_accusation(self, player):
+        """Return an accusation dict to make without proof, or None to keep playing."""
+        return None
+
+    def snapshot(self):
+        """State to keep in a game snapshot, made of immutable values (None when stateless)."""
+        return None
+
+    def restore(self, player, game, state):
+        """Called instead of setup() when a game is restored from a snapshot."""
+
+
+class RuleStrategy(Strategy):
+    """Random unseen combination, and a random accusation 10% of the time."""
+
+    name = "rule"
+
+    def __init__(self, risk=0.1):
+        self.risk = risk
+
+    def risky_accusation(self, player):
+        if player.rng.random() < self.risk:
+            return player.best_guess()
+        return None
+
+
+class EstimatorStrategy(Strategy):
+    """Suggest by expected information gain, accuse once the top envelope is likely enough."""
+
+    name = "estimator"
+
+    def setup(self, player, game):
+        player.start_estimator(game.confidence)
+
+    def suggest(self, player):
+        return player.estimator.cell_names(player.estimator.best_suggestion())
+
+    def risky_accusation(self, player):
+        if player.estimator.should_accuse():
+            return player.best_guess()
+        return None
@@ -0,0 +1,246 @@
+"""Run many headless Cluedo games across a process pool and aggregate the results.
+
+Usage:
+    python cluedo_tournament.py --games 100000 --players 4 --workers 8 --checkpoint run.ckpt
+"""
+import argparse
+import os
+import pickle
+import time
+from multiprocessing import Pool
+
+from tabulate import tabulate
+
+from Cluedo_Game import CluedoGame, player_names, seat_names, suspects, weapons, rooms
+from cluedo_events import EventLogWriter, GameRecorder, load_events
+from cluedo_stats import SuggestionStats
+
+
+class TournamentStats:
+    """Aggregated results of many games. Partial stats from workers are combined with merge().
+
+    suggestions holds the SuggestionStats of the games when they are collected.
+    """
+
+    def __init__(self, names, suggestions=None):
+        self.names = list(names)
+        self.suggestions = suggestions
+        self.games = 0
+        self.no_winner = 0
+        self.wins = {name: 0 for name in self.names}
+        self.eliminations = {name: 0 for name in self.names}
+        self.turns_total = 0
+        self.turns_to_solve_total = 0
+        self.turns_min = None
+        self.turns_max = 0
+        self.turns_histogram = {}
+
+    def add(self, result):
+        """Record a single GameResult."""
+        self.games += 1
+        self.turns_total += result.turns
+        self.turns_histogram[result.turns] = self.turns_histogram.get(result.turns, 0) + 1
+        self.turns_max = max(self.turns_max, result.turns)
+        self.turns_min = result.turns if self.turns_min is None else min(self.turns_min, result.turns)
+
+        if result.winner is None:
+            self.no_winner += 1
+        else:
+            self.wins[result.winner] += 1
+            self.turns_to_solve_total += result.turns
+
+        for name, _turn in result.eliminated:
+            self.eliminations[name] += 1
+
+    def merge(self, other):
+        """Fold another TournamentStats into this one."""
+        self.games += other.games
+        self.no_winner += other.no_winner
+        self.turns_total += other.turns_total
+        self.turns_to_solve_total += other.turns_to_solve_total
+        self.turns_max = max(self.turns_max, other.turns_max)
+        if other.turns_min is not None:
+            self.turns_min = other.turns_min if self.turns_min is None else min(self.turns_min, other.turns_min)
+        for name in other.names:
+            self.wins[name] = self.wins.get(name, 0) + other.wins[name]
+            self.eliminations[name] = self.eliminations.get(name, 0) + other.eliminations[name]
+        for turns, count in other.turns_histogram.items():
+            self.turns_histogram[turns] = self.turns_histogram.get(turns, 0) + count
+        if other.suggestions is not None:
+            self.suggestions.merge(other.suggestions)
+        return self
+
+    def solved_games(self):
+        return self.games - self.no_winner
+
+    def summary_table(self):
+        """Per-player win and elimination rates as rows for tabulate."""
+        games = max(self.games, 1)
+        return [
+            [name, self.wins[name], f"{self.wins[name] / games:.2%}", f"{self.eliminations[name] / games:.2%}"]
+            for name in self.names
+        ]
+
+
+class ChunkCheckpoint:
+    """Append-only file of finished chunks, so an interrupted tournament can resume.
+
+    Each chunk's stats are appended once the chunk is done; a rerun with the same
+    file merges them instead of replaying those games. A record cut short by the
+    interruption is dropped when the file is reopened. Records are pickles, so only
+    resume from checkpoint files you wrote yourself.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = {}  # Chunk key -> TournamentStats
+        end = 0
+        if os.path.exists(path):
+            with open(path, "rb") as file:
+                while True:
+                    try:
+                        key, stats = pickle.load(file)
+                    except (EOFError, pickle.UnpicklingError):
+                        break
+                    self.done[key] = stats
+                    end = file.tell()
+        self.file = open(path, "ab")
+        self.file.truncate(end)
+
+    def append(self, key, stats):
+        pickle.dump((key, stats), self.file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.done[key] = stats
+
+    def close(self):
+        self.file.close()
+
+
+def play_game(seed, num_players, max_turns=None, ai="rule", recorder=None, suggestions=None):
+    """Play one headless game and return its GameResult."""
+    game = CluedoGame(player_names, suspects, weapons, rooms, num_players=num_players, seed=seed,
+                      headless=True, max_turns=max_turns, ai=ai, recorder=recorder, stats=suggestions)
+    return game.game_loop()
+
+
+def new_suggestion_stats(num_players):
+    """Empty SuggestionStats for tournaments on the classic deck."""
+    return SuggestionStats(suspects + weapons + rooms, num_players, seat_names=seat_names(player_names, num_players))
+
+
+def run_chunk(args):
+    """Worker entry point: play a contiguous range of seeds and return partial stats.
+
+    Games whose ids are in logged (already in the event log from an interrupted
+    run) are replayed for the stats but not appended again.
+    """
+    first_seed, count, num_players, max_turns, ai, collect_suggestions, events_path, logged = args
+    suggestions = new_suggestion_stats(num_players) if collect_suggestions else None
+    stats = TournamentStats(seat_names(player_names, num_players), suggestions)
+    if events_path is None:
+        for seed in range(first_seed, first_seed + count):
+            stats.add(play_game(seed, num_players, max_turns, ai, suggestions=suggestions))
+        return stats
+
+    # Every game is appended to the shared log in one write, keyed by its seed
+    with EventLogWriter(events_path) as writer:
+        for seed in range(first_seed, first_seed + count):
+            recorder = GameRecorder(seed)
+            stats.add(play_game(seed, num_players, max_turns, ai, recorder, suggestions))
+            if seed not in logged:
+                writer.append(recorder)
+    return stats
+
+
+def _run_keyed_chunk(args):
+    return args[:6], run_chunk(args)
+
+
+def run_tournament(num_games, num_players=4, workers=None, chunk_size=1000, base_seed=0, max_turns=None,
+                   ai="rule", events_path=None, checkpoint_path=None, collect_suggestions=False):
+    """Spread num_games games over a process pool and return the merged TournamentStats.
+
+    Game i uses seed base_seed + i, so a tournament is reproducible regardless of
+    the number of workers. With events_path every game's events are appended to
+    that binary log (see cluedo_events), with the seed as game id. With
+    checkpoint_path finished chunks are recorded in that file (see ChunkCheckpoint)
+    and a rerun with the same arguments only plays the chunks that are missing.
+    With collect_suggestions the result's suggestions attribute holds the
+    SuggestionStats of all games (see cluedo_stats).
+    """
+    suggestions = new_suggestion_stats(num_players) if collect_suggestions else None
+    stats = TournamentStats(seat_names(player_names, num_players), suggestions)
+    checkpoint = ChunkCheckpoint(checkpoint_path) if checkpoint_path else None
+    logged = set()
+    if checkpoint is not None and events_path is not None and os.path.exists(events_path):
+        logged = set(load_events(events_path)["game"].tolist())
+
+    chunks = []
+    for start in range(0, num_games, chunk_size):
+        first_seed, count = base_seed + start, min(chunk_size, num_games - start)
+        key = (first_seed, count, num_players, max_turns, ai, collect_suggestions)
+        if checkpoint is not None and key in checkpoint.done:
+            stats.merge(checkpoint.done[key])
+            continue
+        chunk_logged = frozenset(seed for seed in range(first_seed, first_seed + count) if seed in logged)
+        chunks.append(key + (events_path, chunk_logged))
+
+    def finish(key, partial):
+        stats.merge(partial)
+        if checkpoint is not None:
+            checkpoint.append(key, partial)
+
+    try:
+        if workers == 1:
+            for chunk in chunks:
+                finish(*_run_keyed_chunk(chunk))
+            return stats
+
+        with Pool(processes=workers) as pool:
+            for key, partial in pool.imap_unordered(_run_keyed_chunk, chunks):
+                finish(key, partial)
+        return stats
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a headless Cluedo AI tournament.")
+    parser.add_argument("--games", type=int, default=10000, help="Number of games to play")
+    parser.add_argument("--players", type=int, default=4, help="Players per game (2 or more; the classic deck suits 3-6)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Games per worker task")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first game")
+    parser.add_argument("--max-turns", type=int, default=None, help="Abort games after this many turns")
+    parser.add_argument("--ai", choices=sorted(CluedoGame.STRATEGIES), default="rule",
+                        help="AI player strategy (rule is about 8x faster than estimator)")
+    parser.add_argument("--events", default=None, help="Append every game's events to this binary log file")
+    parser.add_argument("--checkpoint", default=None,
+                        help="Record finished chunks in this file and skip them when the run is restarted")
+    parser.add_argument("--stats", default=None,
+                        help="Collect suggestion statistics and save their columns to this .npz file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = run_tournament(args.games, args.players, args.workers, args.chunk_size, args.seed, args.max_turns,
+                           args.ai, args.events, args.checkpoint, args.stats is not None)
+    elapsed = time.perf_counter() - start
+
+    print(tabulate(stats.summary_table(), headers=["Player", "Wins", "Win rate", "Eliminated"], tablefmt="grid"))
+    print(f"Games: {stats.games}, unsolved: {stats.no_winner}")
+    print(f"Turns per game: avg {stats.turns_total / max(stats.games, 1):.1f}, "
+          f"min {stats.turns_min}, max {stats.turns_max}")
+    print(f"Turns to solve (solved games): {stats.turns_to_solve_total / max(stats.solved_games(), 1):.1f}")
+    if stats.suggestions is not None:
+        stats.suggestions.save(args.stats)
+        top = ", ".join(f"{card} ({count})" for card, count in stats.suggestions.top_k(5))
+        print(f"Most suggested recently: {top}")
+        print(f"Suggestion statistics saved to {args.stats}")
+    rate = stats.games / elapsed * 60
+    print(f"Elapsed: {elapsed:.2f}s ({rate:,.0f} games/min total, {rate / max(args.workers or 1, 1):,.0f} per worker)")
+
+
+if __name__ == "__main__":
+    main()
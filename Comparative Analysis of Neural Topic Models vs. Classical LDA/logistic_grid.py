@@ -0,0 +1,266 @@
+"""Vectorized hyperparameter search for the from-scratch logistic regression (Task 1).
+
+The notebook trains one model per (learning rate, epochs) pair: 9 x 3 separate
+runs, plus one more run of the best pair just to draw its cost curve. Here every
+learning rate is a row of one weight matrix W (n_lr x n_features), so a single
+gradient step updates all models with two matrix products. Training runs once to
+the largest epoch count and the weights are copied at every requested epoch
+count on the way (gradient descent from the same start is deterministic, so the
+5000-epoch checkpoint of a 15000-epoch run is the 5000-epoch model). Costs are
+recorded every 100 epochs for every row, so the cost curve needs no retraining.
+
+Larger grids are split by learning rate over a process pool (workers=N).
+
+Usage:
+    python logistic_grid.py --workers 4 --baseline --plot
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+FEATURES = ['fixed acidity', 'volatile acidity', 'citric acid', 'residual sugar', 'chlorides',
+            'free sulfur dioxide', 'density', 'pH', 'sulphates', 'alcohol']
+LR_LIST = [0.01, 0.001, 0.0001, 0.03, 0.003, 0.0003, 0.05, 0.005, 0.0005]
+ITER_LIST = [5000, 10000, 15000]
+
+
+# 1. Load and preprocess the dataset (as in the notebook)
+def load_wine(path='allwine.csv', test_size=0.2, random_state=42):
+    """Return X_train, X_test, y_train, y_test with y as (m, 1) binary labels and scaled features."""
+    df = pd.read_csv(path)
+    X = df[FEATURES].values
+    y = df['quality'].values.reshape(-1, 1)
+    if len(np.unique(y)) > 2:
+        y = (y >= 6).astype(int)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=test_size, random_state=random_state, stratify=y
+    )
+    scaler = StandardScaler()
+    return scaler.fit_transform(X_train), scaler.transform(X_test), y_train, y_test
+
+
+# 2. Logistic regression functions for k models at once
+def sigmoid(z):
+    return 1 / (1 + np.exp(-z))
+
+
+def initialize(n, count=1, seed=42):
+    """Small random weights for count models: W (count, n) and b (count,).
+
+    Rows are drawn in turn from np.random.RandomState(seed), like successive initialize(n) calls in the notebook.
+    """
+    rng = np.random.RandomState(seed)
+    W = np.empty((count, n))
+    b = np.empty(count)
+    for i in range(count):
+        W[i] = rng.randn(1, n) * 0.01
+        b[i] = rng.randn() * 0.01
+    return W, b
+
+
+def optimize(W, b, X, Y, with_cost=True):
+    """Gradients (and cross-entropy cost, one per model) of k models. Y is (m, 1)."""
+    m = X.shape[0]
+    A = sigmoid(W @ X.T + b[:, None])  # (k, m)
+    error = A - Y.T
+    dW = error @ X / m
+    db = error.sum(axis=1) / m
+    cost = None
+    if with_cost:
+        cost = -np.mean(Y.T * np.log(A + 1e-9) + (1 - Y.T) * np.log(1 - A + 1e-9), axis=1)
+    return dW, db, cost
+
+
+def train_grid(X, Y, lr_list, checkpoints, record_every=100, seed=42, init=None):
+    """Train one model per learning rate together, snapshotting at each checkpoint epoch count.
+
+    Returns ({epochs: (W, b)}, costs) where costs is (n_lr, n_records) with the
+    cost every record_every epochs, like train() in the notebook.
+    """
+    lrs = np.asarray(lr_list, dtype=float)
+    W, b = init if init is not None else initialize(X.shape[1], len(lrs), seed)
+    W, b = W.copy(), b.copy()
+    wanted = set(checkpoints)
+    snapshots = {}
+    costs = []
+
+    # The step of optimize() with preallocated buffers: no temporaries in the loop
+    m = X.shape[0]
+    XT = np.ascontiguousarray(X.T)
+    YT = Y.T.astype(float)
+    A = np.empty((len(lrs), m))
+    dW = np.empty_like(W)
+    step_w = lrs[:, None] / m
+    step_b = lrs / m
+    for i in range(max(checkpoints)):
+        if i % record_every == 0:
+            costs.append(optimize(W, b, X, Y)[2])
+        np.matmul(W, XT, out=A)
+        A += b[:, None]
+        np.negative(A, out=A)
+        np.exp(A, out=A)
+        A += 1
+        np.reciprocal(A, out=A)  # sigmoid
+        A -= YT  # error
+        np.matmul(A, X, out=dW)
+        W -= step_w * dW
+        b -= step_b * A.sum(axis=1)
+        if i + 1 in wanted:
+            snapshots[i + 1] = (W.copy(), b.copy())
+    return snapshots, np.array(costs).T
+
+
+def predict(W, b, X):
+    """0/1 predictions of k models, shape (k, m)."""
+    return (sigmoid(W @ X.T + b[:, None]) > 0.5).astype(int)
+
+
+def accuracy(W, b, X, Y):
+    """Accuracy of each of k models on (X, Y)."""
+    return (predict(W, b, X) == Y.T).mean(axis=1)
+
+
+# 3. Grid search
+class GridResult:
+    """Accuracy of every (lr, epochs) pair and the best model, chosen as in the notebook."""
+
+    def __init__(self, lr_list, iter_list, snapshots, costs, X_test, y_test, record_every=100):
+        self.lr_list = list(lr_list)
+        self.iter_list = list(iter_list)
+        self.snapshots = snapshots
+        self.costs = costs
+        self.record_every = record_every
+        accuracies = {epochs: accuracy(*snapshots[epochs], X_test, y_test) for epochs in self.iter_list}
+
+        self.results = []
+        best_accuracy, best = 0, None
+        for i, lr in enumerate(self.lr_list):
+            for epochs in self.iter_list:
+                acc = float(accuracies[epochs][i])
+                self.results.append((lr, epochs, acc))
+                if acc > best_accuracy or (acc == best_accuracy and epochs < best[1]):
+                    best_accuracy, best = acc, (i, epochs)
+        index, self.best_iter = best
+        self.best_lr = self.lr_list[index]
+        self.best_accuracy = best_accuracy
+        W, b = snapshots[self.best_iter]
+        self.best_w = W[index:index + 1]
+        self.best_b = b[index]
+        self._best_index = index
+
+    def cost_curve(self, lr=None, epochs=None):
+        """Costs every record_every epochs of one run (the best one by default), without retraining."""
+        index = self._best_index if lr is None else self.lr_list.index(lr)
+        epochs = self.best_iter if epochs is None else epochs
+        return self.costs[index, :-(-epochs // self.record_every)]
+
+
+def _train_chunk(args):
+    X, Y, lrs, checkpoints, record_every, init = args
+    return train_grid(X, Y, lrs, checkpoints, record_every, init=init)
+
+
+def grid_search(X_train, y_train, X_test, y_test, lr_list=LR_LIST, iter_list=ITER_LIST, workers=None,
+                record_every=100, seed=42):
+    """Train the whole grid and return a GridResult.
+
+    With workers > 1 the learning rates are split into that many stacks, each
+    trained in its own process; the initial weights are drawn up front, so the
+    result does not depend on the number of workers.
+    """
+    W, b = initialize(X_train.shape[1], len(lr_list), seed)
+    if not workers or workers <= 1 or len(lr_list) < 2:
+        snapshots, costs = train_grid(X_train, y_train, lr_list, iter_list, record_every, init=(W, b))
+        return GridResult(lr_list, iter_list, snapshots, costs, X_test, y_test, record_every)
+
+    groups = [group for group in np.array_split(np.arange(len(lr_list)), workers) if len(group)]
+    tasks = [(X_train, y_train, [lr_list[i] for i in group], iter_list, record_every, (W[group], b[group]))
+             for group in groups]
+    with ProcessPoolExecutor(max_workers=len(tasks)) as pool:
+        parts = list(pool.map(_train_chunk, tasks))
+    snapshots = {
+        epochs: (np.vstack([part[0][epochs][0] for part in parts]), np.concatenate([part[0][epochs][1] for part in parts]))
+        for epochs in iter_list
+    }
+    costs = np.vstack([part[1] for part in parts])
+    return GridResult(lr_list, iter_list, snapshots, costs, X_test, y_test, record_every)
+
+
+def notebook_grid_search(X_train, y_train, X_test, y_test, lr_list=LR_LIST, iter_list=ITER_LIST, seed=42):
+    """The notebook's serial loop (one run per pair plus a cost-curve retrain), for comparison.
+
+    Each learning rate starts from the same weights as in grid_search so the accuracies can be compared.
+    """
+    W0, b0 = initialize(X_train.shape[1], len(lr_list), seed)
+
+    def train(X, Y, lr, epochs, i):
+        w, b = W0[i:i + 1].copy(), b0[i]
+        costs = []
+        for step in range(epochs):
+            dw, db, cost = optimize(w, np.array([b]), X, Y)
+            w -= lr * dw
+            b -= lr * db[0]
+            if step % 100 == 0:
+                costs.append(cost)
+        return w, b, costs
+
+    results = []
+    for i, lr in enumerate(lr_list):
+        for epochs in iter_list:
+            w, b, _ = train(X_train, y_train, lr, epochs, i)
+            results.append((lr, epochs, float(accuracy(w, np.array([b]), X_test, y_test)[0])))
+    best_lr, best_iter, _ = max(results, key=lambda r: (r[2], -r[1]))
+    train(X_train, y_train, best_lr, best_iter, lr_list.index(best_lr))  # Retrain for the cost curve
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized grid search for the from-scratch logistic regression.")
+    parser.add_argument("--data", default="allwine.csv", help="Path to allwine.csv")
+    parser.add_argument("--workers", type=int, default=1, help="Processes to split the learning rates over")
+    parser.add_argument("--baseline", action="store_true", help="Also time the notebook's serial loop")
+    parser.add_argument("--plot", action="store_true", help="Plot the best run's cost curve")
+    args = parser.parse_args()
+
+    X_train, X_test, y_train, y_test = load_wine(args.data)
+
+    start = time.perf_counter()
+    grid = grid_search(X_train, y_train, X_test, y_test, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    # 4. Report Best
+    print("=====================================")
+    print("Best Hyperparameter Combination:")
+    print(f"Learning Rate: {grid.best_lr}")
+    print(f"Epochs: {grid.best_iter}")
+    print(f"Test Accuracy: {round(grid.best_accuracy, 4)}")
+    print("=====================================\n")
+    print("Final Train Accuracy:", round(float(accuracy(grid.best_w, np.atleast_1d(grid.best_b), X_train, y_train)[0]), 4))
+    print(f"Grid of {len(grid.results)} runs trained in {elapsed:.2f}s ({args.workers} worker(s))")
+
+    if args.baseline:
+        start = time.perf_counter()
+        serial = notebook_grid_search(X_train, y_train, X_test, y_test)
+        serial_elapsed = time.perf_counter() - start
+        mismatches = sum(abs(a[2] - b[2]) > 1e-12 for a, b in zip(serial, grid.results))
+        print(f"Notebook serial loop: {serial_elapsed:.2f}s ({serial_elapsed / elapsed:.1f}x slower), "
+              f"{mismatches} accuracy mismatches")
+
+    if args.plot:
+        import matplotlib.pyplot as plt
+        plt.plot(grid.cost_curve())
+        plt.title(f"Cost Curve (LR={grid.best_lr}, Epochs={grid.best_iter})")
+        plt.xlabel("Iterations (every 100)")
+        plt.ylabel("Cost")
+        plt.grid(True)
+        plt.show()
+
+
+if __name__ == "__main__":
+    main()
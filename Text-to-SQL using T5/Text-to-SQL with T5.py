@@ -1,96 +1,714 @@
-import torch
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+import asyncio
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
+
 import sqlparse
+from sqlparse import tokens as T
+
+from inference_backends import BACKENDS, load_backend
+from query_analysis import analyze_batch, analyze_query, suggest_batch, suggestion_index
+from sql_metrics import metrics
+from translation_cache import TranslationCache
+
+MODEL_PATH = os.environ.get("TEXT_TO_SQL_MODEL", "./fine_tuned_t5")
+BACKEND = os.environ.get("TEXT_TO_SQL_BACKEND", "eager")
+
+# Loads the model and tokenizer on first use, so features that never translate
+# (explain, suggestions) don't pay for importing torch/transformers
+class ModelLoader:
+    """Thread-safe lazy loader for the T5 model, tokenizer and device.
+
+    torch and transformers are only imported by the first get() call. The model
+    is loaded with one of the backends in inference_backends (eager PyTorch,
+    int8 quantized PyTorch or ONNX Runtime).
+    """
+
+    def __init__(self, model_path=MODEL_PATH, backend=BACKEND):
+        self.model_path = model_path
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._loaded = None
+        self._warm_up_thread = None
+
+    def get(self):
+        """Return (model, tokenizer, device), loading them on the first call."""
+        loaded = self._loaded
+        if loaded is None:
+            with self._lock:
+                if self._loaded is None:
+                    self._loaded = self._load()
+                loaded = self._loaded
+        return loaded
+
+    def is_loaded(self):
+        return self._loaded is not None
+
+    def reset(self):
+        """Drop the loaded model so the next get() loads the checkpoint again."""
+        with self._lock:
+            self._loaded = None
+
+    def set_backend(self, backend):
+        """Switch to another backend; the model is loaded again on the next get()."""
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of: {', '.join(BACKENDS)}")
+        with self._lock:
+            self.backend = backend
+            self._loaded = None
+
+    def warm_up(self, background=True):
+        """Start loading now; in a daemon thread unless background is False."""
+        if not background:
+            self.get()
+            return None
+        if self._warm_up_thread is None:
+            self._warm_up_thread = threading.Thread(target=self.get, name="model-warm-up", daemon=True)
+            self._warm_up_thread.start()
+        return self._warm_up_thread
+
+    def _load(self):
+        from transformers import AutoTokenizer
 
-# Load the model and tokenizer
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-model = AutoModelForSeq2SeqLM.from_pretrained("./fine_tuned_t5").to(device)
-tokenizer = AutoTokenizer.from_pretrained("./fine_tuned_t5")
+        model, device = load_backend(self.backend, self.model_path)
+        tokenizer = AutoTokenizer.from_pretrained(self.model_path)
+        return model, tokenizer, device
+
+model_loader = ModelLoader()
+
+def __getattr__(name):
+    # Keep `model`, `tokenizer` and `device` available as module attributes, loaded on access
+    if name in ("model", "tokenizer", "device"):
+        model, tokenizer, device = model_loader.get()
+        return {"model": model, "tokenizer": tokenizer, "device": device}[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Cache of translations in front of the model, see configure_cache()
+translation_cache = None
+
+def configure_cache(max_entries=1024, path=None):
+    """Replace the translation cache; max_entries=0 disables it, path adds a SQLite store.
+
+    The cache is cleared, and the model reloaded, when the checkpoint files change.
+    """
+    global translation_cache
+    if translation_cache is not None:
+        translation_cache.close()
+    translation_cache = None
+    if max_entries:
+        translation_cache = TranslationCache(model_loader.model_path, max_entries, path,
+                                             on_change=model_loader.reset, variant=model_loader.backend)
+    return translation_cache
+
+configure_cache(path=os.environ.get("TEXT_TO_SQL_CACHE"))
+
+def use_backend(backend):
+    """Translate with another backend ("eager", "int8", "onnx"); cached SQL is kept per backend."""
+    model_loader.set_backend(backend)
+    if translation_cache is not None:
+        translation_cache.set_variant(backend)
 
 # Function to translate natural language to SQL
 def translate_to_sql(english_query):
+    cache = translation_cache
+    if cache is not None:
+        sql_query = cache.get(english_query)
+        if sql_query is not None:
+            return sql_query
+
+    model, tokenizer, device = model_loader.get()
     input_text = f"translate English to SQL: {english_query}"
-    input_ids = tokenizer.encode(input_text, return_tensors="pt").to(device)
-    outputs = model.generate(input_ids, max_new_tokens=100, do_sample=False)
-    sql_query = tokenizer.decode(outputs[0], skip_special_tokens=True)
+    with metrics.stage("encode"):
+        input_ids = tokenizer.encode(input_text, return_tensors="pt").to(device)
+    with metrics.stage("generate"):
+        outputs = model.generate(input_ids, max_new_tokens=100, do_sample=False)
+    with metrics.stage("decode"):
+        sql_query = tokenizer.decode(outputs[0], skip_special_tokens=True)
+    if metrics.enabled:
+        _count_tokens(input_ids.numel(), outputs, tokenizer)
+
+    if cache is not None:
+        cache.put(english_query, sql_query)
     return sql_query
 
+# Function to translate many natural language queries to SQL at once
+def translate_batch(english_queries, batch_size=16, window=1024, on_result=None):
+    """Translate a list or iterator of queries, returning the SQL in input order.
+
+    Queries are read in windows of `window`, sorted by token length and split into
+    buckets of `batch_size`, so each padded batch holds queries of similar length
+    and model.generate runs once per bucket instead of once per query.
+    on_result(index, sql) is called for each query as soon as its SQL is known.
+    """
+    results = []
+    english_queries = iter(english_queries)
+    while True:
+        chunk = list(islice(english_queries, window))
+        if not chunk:
+            return results
+        notify = None
+        if on_result is not None:
+            notify = lambda i, sql_query, offset=len(results): on_result(offset + i, sql_query)
+        results.extend(_translate_window(chunk, batch_size, notify))
+
+def _translate_window(english_queries, batch_size, on_result=None):
+    cache = translation_cache
+    if cache is None:
+        return _generate_window(english_queries, batch_size, on_result)
+
+    # Only run the model for questions that are not cached, each distinct one once
+    sql_queries = [cache.get(query) for query in english_queries]
+    missing = {}
+    for i, sql_query in enumerate(sql_queries):
+        if sql_query is None:
+            missing.setdefault(cache.key(english_queries[i]), []).append(i)
+        elif on_result is not None:
+            on_result(i, sql_query)
+    if missing:
+        positions = list(missing.values())
+
+        def generated(j, sql_query):
+            cache.put(english_queries[positions[j][0]], sql_query)
+            for i in positions[j]:
+                sql_queries[i] = sql_query
+                if on_result is not None:
+                    on_result(i, sql_query)
+
+        _generate_window([english_queries[indexes[0]] for indexes in positions], batch_size, generated)
+    return sql_queries
+
+def _generate_window(english_queries, batch_size, on_result=None):
+    import torch
+
+    model, tokenizer, device = model_loader.get()
+    input_texts = [f"translate English to SQL: {query}" for query in english_queries]
+    lengths = [len(ids) for ids in tokenizer(input_texts)["input_ids"]]
+    order = sorted(range(len(input_texts)), key=lengths.__getitem__)
+
+    sql_queries = [None] * len(input_texts)
+    for start in range(0, len(order), batch_size):
+        bucket = order[start:start + batch_size]
+        with metrics.stage("encode"):
+            inputs = tokenizer([input_texts[i] for i in bucket], return_tensors="pt", padding=True).to(device)
+        with metrics.stage("generate"), torch.no_grad():
+            outputs = model.generate(**inputs, max_new_tokens=100, do_sample=False)
+        with metrics.stage("decode"):
+            decoded = tokenizer.batch_decode(outputs, skip_special_tokens=True)
+        if metrics.enabled:
+            metrics.observe_batch(len(bucket))
+            _count_tokens(int(inputs["attention_mask"].sum()), outputs, tokenizer)
+        for i, sql_query in zip(bucket, decoded):
+            sql_queries[i] = sql_query
+            if on_result is not None:
+                on_result(i, sql_query)
+    return sql_queries
+
+def _count_tokens(tokens_in, outputs, tokenizer):
+    """Count input tokens, generated (non-padding) tokens and translations."""
+    metrics.count("tokens_in", tokens_in)
+    metrics.count("tokens_out", int((outputs[:, 1:] != tokenizer.pad_token_id).sum()))
+    metrics.count("translations", outputs.shape[0])
+
+# Function to translate queries and validate the SQL against a local database
+def translate_and_validate(english_queries, validator, batch_size=16, window=1024):
+    """Translate a batch and validate every result with an SQLValidator (see sql_validation).
+
+    Each query is handed to the validator's threads as soon as its bucket has been
+    generated, so validation overlaps with the generation of the next buckets.
+    Returns (sql_queries, ValidationReport).
+    """
+    from sql_validation import ValidationReport
+
+    start = time.perf_counter()
+    futures = {}
+    sql_queries = translate_batch(english_queries, batch_size, window,
+                                  on_result=lambda i, sql_query: futures.__setitem__(i, validator.submit(sql_query)))
+    results = [futures[i].result() for i in range(len(sql_queries))]
+    return sql_queries, ValidationReport(results, time.perf_counter() - start)
+
+# Coalesces concurrent single translate requests into micro-batches
+class MicroBatcher:
+    """Collects translate requests from many threads and runs them as one batch.
+
+    A background thread takes the first waiting request, then keeps collecting for
+    up to `max_wait` seconds or until `max_batch_size` requests are queued, and
+    translates them together with translate_batch. Each caller gets its own result.
+    """
+
+    def __init__(self, max_batch_size=16, max_wait=0.01):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._requests = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()  # Orders submit() against close(), so nothing is queued after the stop marker
+        self._worker = threading.Thread(target=self._run, name="sql-micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, english_query):
+        """Queue a query and return a Future for its SQL; RuntimeError once closed."""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._requests.put((english_query, future))
+        return future
+
+    def translate(self, english_query, timeout=None):
+        """Translate one query, blocking until its micro-batch has run."""
+        return self.submit(english_query).result(timeout)
+
+    def close(self):
+        """Stop accepting requests and wait for the queued ones to finish."""
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._requests.put(None)
+        self._worker.join()
+
+        # Fail anything the worker did not take, so no caller waits forever
+        while True:
+            try:
+                request = self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None and request[1].set_running_or_notify_cancel():
+                request[1].set_exception(RuntimeError("MicroBatcher is closed"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _run(self):
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            batch = [request]
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                batch.append(request)
+
+            # Skip requests whose caller cancelled while they were queued
+            pending = [(query, future) for query, future in batch if future.set_running_or_notify_cancel()]
+            try:
+                sql_queries = translate_batch([query for query, _ in pending], batch_size=self.max_batch_size)
+            except Exception as exc:
+                for _, future in pending:
+                    future.set_exception(exc)
+            else:
+                for (_, future), sql_query in zip(pending, sql_queries):
+                    future.set_result(sql_query)
+            if stop:
+                return
+
+# Clauses that appear at most once per SELECT, in this order
+_CLAUSE_ORDER = {"FROM": 0, "WHERE": 1, "GROUP BY": 2, "HAVING": 3, "ORDER BY": 4, "LIMIT": 5}
+_SET_OPERATORS = {"UNION", "UNION ALL", "INTERSECT", "EXCEPT", "MINUS"}
+_CLAUSE_PATTERN = re.compile(r";|\b(?:FROM|WHERE|GROUP\s+BY|HAVING|ORDER\s+BY|LIMIT)\b", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+def sql_statement_end(sql_text):
+    """Return where the first complete SQL statement in sql_text ends, or None.
+
+    A statement is complete once it is terminated by a semicolon, or when a
+    top-level clause shows up that cannot follow the clauses before it (a second
+    WHERE, or WHERE after ORDER BY), which is how the model starts repeating
+    itself. Text inside parentheses and quotes is ignored.
+    """
+    position = depth = 0
+    last_clause = -1
+    for ttype, value in sqlparse.lexer.tokenize(sql_text):
+        if ttype in T.Error:
+            return None  # Unterminated quote or similar, the statement isn't finished
+        if ttype in T.Punctuation:
+            if value == "(":
+                depth += 1
+            elif value == ")":
+                depth -= 1
+            elif value == ";" and depth == 0:
+                return position + 1
+        elif ttype in T.Keyword and depth == 0:
+            keyword = _WHITESPACE.sub(" ", value.upper())
+            if keyword in _SET_OPERATORS:
+                last_clause = -1
+            elif keyword in _CLAUSE_ORDER:
+                if _CLAUSE_ORDER[keyword] <= last_clause:
+                    return position
+                last_clause = _CLAUSE_ORDER[keyword]
+        position += len(value)
+    return None
+
+# Receives tokens from model.generate and decides when the SQL is complete
+class _SQLStream:
+    """Streamer and stopping criterion for one streamed translation.
+
+    generate() calls put() with every new token and then the stopping criterion,
+    so the check for a complete statement (or a cancelled job) runs once per token. The text after the
+    end of the statement is never emitted. sqlparse only runs when a clause
+    keyword or a semicolon has been added since the last check.
+    """
+
+    def __init__(self, tokenizer, emit, early_stop=True, cancelled=None):
+        self.tokenizer = tokenizer
+        self.emit = emit
+        self.early_stop = early_stop
+        self.cancelled = cancelled  # threading.Event that stops generation at the next token
+        self.token_ids = []
+        self.text = ""
+        self.sent = 0  # Characters emitted so far
+        self.cut = None  # End of the complete statement, once found
+        self.clauses = 0
+        self.started = False
+
+    def put(self, value):
+        if not self.started:
+            self.started = True  # The first call carries the decoder start token
+            return
+        self.token_ids.extend(value.reshape(-1).tolist())
+        self.text = self.tokenizer.decode(self.token_ids, skip_special_tokens=True)
+        if self.early_stop and self.cut is None:
+            clauses = len(_CLAUSE_PATTERN.findall(self.text))
+            if clauses > self.clauses:
+                self.clauses = clauses
+                self.cut = sql_statement_end(self.text)
+        # The last word may still grow, so only emit up to the last space
+        end = self.text.rfind(" ") + 1
+        if self.cut is not None:
+            end = self.cut
+        self._send(end)
+
+    def end(self):
+        self._send(self.cut if self.cut is not None else len(self.text))
+
+    def result(self):
+        return (self.text if self.cut is None else self.text[:self.cut]).strip()
+
+    def __call__(self, input_ids, scores, **kwargs):
+        import torch
+        stop = self.cut is not None or (self.cancelled is not None and self.cancelled.is_set())
+        return torch.full((input_ids.shape[0],), stop, dtype=torch.bool, device=input_ids.device)
+
+    def _send(self, end):
+        if end > self.sent:
+            self.emit(self.text[self.sent:end])
+            self.sent = end
+
+# Streamed translations generate on a fixed number of threads, see configure_streams()
+_stream_workers = int(os.environ.get("TEXT_TO_SQL_STREAM_WORKERS", "2"))
+_stream_executor = None
+_stream_lock = threading.Lock()
+
+def configure_streams(workers=2):
+    """Set how many streamed translations may generate at once; later ones wait for a free thread."""
+    global _stream_workers, _stream_executor
+    with _stream_lock:
+        old, _stream_workers, _stream_executor = _stream_executor, workers, None
+    if old is not None:
+        old.shutdown(wait=False)
+
+def _stream_pool():
+    global _stream_executor
+    with _stream_lock:
+        if _stream_executor is None:
+            _stream_executor = ThreadPoolExecutor(_stream_workers, thread_name_prefix="sql-stream")
+        return _stream_executor
+
+class StreamJob:
+    """One streamed translation on the stream threads.
+
+    cancel() makes generate() stop after its next token, or drops the job if it
+    is still waiting for a thread. done is a concurrent Future that completes once
+    generation has ended, whether it finished, failed or was cancelled.
+    """
+
+    def __init__(self):
+        self.cancelled = threading.Event()
+        self.done = None
+
+    def cancel(self):
+        self.cancelled.set()
+        self.done.cancel()  # Only succeeds while the job is waiting for a thread
+
+def _start_stream(english_query, emit, max_new_tokens, early_stop):
+    """Queue generation on the stream threads, calling emit(fragment) and finally emit(None) or emit(exception).
+
+    Returns the StreamJob.
+    """
+    job = StreamJob()
+    cache = translation_cache
+    sql_query = cache.get(english_query) if cache is not None else None
+    if sql_query is not None:
+        emit(sql_query)
+        emit(None)
+        job.done = Future()
+        job.done.set_result(None)
+        return job
+
+    def run():
+        import torch
+        from transformers import StoppingCriteriaList
+
+        if job.cancelled.is_set():
+            return
+        try:
+            model, tokenizer, device = model_loader.get()
+            stream = _SQLStream(tokenizer, emit, early_stop, job.cancelled)
+            with metrics.stage("encode"):
+                input_ids = tokenizer.encode(f"translate English to SQL: {english_query}", return_tensors="pt")
+                input_ids = input_ids.to(device)
+            # Decoding happens token by token inside generate() here
+            with metrics.stage("generate"), torch.no_grad():
+                model.generate(input_ids, max_new_tokens=max_new_tokens, do_sample=False, streamer=stream,
+                               stopping_criteria=StoppingCriteriaList([stream]))
+            if metrics.enabled:
+                metrics.count("tokens_in", input_ids.numel())
+                metrics.count("tokens_out", len(stream.token_ids))
+                metrics.count("translations")
+            # Truncated or cancelled output differs from translate_to_sql, so only full output is cached
+            if cache is not None and stream.cut is None and not job.cancelled.is_set():
+                cache.put(english_query, stream.result())
+        except Exception as exc:
+            emit(exc)
+        else:
+            emit(None)
+
+    job.done = _stream_pool().submit(run)
+    return job
+
+# Function to translate natural language to SQL, yielding the SQL as it is generated
+def translate_stream(english_query, max_new_tokens=100, early_stop=True):
+    """Yield fragments of the SQL while the model generates it.
+
+    Joining the fragments gives the translation. With early_stop, generation
+    stops as soon as the SQL is a complete statement (see sql_statement_end).
+    Closing the generator early stops generation.
+    """
+    fragments = queue.Queue()
+    job = _start_stream(english_query, fragments.put, max_new_tokens, early_stop)
+    try:
+        while True:
+            fragment = fragments.get()
+            if fragment is None:
+                return
+            if isinstance(fragment, Exception):
+                raise fragment
+            yield fragment
+    finally:
+        job.cancel()
+
+def start_stream_async(english_query, max_new_tokens=100, early_stop=True):
+    """Start a streamed translation now; return (async iterator of fragments, StreamJob).
+
+    Closing the iterator cancels the job. Servers can watch job.done to know when
+    the generation has really ended.
+    """
+    loop = asyncio.get_running_loop()
+    fragments = asyncio.Queue()
+    job = _start_stream(english_query, lambda fragment: loop.call_soon_threadsafe(fragments.put_nowait, fragment),
+                        max_new_tokens, early_stop)
+    return _async_fragments(fragments, job), job
+
+async def _async_fragments(fragments, job):
+    try:
+        while True:
+            fragment = await fragments.get()
+            if fragment is None:
+                return
+            if isinstance(fragment, Exception):
+                raise fragment
+            yield fragment
+    finally:
+        job.cancel()
+
+def translate_stream_async(english_query, max_new_tokens=100, early_stop=True):
+    """Async iterator version of translate_stream for asyncio servers (call it inside the event loop)."""
+    return start_stream_async(english_query, max_new_tokens, early_stop)[0]
+
+# Plain-English phrases for SQL keywords; multi-word keywords are matched as one phrase
+SQL_TO_PLAIN = {
+    "SELECT": "Retrieve",
+    "FROM": "from the table",
+    "WHERE": "where the condition is met",
+    "AND": "and also",
+    "OR": "or",
+    "GROUP BY": "grouped by",
+    "ORDER BY": "ordered by",
+    "LIMIT": "limited to",
+    "JOIN": "join with the table",
+    "INNER JOIN": "join where both tables have matching values",
+    "LEFT JOIN": "include all rows from the left table and matching rows from the right table",
+    "RIGHT JOIN": "include all rows from the right table and matching rows from the left table",
+    "FULL JOIN": "include all rows from both tables",
+    "ON": "on the condition",
+    "HAVING": "filter grouped results where",
+    "DISTINCT": "only unique values of",
+    "AS": "aliased as",
+    "UNION": "combine results with",
+    "EXCEPT": "exclude results that appear in",
+    "INTERSECT": "find results common to",
+    "CASE": "when a condition is met, return",
+    "WHEN": "when the condition is",
+    "THEN": "then return",
+    "ELSE": "otherwise return",
+    "END": "end the conditional expression",
+    "LIKE": "matches the pattern",
+    "IN": "is in the list of values",
+    "NOT": "is not",
+    "IS NULL": "has no value",
+    "IS NOT NULL": "has a value",
+    "COUNT": "count the number of",
+    "SUM": "sum the values of",
+    "AVG": "find the average of",
+    "MIN": "find the minimum value of",
+    "MAX": "find the maximum value of",
+    # Spellings of the keywords above
+    "LEFT OUTER JOIN": "include all rows from the left table and matching rows from the right table",
+    "RIGHT OUTER JOIN": "include all rows from the right table and matching rows from the left table",
+    "FULL OUTER JOIN": "include all rows from both tables",
+    "UNION ALL": "combine results, keeping duplicates, with",
+    "NOT LIKE": "does not match the pattern",
+    "NOT IN": "is not in the list of values",
+}
+# Compiled once: keyword phrase as a tuple of words -> plain English
+_PLAIN_PHRASES = {tuple(keyword.split()): plain for keyword, plain in SQL_TO_PLAIN.items()}
+_LONGEST_PHRASE = max(len(words) for words in _PLAIN_PHRASES)
+_SQL_FUNCTIONS = {"COUNT", "SUM", "AVG", "MIN", "MAX"}
+# Tokens written without a space before / after them
+_NO_SPACE_BEFORE = {",", ";", ")", "."}
+_NO_SPACE_AFTER = {"(", "."}
+
+def _plain_phrases(words):
+    """Plain English for a run of keyword words, matching the longest phrases first."""
+    phrases = []
+    i = 0
+    while i < len(words):
+        for n in range(min(_LONGEST_PHRASE, len(words) - i), 0, -1):
+            plain = _PLAIN_PHRASES.get(tuple(word.upper() for word in words[i:i + n]))
+            if plain is not None:
+                phrases.append(plain)
+                i += n
+                break
+        else:
+            phrases.append(words[i])
+            i += 1
+    return " ".join(phrases)
+
 # Function to explain SQL queries in plain English
+@lru_cache(maxsize=4096)
 def explain_sql(query):
-    sql_to_plain = {
-        "SELECT": "Retrieve",
-        "FROM": "from the table",
-        "WHERE": "where the condition is met",
-        "AND": "and also",
-        "OR": "or",
-        "GROUP BY": "grouped by",
-        "ORDER BY": "ordered by",
-        "LIMIT": "limited to",
-        "JOIN": "join with the table",
-        "INNER JOIN": "join where both tables have matching values",
-        "LEFT JOIN": "include all rows from the left table and matching rows from the right table",
-        "RIGHT JOIN": "include all rows from the right table and matching rows from the left table",
-        "FULL JOIN": "include all rows from both tables",
-        "ON": "on the condition",
-        "HAVING": "filter grouped results where",
-        "DISTINCT": "only unique values of",
-        "AS": "aliased as",
-        "UNION": "combine results with",
-        "EXCEPT": "exclude results that appear in",
-        "INTERSECT": "find results common to",
-        "CASE": "when a condition is met, return",
-        "WHEN": "when the condition is",
-        "THEN": "then return",
-        "ELSE": "otherwise return",
-        "END": "end the conditional expression",
-        "LIKE": "matches the pattern",
-        "IN": "is in the list of values",
-        "NOT": "is not",
-        "IS NULL": "has no value",
-        "IS NOT NULL": "has a value",
-        "COUNT": "count the number of",
-        "SUM": "sum the values of",
-        "AVG": "find the average of",
-        "MIN": "find the minimum value of",
-        "MAX": "find the maximum value of"
-    }
-    tokens = sqlparse.parse(query)[0].tokens
-    explanation = []
-    for token in tokens:
-        explanation.append(sql_to_plain.get(token.value.upper(), token.value))
-    return " ".join(explanation)
+    """Explain a query by replacing its keywords with plain English.
+
+    Every token of every statement is visited once in lexer order, including
+    those inside subqueries. Consecutive keywords are collected so that phrases
+    split over several tokens (IS + NOT NULL) are matched as a whole. Results are
+    cached by query text; explain_sql.cache_info() reports the hit rate.
+    """
+    with metrics.stage("explain"):
+        return _explain(query)
+
+def _explain(query):
+    pieces = []
+    keywords = []  # Keyword words waiting to be matched against the phrase table
+    keywords_glue = False
+    glue = False  # Whether the next piece attaches to the previous one
+    for ttype, value in sqlparse.lexer.tokenize(query):
+        if ttype in T.Whitespace or ttype in T.Newline or ttype in T.Comment:
+            continue
+        is_function = ttype in T.Name and value.upper() in _SQL_FUNCTIONS
+        if ttype in T.Keyword or ttype in T.Operator.Comparison and value[0].isalpha() or is_function:
+            if not keywords:
+                keywords_glue, glue = glue, False
+            keywords.extend(value.split())
+            continue
+        if keywords:
+            _append_piece(pieces, _plain_phrases(keywords), keywords_glue)
+            keywords = []
+        _append_piece(pieces, value, glue or value in _NO_SPACE_BEFORE)
+        glue = value in _NO_SPACE_AFTER
+    if keywords:
+        _append_piece(pieces, _plain_phrases(keywords), keywords_glue)
+    return " ".join(pieces)
+
+def _append_piece(pieces, text, glue):
+    if glue and pieces:
+        pieces[-1] += text
+    else:
+        pieces.append(text)
+
+# Function to explain many SQL queries, e.g. a query log
+def explain_batch(queries, workers=None, chunksize=512):
+    """Explain an iterable of queries, returning the explanations in input order.
+
+    Each distinct query is explained once. With workers > 1 the distinct queries
+    are spread over a process pool, which pays off for large logs.
+    """
+    queries = list(queries)
+    unique = list(dict.fromkeys(queries))
+    if workers and workers > 1 and len(unique) > chunksize:
+        from multiprocessing import Pool
+        with Pool(processes=workers) as pool:
+            explained = dict(zip(unique, pool.map(explain_sql, unique, chunksize)))
+    else:
+        explained = {query: explain_sql(query) for query in unique}
+    return [explained[query] for query in queries]
 
 # Function to generate query suggestions
-def generate_suggestions(query_info):
-    suggestions = [
-        "Do you want to filter by another column?",
-        "Would you like to group the data by a column (e.g., department)?",
-        "Do you want to sort the data in ascending or descending order?",
-        "Would you like to add a condition (e.g., WHERE clause)?",
-        "Do you want to include only distinct values?",
-        "Would you like to join another table to fetch more details?",
-        "Do you want to calculate aggregates like COUNT, SUM, or AVG?",
-        "Would you like to add a LIMIT to restrict the number of rows returned?",
-        "Do you want to exclude certain rows (e.g., using NOT or EXCEPT)?",
-        "Would you like to add a CASE statement for conditional logic?",
-        "Do you need results grouped by multiple columns?",
-        "Would you like to add an ORDER BY clause with multiple columns?",
-        "Do you want to use a pattern match (e.g., LIKE '%value%')?"
-    ]
-    return suggestions
-
-# Extract columns or other info from SQL queries
+def generate_suggestions(query_info, schema=None):
+    """Suggestions that apply to an analyzed query (see extract_query_info).
+
+    schema, a {table: [columns]} dict, lets suggestions name columns the query
+    doesn't use yet.
+    """
+    return suggestion_index.suggest(query_info, schema)
+
+# Extract tables, columns, predicates, joins, aggregates and ordering from SQL queries
 def extract_query_info(sql_query):
-    columns = []
-    if "SELECT" in sql_query:
-        columns = sql_query.split("FROM")[0].replace("SELECT", "").strip().split(",")
-    return {"columns": columns}
+    """Analyze a query into a QueryInfo (see query_analysis); use .as_dict() for plain data."""
+    return analyze_query(sql_query)
 
 # Main interactive function
-def interactive_cli():
+def interactive_cli(server_url=None, validation_db=None):
+    """Run the menu loop; with server_url it is a thin client of sql_server.py.
+
+    With validation_db (a SQLite copy of the schema) every translation is checked
+    against it, see sql_validation.
+    """
     print("Welcome to the Text-to-SQL CLI!")
     print("You can translate natural language to SQL, explain SQL queries, and get suggestions.")
     print("Type 'exit' to quit.\n")
+
+    if server_url:
+        from sql_client import TextToSQLClient
+        client = TextToSQLClient(server_url)
+        translate, explain, suggest = client.translate_stream, client.explain, client.suggest
+    else:
+        translate, explain = translate_stream, explain_sql
+        suggest = lambda sql_query: generate_suggestions(extract_query_info(sql_query))
+        # Load the model in the background while the user reads the menu
+        model_loader.warm_up()
+
+    validator = None
+    if validation_db:
+        from sql_validation import SQLValidator
+        validator = SQLValidator(validation_db, pool_size=1, max_rows=5)
     
     while True:
         print("Options:")
@@ -105,18 +723,31 @@ def interactive_cli():
         
         if choice == "1":
             english_query = input("\nEnter your English query: ").strip()
-            sql_query = translate_to_sql(english_query)
-            print(f"\nGenerated SQL Query: {sql_query}\n")
+            print("\nGenerated SQL Query: ", end="", flush=True)
+            sql_query = ""
+            for fragment in translate(english_query):
+                sql_query += fragment
+                print(fragment, end="", flush=True)
+            print("\n")
+            if validator is not None:
+                result = validator.validate(sql_query)
+                if result.valid:
+                    more = "+" if result.truncated else ""
+                    print(f"Validation: OK, {len(result.rows)}{more} rows in {result.execute_time * 1000:.1f} ms")
+                    for row in result.rows:
+                        print(f"  {row}")
+                else:
+                    print(f"Validation: {result.status}: {result.error}")
+                print()
         
         elif choice == "2":
             sql_query = input("\nEnter your SQL query: ").strip()
-            explanation = explain_sql(sql_query)
+            explanation = explain(sql_query)
             print(f"\nExplanation: {explanation}\n")
         
         elif choice == "3":
             sql_query = input("\nEnter your SQL query: ").strip()
-            query_info = extract_query_info(sql_query)
-            suggestions = generate_suggestions(query_info)
+            suggestions = suggest(sql_query)
             print("\nSuggestions:")
             for suggestion in suggestions:
                 print(f"- {suggestion}")
@@ -126,4 +757,4 @@ def interactive_cli():
             print("\nInvalid choice. Please try again.\n")
 
 if __name__ == "__main__":
-    interactive_cli()
+    interactive_cli(os.environ.get("TEXT_TO_SQL_SERVER"), os.environ.get("TEXT_TO_SQL_VALIDATION_DB"))
@@ -0,0 +1,75 @@
+"""Measure query analysis and suggestion throughput on a synthetic query log.
+
+Compares the original string-split extract_query_info (and its fixed list of
+suggestions) with the sqlparse-based analysis and the suggestion index, without
+and with the analysis cache, and in batch over a process pool.
+
+Usage:
+    python bench_analysis.py --queries 20000 --distinct 2000 --workers 4
+"""
+import argparse
+import os
+import time
+
+import query_analysis
+from bench_explain import make_log
+
+ORIGINAL_SUGGESTIONS = [rule.text for rule in query_analysis.RULES[:13]]
+SCHEMA = {
+    "employees": ["id", "name", "salary", "department", "hired"],
+    "customers": ["id", "name", "city", "country"],
+    "orders": ["id", "customer_id", "total", "placed"],
+    "products": ["id", "name", "price", "category"],
+}
+
+
+def extract_query_info_original(sql_query):
+    """extract_query_info as it was: split the text on SELECT and FROM."""
+    columns = []
+    if "SELECT" in sql_query:
+        columns = sql_query.split("FROM")[0].replace("SELECT", "").strip().split(",")
+    return {"columns": columns}
+
+
+def timed(label, function, queries):
+    start = time.perf_counter()
+    function(queries)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<44}{elapsed:>10.3f}{len(queries) / elapsed:>14,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark query analysis and suggestions.")
+    parser.add_argument("--queries", type=int, default=20000, help="Queries in the synthetic log")
+    parser.add_argument("--distinct", type=int, default=2000, help="Distinct statements in the log")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Processes for the pooled batch run")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic log")
+    args = parser.parse_args()
+
+    queries = make_log(args.queries, args.distinct, args.seed)
+    analyze = query_analysis.analyze_query
+    index = query_analysis.suggestion_index
+
+    print(f"{args.queries} queries, {args.distinct} distinct\n")
+    print(f"{'analysis + suggestions':<44}{'seconds':>10}{'queries/s':>14}")
+    timed("original string split, fixed list",
+          lambda qs: [(extract_query_info_original(q), list(ORIGINAL_SUGGESTIONS)) for q in qs], queries)
+    timed("sqlparse analysis, no cache",
+          lambda qs: [index.suggest(analyze.__wrapped__(q), SCHEMA) for q in qs], queries)
+    analyze.cache_clear()
+    timed("sqlparse analysis + cache", lambda qs: [index.suggest(analyze(q), SCHEMA) for q in qs], queries)
+    analyze.cache_clear()
+    timed("suggest_batch", lambda qs: query_analysis.suggest_batch(qs, SCHEMA), queries)
+    if args.workers and args.workers > 1:
+        distinct = list(dict.fromkeys(queries))
+        analyze.cache_clear()
+        timed(f"suggest_batch, {args.workers} workers, all distinct",
+              lambda qs: query_analysis.suggest_batch(qs, SCHEMA, args.workers), distinct)
+        analyze.cache_clear()
+        timed("suggest_batch, 1 process, all distinct", lambda qs: query_analysis.suggest_batch(qs, SCHEMA), distinct)
+
+    print(f"\nDistinct feature masks seen by the suggestion index: {len(index._by_features)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Compare the inference backends on a fixed set of questions.
+
+Each backend runs in a fresh process so its memory use can be measured on its
+own. The SQL generated by every backend is checked against the eager PyTorch
+output, and load time, per-question latency, batch throughput and memory are
+reported side by side.
+
+Usage:
+    python bench_backends.py --backends eager int8 onnx --repeat 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Fixed questions for the equivalence check
+QUESTIONS = [
+    "Show all employees",
+    "List the names of employees in the Sales department",
+    "What is the average salary of employees?",
+    "How many customers live in 'New York'?",
+    "Find the products with a price greater than 100",
+    "Show the top 5 customers by total order amount",
+    "List all orders placed after 2023-01-01 sorted by date",
+    "Count the number of employees in each department",
+    "Which departments have more than 10 employees?",
+    "Show the names and salaries of managers ordered by salary descending",
+    "Find students who are enrolled in the 'Databases' course",
+    "What is the maximum price of products in each category?",
+]
+
+CHILD = r"""
+import json, resource, statistics, sys, time
+sys.path.insert(0, {here!r})
+import text_to_sql
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize() / 2**20
+    except OSError:
+        return None
+
+text_to_sql.configure_cache(max_entries=0)
+text_to_sql.use_backend({backend!r})
+questions = {questions!r}
+
+start = time.perf_counter()
+text_to_sql.model_loader.get()
+load_s = time.perf_counter() - start
+text_to_sql.translate_to_sql(questions[0])  # Warm-up
+
+latencies = []
+for _ in range({repeat!r}):
+    for question in questions:
+        start = time.perf_counter()
+        text_to_sql.translate_to_sql(question)
+        latencies.append(time.perf_counter() - start)
+
+start = time.perf_counter()
+sql = text_to_sql.translate_batch(questions, batch_size=len(questions))
+batch_s = time.perf_counter() - start
+
+latencies.sort()
+print(json.dumps({{
+    "sql": [text_to_sql.translate_to_sql(question) for question in questions],
+    "batch_sql": sql,
+    "load_s": load_s,
+    "p50_ms": statistics.median(latencies) * 1000,
+    "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+    "batch_qps": len(questions) / batch_s,
+    "rss_mb": rss_mb(),
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}}))
+"""
+
+
+def run_backend(backend, repeat):
+    code = CHILD.format(here=HERE, backend=backend, questions=QUESTIONS, repeat=repeat)
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and cross-check the Text-to-SQL inference backends.")
+    parser.add_argument("--backends", nargs="+", default=["eager", "int8", "onnx"], help="Backends to compare")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the question set for latency")
+    parser.add_argument("--show-diffs", action="store_true", help="Print the questions whose SQL differs")
+    parser.add_argument("--json", default=None, help="Also write the raw results to this file")
+    args = parser.parse_args()
+
+    backends = args.backends if "eager" in args.backends else ["eager"] + args.backends
+    model_path = os.environ.get("TEXT_TO_SQL_MODEL", "./fine_tuned_t5")
+    print(f"Model: {model_path}, {len(QUESTIONS)} questions x {args.repeat} passes\n")
+
+    results = {backend: run_backend(backend, args.repeat) for backend in backends}
+    reference = results["eager"].get("sql")
+
+    print(f"{'backend':<10}{'matches eager':>15}{'load (s)':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}"
+          f"{'batch q/s':>11}{'RSS (MB)':>10}{'peak (MB)':>11}")
+    for backend, result in results.items():
+        if "error" in result:
+            print(f"{backend:<10}  unavailable: {result['error']}")
+            continue
+        same = sum(a == b for a, b in zip(result["sql"], reference)) if reference else 0
+        batch_same = result["batch_sql"] == result["sql"]
+        rss = f"{result['rss_mb']:.1f}" if result["rss_mb"] is not None else "-"
+        print(f"{backend:<10}{f'{same}/{len(QUESTIONS)}':>15}{result['load_s']:>10.2f}{result['p50_ms']:>10.1f}"
+              f"{result['p95_ms']:>10.1f}{result['batch_qps']:>11.1f}{rss:>10}{result['max_rss_mb']:>11.1f}"
+              + ("" if batch_same else "  (batch output differs from single)"))
+        if args.show_diffs and reference:
+            for question, sql, expected in zip(QUESTIONS, result["sql"], reference):
+                if sql != expected:
+                    print(f"    {question!r}\n      eager:   {expected}\n      {backend}: {sql}")
+
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump({"model": model_path, "questions": QUESTIONS, "results": results}, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Measure explain_sql throughput on a synthetic query log.
+
+Compares the original explainer (keyword dict rebuilt and the query fully
+parsed on every call) with the compiled one, without and with its parse cache,
+and explain_batch over a process pool.
+
+Usage:
+    python bench_explain.py --queries 20000 --distinct 2000 --workers 4
+"""
+import argparse
+import os
+import random
+import time
+
+import sqlparse
+
+import text_to_sql
+
+TEMPLATES = [
+    "SELECT name, salary FROM employees WHERE salary > {n} ORDER BY name",
+    "SELECT department, COUNT(*) FROM employees GROUP BY department HAVING COUNT(*) > {n}",
+    "SELECT DISTINCT city FROM customers WHERE country = 'C{n}' LIMIT 10",
+    "SELECT o.id, c.name FROM orders o INNER JOIN customers c ON o.customer_id = c.id WHERE o.total > {n}",
+    "SELECT name FROM products WHERE price IS NOT NULL AND category NOT IN (SELECT id FROM hidden WHERE flag = {n})",
+    "SELECT AVG(price) AS average FROM products WHERE name LIKE 'P{n}%' GROUP BY category ORDER BY average DESC",
+    "SELECT CASE WHEN score > {n} THEN 'pass' ELSE 'fail' END FROM results",
+]
+
+
+def explain_sql_original(query):
+    """explain_sql as it was before the compiled explainer."""
+    sql_to_plain = dict(text_to_sql.SQL_TO_PLAIN)
+    tokens = sqlparse.parse(query)[0].tokens
+    explanation = []
+    for token in tokens:
+        explanation.append(sql_to_plain.get(token.value.upper(), token.value))
+    return " ".join(explanation)
+
+
+def make_log(count, distinct, seed):
+    rng = random.Random(seed)
+    pool = [rng.choice(TEMPLATES).format(n=rng.randrange(100000)) for _ in range(distinct)]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def timed(label, function, queries):
+    start = time.perf_counter()
+    function(queries)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40}{elapsed:>10.3f}{len(queries) / elapsed:>14,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the SQL explainer.")
+    parser.add_argument("--queries", type=int, default=20000, help="Queries in the synthetic log")
+    parser.add_argument("--distinct", type=int, default=2000, help="Distinct statements in the log")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Processes for the pooled batch run")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic log")
+    args = parser.parse_args()
+
+    queries = make_log(args.queries, args.distinct, args.seed)
+    uncached = text_to_sql.explain_sql.__wrapped__
+
+    print(f"{args.queries} queries, {args.distinct} distinct\n")
+    print(f"{'explainer':<40}{'seconds':>10}{'queries/s':>14}")
+    timed("original (parse every call)", lambda qs: [explain_sql_original(q) for q in qs], queries)
+    timed("compiled, no cache", lambda qs: [uncached(q) for q in qs], queries)
+    text_to_sql.explain_sql.cache_clear()
+    timed("compiled + parse cache", lambda qs: [text_to_sql.explain_sql(q) for q in qs], queries)
+    text_to_sql.explain_sql.cache_clear()
+    timed("explain_batch", text_to_sql.explain_batch, queries)
+    if args.workers and args.workers > 1:
+        text_to_sql.explain_sql.cache_clear()
+        distinct = list(dict.fromkeys(queries))
+        timed(f"explain_batch, {args.workers} workers, all distinct",
+              lambda qs: text_to_sql.explain_batch(qs, workers=args.workers), distinct)
+        text_to_sql.explain_sql.cache_clear()
+        timed("explain_batch, 1 process, all distinct", text_to_sql.explain_batch, distinct)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Measure the startup cost of the Text-to-SQL module in fresh processes.
+
+Compares using only the non-model features (explain_sql, generate_suggestions)
+with the lazy loader against loading the model at import time, which is what
+the script did before the loader was introduced.
+
+Usage:
+    python bench_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = r"""
+import json, resource, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {here!r})
+import text_to_sql
+if {eager!r}:
+    text_to_sql.model_loader.warm_up(background=False)
+imported = time.perf_counter()
+text_to_sql.explain_sql("SELECT name, salary FROM employees WHERE salary > 5000 ORDER BY name")
+text_to_sql.generate_suggestions(text_to_sql.extract_query_info("SELECT name FROM employees"))
+done = time.perf_counter()
+print(json.dumps({{
+    "import_s": imported - start,
+    "total_s": done - start,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "torch_imported": "torch" in sys.modules,
+}}))
+"""
+
+
+def run_child(eager):
+    code = CHILD.format(here=HERE, eager=eager)
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Text-to-SQL module startup.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per mode")
+    args = parser.parse_args()
+
+    model_path = os.environ.get("TEXT_TO_SQL_MODEL", "./fine_tuned_t5")
+    print(f"Model: {model_path}, {args.runs} runs per mode (median shown)\n")
+    print(f"{'mode':<28}{'import (s)':>12}{'explain+suggest (s)':>22}{'max RSS (MB)':>15}{'torch':>8}")
+    for label, eager in (("before: eager model load", True), ("after: lazy loader", False)):
+        runs = [run_child(eager) for _ in range(args.runs)]
+        import_s = statistics.median(run["import_s"] for run in runs)
+        total_s = statistics.median(run["total_s"] for run in runs)
+        rss = statistics.median(run["max_rss_mb"] for run in runs)
+        print(f"{label:<28}{import_s:>12.3f}{total_s:>22.3f}{rss:>15.1f}{str(runs[0]['torch_imported']):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Offline accuracy and throughput harness for the translator.
+
+Streams a file of question/SQL pairs through translate_batch for every
+combination of backend, torch thread count and batch size, each in a fresh
+process, and reports exact and normalized match rates, queries/s, generated
+tokens/s, p50/p99 batch latency and peak RSS. Results are written as JSON lines
+(one object per configuration) for comparison across runs; every line records
+the checkpoint path, its fingerprint and a UTC timestamp so appended runs of
+different checkpoints can be told apart.
+
+The pairs file is JSON lines ({"question": ..., "sql": ...}) or CSV/TSV with
+question and sql columns.
+
+Usage:
+    python eval_harness.py pairs.jsonl --backends eager onnx --threads 1 4 --batch-sizes 1 8 32 --output results.jsonl
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from itertools import islice
+
+import sqlparse
+
+_SPACES = re.compile(r"\s+")
+_PUNCTUATION_SPACES = re.compile(r"\s*([(),])\s*")
+
+
+def read_pairs(path, limit=None):
+    """Yield (question, sql) pairs from a JSON lines, CSV or TSV file without loading it whole."""
+    with open(path, newline="", encoding="utf-8") as handle:
+        if path.endswith((".jsonl", ".json")):
+            rows = (json.loads(line) for line in handle if line.strip())
+        else:
+            rows = csv.DictReader(handle, delimiter="\t" if path.endswith(".tsv") else ",")
+        for row in islice(rows, limit):
+            yield row["question"], row["sql"]
+
+
+def normalize_sql(sql):
+    """Canonical spelling of a query: keyword and identifier case, whitespace, trailing semicolon."""
+    sql = sqlparse.format(sql, keyword_case="upper", identifier_case="lower", strip_comments=True)
+    sql = _PUNCTUATION_SPACES.sub(lambda match: match.group(1) + (" " if match.group(1) == "," else ""), sql)
+    return _SPACES.sub(" ", sql).strip().rstrip(";").strip()
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def _import_translator():
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import text_to_sql
+
+    return text_to_sql
+
+
+def run_metadata(model_path):
+    """Checkpoint path, checkpoint fingerprint and UTC timestamp for one result line."""
+    from translation_cache import checkpoint_fingerprint
+
+    return {
+        "checkpoint": model_path,
+        "fingerprint": checkpoint_fingerprint(model_path),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def run_config(path, backend, threads, batch_size, limit=None):
+    """Evaluate one configuration in this process and return its metrics."""
+    import torch
+
+    text_to_sql = _import_translator()
+    torch.set_num_threads(threads)
+    text_to_sql.configure_cache(max_entries=0)
+    text_to_sql.use_backend(backend)
+
+    start = time.perf_counter()
+    _, tokenizer, _ = text_to_sql.model_loader.get()
+    load_s = time.perf_counter() - start
+    text_to_sql.translate_batch(["Show all employees"], batch_size=1)  # Warm-up
+
+    queries = exact = normalized = generated_tokens = 0
+    latencies = []  # One entry per query: the latency of the batch it was in
+    busy = 0.0
+    pairs = read_pairs(path, limit)
+    while True:
+        batch = list(islice(pairs, batch_size))
+        if not batch:
+            break
+        questions = [question for question, _ in batch]
+        start = time.perf_counter()
+        predictions = text_to_sql.translate_batch(questions, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        busy += elapsed
+        latencies.extend([elapsed] * len(batch))
+
+        generated_tokens += sum(len(ids) for ids in tokenizer(predictions)["input_ids"])
+        for (_, expected), predicted in zip(batch, predictions):
+            queries += 1
+            exact += predicted.strip() == expected.strip()
+            normalized += normalize_sql(predicted) == normalize_sql(expected)
+
+    latencies.sort()
+    return {
+        **run_metadata(text_to_sql.model_loader.model_path),
+        "backend": backend,
+        "threads": threads,
+        "batch_size": batch_size,
+        "queries": queries,
+        "exact_match": exact / queries if queries else 0.0,
+        "normalized_match": normalized / queries if queries else 0.0,
+        "queries_per_s": queries / busy if busy else 0.0,
+        "tokens_per_s": generated_tokens / busy if busy else 0.0,
+        "latency_p50_ms": percentile(latencies, 0.50) * 1000,
+        "latency_p99_ms": percentile(latencies, 0.99) * 1000,
+        "latency_mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "load_s": load_s,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def run_in_subprocess(path, backend, threads, batch_size, limit):
+    config = json.dumps({"path": path, "backend": backend, "threads": threads, "batch_size": batch_size,
+                         "limit": limit})
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), "--config", config],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        return {**run_metadata(_import_translator().model_loader.model_path), "backend": backend,
+                "threads": threads, "batch_size": batch_size, "error": lines[-1] if lines else "failed"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate translation accuracy and throughput.")
+    parser.add_argument("pairs", nargs="?", help="JSON lines or CSV/TSV file of question/SQL pairs")
+    parser.add_argument("--backends", nargs="+", default=["eager"], help="Inference backends to compare")
+    parser.add_argument("--threads", nargs="+", type=int, default=[os.cpu_count()], help="torch thread counts")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 32], help="Batch sizes")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N pairs")
+    parser.add_argument("--output", default=None, help="Append one JSON line per configuration to this file")
+    parser.add_argument("--config", default=None, help=argparse.SUPPRESS)  # Internal: run one configuration
+    args = parser.parse_args()
+
+    if args.config:
+        config = json.loads(args.config)
+        print(json.dumps(run_config(**config)))
+        return
+    if not args.pairs:
+        parser.error("the pairs file is required")
+
+    output = open(args.output, "a") if args.output else None
+    print(f"{'backend':<8}{'threads':>8}{'batch':>7}{'queries':>9}{'exact':>8}{'normal.':>9}{'q/s':>9}"
+          f"{'tok/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'RSS MB':>9}")
+    try:
+        for backend, threads, batch_size in itertools.product(args.backends, args.threads, args.batch_sizes):
+            result = run_in_subprocess(args.pairs, backend, threads, batch_size, args.limit)
+            if output is not None:
+                output.write(json.dumps(result) + "\n")
+                output.flush()
+            if "error" in result:
+                print(f"{backend:<8}{threads:>8}{batch_size:>7}  failed: {result['error']}")
+                continue
+            print(f"{backend:<8}{threads:>8}{batch_size:>7}{result['queries']:>9}{result['exact_match']:>8.1%}"
+                  f"{result['normalized_match']:>9.1%}{result['queries_per_s']:>9.1f}{result['tokens_per_s']:>9.0f}"
+                  f"{result['latency_p50_ms']:>9.1f}{result['latency_p99_ms']:>9.1f}{result['peak_rss_mb']:>9.0f}")
+    finally:
+        if output is not None:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
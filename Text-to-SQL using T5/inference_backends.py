@@ -0,0 +1,111 @@
+"""Inference backends for the T5 translator.
+
+A backend turns a checkpoint directory into a model object with the Hugging Face
+generate() method, so translate_to_sql and translate_batch run unchanged on top
+of any of them:
+
+    eager   the PyTorch model as saved (GPU when available)
+    int8    PyTorch on CPU with the Linear layers dynamically quantized to int8
+    onnx    encoder and decoder exported to ONNX and run with ONNX Runtime,
+            reusing the decoder's key/value cache between generated tokens
+
+Select one with TEXT_TO_SQL_BACKEND or use_backend() in the main script, and
+register new ones with register_backend(). Only the eager backend is required;
+int8 needs a PyTorch build with quantized kernels and onnx needs
+`pip install "optimum-onnx[onnxruntime]"`.
+"""
+import os
+
+from translation_cache import checkpoint_fingerprint
+
+BACKENDS = {}
+
+
+def register_backend(name, loader):
+    """Register loader(model_path) -> (model, device) under a backend name."""
+    BACKENDS[name] = loader
+
+
+def load_backend(name, model_path):
+    """Load a checkpoint with the named backend and return (model, device)."""
+    try:
+        loader = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown backend {name!r}, expected one of: {', '.join(BACKENDS)}") from None
+    return loader(model_path)
+
+
+def load_eager(model_path, device=None):
+    """The PyTorch model as saved, on CUDA when available.
+
+    When the checkpoint has a model.safetensors file it is loaded through
+    safetensors, which memory-maps the file instead of unpickling a full copy.
+    """
+    import torch
+    from transformers import AutoModelForSeq2SeqLM
+
+    kwargs = {}
+    if os.path.exists(os.path.join(model_path, "model.safetensors")):
+        kwargs["use_safetensors"] = True
+    if device is None:
+        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_path, **kwargs).to(device)
+    model.eval()
+    return model, device
+
+
+def load_int8(model_path):
+    """PyTorch on CPU with int8 weights for every Linear layer.
+
+    Activations are quantized on the fly, so no calibration data is needed. The
+    quantized kernels only exist on CPU.
+    """
+    import torch
+    from torch.ao.quantization import quantize_dynamic
+
+    model, device = load_eager(model_path, device=torch.device("cpu"))
+    model = quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    model.eval()
+    return model, device
+
+
+def onnx_export_path(model_path):
+    """Directory the ONNX export of a checkpoint is kept in, next to the checkpoint."""
+    return os.path.normpath(model_path) + "-onnx"
+
+
+def load_onnx(model_path):
+    """ONNX Runtime on CPU with separate encoder and decoder sessions and a KV cache.
+
+    The checkpoint is exported once to onnx_export_path(model_path) and the export
+    is reused until the checkpoint files change.
+    """
+    import torch
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError as exc:
+        raise ImportError('The onnx backend needs: pip install "optimum-onnx[onnxruntime]"') from exc
+
+    export_path = onnx_export_path(model_path)
+    stamp_path = os.path.join(export_path, "checkpoint_fingerprint")
+    fingerprint = checkpoint_fingerprint(model_path)
+    try:
+        with open(stamp_path) as stamp:
+            current = stamp.read().strip() == fingerprint
+    except OSError:
+        current = False
+
+    if current:
+        model = ORTModelForSeq2SeqLM.from_pretrained(export_path, use_cache=True, provider="CPUExecutionProvider")
+    else:
+        model = ORTModelForSeq2SeqLM.from_pretrained(model_path, export=True, use_cache=True,
+                                                     provider="CPUExecutionProvider")
+        model.save_pretrained(export_path)
+        with open(stamp_path, "w") as stamp:
+            stamp.write(fingerprint)
+    return model, torch.device("cpu")
+
+
+register_backend("eager", load_eager)
+register_backend("int8", load_int8)
+register_backend("onnx", load_onnx)
@@ -0,0 +1,149 @@
+"""Load generator for sql_server.py.
+
+Runs a fixed number of concurrent clients in a closed loop (each sends its next
+request as soon as the previous one is answered) for a given duration and
+reports throughput and p50/p95/p99 latency per endpoint.
+
+Every translate request gets a unique question (a request number is appended),
+so the server's translation cache cannot answer it and the latencies include
+inference through the MicroBatcher. --cached sends the fixed questions as they
+are instead, to measure the cached path. The cache hit rate of the run is read
+from /health; starting the server with --cache-entries 0 turns the cache off.
+
+Usage:
+    python sql_server.py --port 8000 --cache-entries 0 &
+    python load_test.py --url http://127.0.0.1:8000 --clients 32 --duration 30 --mix translate=8,explain=1,suggest=1
+"""
+import argparse
+import random
+import threading
+import time
+
+from sql_client import ServerError, TextToSQLClient
+
+QUESTIONS = [
+    "Show all employees",
+    "List the names of employees in the Sales department",
+    "What is the average salary of employees?",
+    "How many customers live in 'New York'?",
+    "Find the products with a price greater than 100",
+    "Show the top 5 customers by total order amount",
+    "Count the number of employees in each department",
+    "Which departments have more than 10 employees?",
+]
+SQL_QUERIES = [
+    "SELECT name, salary FROM employees WHERE salary > 5000 ORDER BY name",
+    "SELECT department, COUNT(*) FROM employees GROUP BY department HAVING COUNT(*) > 10",
+    "SELECT DISTINCT city FROM customers WHERE country = 'USA' LIMIT 10",
+    "SELECT o.id, c.name FROM orders o INNER JOIN customers c ON o.customer_id = c.id",
+]
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def run_client(url, deadline, mix, seed, results, lock, cached=False):
+    rng = random.Random(seed)
+    endpoints, weights = list(mix), list(mix.values())
+    latencies = {endpoint: [] for endpoint in endpoints}
+    errors = {}
+    sent = 0
+
+    def question():
+        nonlocal sent
+        sent += 1
+        text = rng.choice(QUESTIONS)
+        return text if cached else f"{text} (request {seed}-{sent})"
+
+    with TextToSQLClient(url) as client:
+        calls = {"translate": lambda: client.translate(question()),
+                 "explain": lambda: client.explain(rng.choice(SQL_QUERIES)),
+                 "suggest": lambda: client.suggest(rng.choice(SQL_QUERIES))}
+        while time.monotonic() < deadline:
+            endpoint = rng.choices(endpoints, weights)[0]
+            start = time.perf_counter()
+            try:
+                calls[endpoint]()
+            except ServerError as exc:
+                errors[exc.status] = errors.get(exc.status, 0) + 1
+                continue
+            except OSError as exc:
+                errors[type(exc).__name__] = errors.get(type(exc).__name__, 0) + 1
+                client.close()
+                continue
+            latencies[endpoint].append(time.perf_counter() - start)
+
+    with lock:
+        for endpoint, values in latencies.items():
+            results["latencies"].setdefault(endpoint, []).extend(values)
+        for error, count in errors.items():
+            results["errors"][error] = results["errors"].get(error, 0) + count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the Text-to-SQL HTTP service.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server base URL")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--mix", default="translate=8,explain=1,suggest=1", help="Endpoint weights")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the request mix")
+    parser.add_argument("--cached", action="store_true",
+                        help="Repeat the fixed questions, so translations can come from the server's cache")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    with TextToSQLClient(args.url) as client:
+        client.translate(QUESTIONS[0])  # Wait for the model so loading isn't measured
+        cache_before = client.health()["cache"]
+
+    results = {"latencies": {}, "errors": {}}
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+    start = time.perf_counter()
+    threads = [
+        threading.Thread(target=run_client, args=(args.url, deadline, mix, args.seed + i, results, lock, args.cached))
+        for i in range(args.clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.clients} clients for {elapsed:.1f}s against {args.url}\n")
+    print(f"{'endpoint':<12}{'requests':>10}{'req/s':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}")
+    everything = []
+    for endpoint, values in sorted(results["latencies"].items()):
+        values.sort()
+        everything.extend(values)
+        print(f"{endpoint:<12}{len(values):>10}{len(values) / elapsed:>10.1f}{percentile(values, 0.50) * 1000:>10.1f}"
+              f"{percentile(values, 0.95) * 1000:>10.1f}{percentile(values, 0.99) * 1000:>10.1f}")
+    everything.sort()
+    print(f"{'all':<12}{len(everything):>10}{len(everything) / elapsed:>10.1f}"
+          f"{percentile(everything, 0.50) * 1000:>10.1f}{percentile(everything, 0.95) * 1000:>10.1f}"
+          f"{percentile(everything, 0.99) * 1000:>10.1f}")
+    with TextToSQLClient(args.url) as client:
+        cache_after = client.health()["cache"]
+    if cache_before is None or cache_after is None:
+        print("Translation cache: disabled")
+    else:
+        hits = cache_after["hits"] - cache_before["hits"]
+        lookups = hits + cache_after["misses"] - cache_before["misses"]
+        print(f"Translation cache: {hits} hits of {lookups} lookups ({hits / max(lookups, 1):.1%})")
+    if results["errors"]:
+        print("Errors: " + ", ".join(f"{error}: {count}" for error, count in sorted(results["errors"].items(), key=str)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,391 @@
+"""Structured analysis of SQL queries and the rules that pick suggestions for them.
+
+analyze_query() reads a statement once with the sqlparse lexer and returns a
+QueryInfo with its tables, columns, joins, predicates, aggregates and GROUP BY /
+ORDER BY / LIMIT clauses, plus a bitmask of the features it uses. Suggestion
+rules declare which features they need and which they must not see, and
+SuggestionIndex maps each feature mask to its rules once, so picking the
+suggestions for a query is a dictionary lookup.
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+import sqlparse
+from sqlparse import tokens as T
+
+Column = namedtuple("Column", "expression alias")
+Table = namedtuple("Table", "name alias")
+Join = namedtuple("Join", "kind table alias condition")
+Predicate = namedtuple("Predicate", "text column operator value")
+Aggregate = namedtuple("Aggregate", "function argument")
+OrderItem = namedtuple("OrderItem", "expression direction")
+
+AGGREGATE_FUNCTIONS = {"COUNT", "SUM", "AVG", "MIN", "MAX"}
+SET_OPERATORS = {"UNION", "UNION ALL", "INTERSECT", "EXCEPT", "MINUS"}
+_CLAUSES = {"FROM", "WHERE", "GROUP BY", "HAVING", "ORDER BY", "LIMIT", "OFFSET"}
+_JOIN = re.compile(r"^(?:NATURAL )?(?:(INNER|CROSS|LEFT|RIGHT|FULL)(?: OUTER)? )?JOIN$")
+_OPERATORS = ("NOT BETWEEN", "BETWEEN", "NOT LIKE", "LIKE", "NOT IN", "IN", "IS NOT", "IS")
+_WHITESPACE = re.compile(r"\s+")
+_NO_SPACE_BEFORE = {",", ")", "."}
+_NO_SPACE_AFTER = {"(", "."}
+
+# Feature bits of QueryInfo.features
+(WHERE, GROUP_BY, MULTI_GROUP, HAVING, ORDER_BY, MULTI_ORDER, LIMIT, DISTINCT, JOIN, JOIN_WITHOUT_ON, AGGREGATE,
+ STAR, CASE, PATTERN, NEGATION, SUBQUERY, SELECT) = (1 << i for i in range(17))
+
+
+class QueryInfo:
+    """What a query does, as found by analyze_query(). Treat it as read-only; results are cached and shared."""
+
+    __slots__ = ("sql", "statement_type", "columns", "tables", "joins", "predicates", "aggregates", "group_by",
+                 "having", "order_by", "limit", "distinct", "subqueries", "names", "features")
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.statement_type = None
+        self.columns = ()
+        self.tables = ()
+        self.joins = ()
+        self.predicates = ()
+        self.aggregates = ()
+        self.group_by = ()
+        self.having = None
+        self.order_by = ()
+        self.limit = None
+        self.distinct = False
+        self.subqueries = 0
+        self.names = frozenset()  # Every identifier in the query, lowercased
+        self.features = 0
+
+    def has(self, feature):
+        return bool(self.features & feature)
+
+    def as_dict(self):
+        """Plain dict (lists and dicts only), e.g. for JSON."""
+        return {
+            "statement_type": self.statement_type,
+            "columns": [column._asdict() for column in self.columns],
+            "tables": [table._asdict() for table in self.tables],
+            "joins": [join._asdict() for join in self.joins],
+            "predicates": [predicate._asdict() for predicate in self.predicates],
+            "aggregates": [aggregate._asdict() for aggregate in self.aggregates],
+            "group_by": list(self.group_by),
+            "having": self.having,
+            "order_by": [item._asdict() for item in self.order_by],
+            "limit": self.limit,
+            "distinct": self.distinct,
+            "subqueries": self.subqueries,
+        }
+
+    def __repr__(self):
+        return f"QueryInfo({self.as_dict()!r})"
+
+
+@lru_cache(maxsize=4096)
+def analyze_query(sql):
+    """Analyze the first statement of sql in one pass over its tokens.
+
+    Clauses are tracked at the top level only; text inside parentheses (function
+    arguments, IN lists, subqueries) stays part of the expression it belongs to.
+    Only the first SELECT of a UNION/INTERSECT/EXCEPT is broken down.
+    """
+    info = QueryInfo(sql)
+    clause = None
+    items = {}  # Clause -> list of items, each a list of token values
+    joins = []  # [kind, tokens, condition tokens or None]
+    aggregates = []  # [function, argument tokens, depth inside its parentheses or None once closed]
+    names = set()
+    depth = 0
+    features = 0
+    pending_aggregate = None
+    after_name = False  # A "(" right after a name is a function call, written without a space
+
+    for ttype, value in sqlparse.lexer.tokenize(sql):
+        if ttype in T.Whitespace or ttype in T.Newline or ttype in T.Comment:
+            continue
+        upper = value.upper()
+
+        if depth == 0 and ttype in T.Keyword:
+            keyword = _WHITESPACE.sub(" ", upper)
+            if ttype in T.DML or ttype in T.DDL:
+                if info.statement_type is None:
+                    info.statement_type = keyword
+                    if keyword == "SELECT":
+                        features |= SELECT
+                        clause = "SELECT"
+                        items[clause] = [[]]
+                    continue
+            elif keyword in SET_OPERATORS:
+                break
+            elif keyword == "DISTINCT" and clause == "SELECT" and not items["SELECT"][0]:
+                info.distinct = True
+                continue
+            elif keyword in _CLAUSES:
+                clause = keyword
+                items.setdefault(clause, []).append([])
+                continue
+            elif _JOIN.match(keyword):
+                kind = _JOIN.match(keyword).group(1) or ("CROSS" if "CROSS" in keyword else "INNER")
+                joins.append([kind, [], None])
+                clause = "JOIN"
+                continue
+            elif keyword == "ON" and clause == "JOIN":
+                joins[-1][2] = []
+                clause = "ON"
+                continue
+            elif keyword in ("AND", "OR") and clause in ("WHERE", "HAVING"):
+                current = [token.upper() for token in items[clause][-1]]
+                if not ("BETWEEN" in current and "AND" not in current[current.index("BETWEEN"):]):
+                    items[clause].append([])
+                    continue
+            elif keyword == "CASE":
+                features |= CASE
+        elif ttype in T.Punctuation:
+            if value == ";" and depth == 0:
+                break
+            if value == "," and depth == 0 and clause in ("SELECT", "FROM", "GROUP BY", "ORDER BY"):
+                items[clause].append([])
+                continue
+            if value == "(":
+                depth += 1
+            elif value == ")":
+                depth -= 1
+
+        if ttype in T.Keyword and depth > 0:
+            if ttype in T.DML and upper == "SELECT":
+                info.subqueries += 1
+            elif upper == "CASE":
+                features |= CASE
+        opened = pending_aggregate is not None and value == "("
+        if opened:
+            aggregates.append([pending_aggregate, [], depth])
+        pending_aggregate = None
+        if ttype in T.Name:
+            names.add(value.lower())
+            if upper in AGGREGATE_FUNCTIONS:
+                pending_aggregate = upper
+        if ttype in T.Wildcard and depth == 0 and clause == "SELECT":
+            item = items["SELECT"][-1]
+            if not item or item[-1] == ".":
+                features |= STAR  # * or t.*, not COUNT(*) or a multiplication
+        if ttype in T.Keyword or ttype in T.Operator.Comparison:
+            words = upper.split()
+            if "LIKE" in words or "ILIKE" in words:
+                features |= PATTERN
+            if "NOT" in words or "EXCEPT" in words:
+                features |= NEGATION
+
+        # Collect the token into the argument of every open aggregate and the current item
+        call = value == "(" and after_name
+        after_name = ttype in T.Name
+        for aggregate in aggregates:
+            if aggregate[2] is not None and depth < aggregate[2]:
+                aggregate[2] = None  # Its closing parenthesis
+            elif aggregate[2] is not None and not (opened and aggregate is aggregates[-1]):
+                _collect(aggregate[1], value, call)
+        if clause == "JOIN":
+            _collect(joins[-1][1], value, call)
+        elif clause == "ON":
+            _collect(joins[-1][2], value, call)
+        elif clause is not None:
+            _collect(items[clause][-1], value, call)
+
+    info.columns = tuple(_column(item) for item in items.get("SELECT", ()) if item)
+    info.tables = tuple(_table(item) for item in items.get("FROM", ()) if item)
+    info.joins = tuple(Join(kind, *_table(tokens), _text(condition) if condition else None)
+                       for kind, tokens, condition in joins)
+    info.predicates = tuple(_predicate(item) for item in items.get("WHERE", ()) if item)
+    info.aggregates = tuple(Aggregate(function, _text(argument)) for function, argument, _ in aggregates)
+    info.group_by = tuple(_text(item) for item in items.get("GROUP BY", ()) if item)
+    having = [_text(item) for item in items.get("HAVING", ()) if item]
+    info.having = " AND ".join(having) if having else None
+    info.order_by = tuple(_order_item(item) for item in items.get("ORDER BY", ()) if item)
+    limit = items.get("LIMIT")
+    if limit and limit[0] and limit[0][0].isdigit():
+        info.limit = int(limit[0][0])
+    info.names = frozenset(names)
+
+    if info.predicates:
+        features |= WHERE
+    if info.group_by:
+        features |= GROUP_BY | (MULTI_GROUP if len(info.group_by) > 1 else 0)
+    if info.having:
+        features |= HAVING
+    if info.order_by:
+        features |= ORDER_BY | (MULTI_ORDER if len(info.order_by) > 1 else 0)
+    if "LIMIT" in items:
+        features |= LIMIT
+    if info.distinct:
+        features |= DISTINCT
+    if info.joins:
+        features |= JOIN
+        if any(join.condition is None and join.kind != "CROSS" for join in info.joins):
+            features |= JOIN_WITHOUT_ON
+    if info.aggregates:
+        features |= AGGREGATE
+    if info.subqueries:
+        features |= SUBQUERY
+    info.features = features
+    return info
+
+
+def analyze_batch(queries, workers=None, chunksize=512):
+    """Analyze many queries, each distinct one once; returns QueryInfo objects in input order."""
+    queries = list(queries)
+    unique = list(dict.fromkeys(queries))
+    if workers and workers > 1 and len(unique) > chunksize:
+        from multiprocessing import Pool
+        with Pool(processes=workers) as pool:
+            analyzed = dict(zip(unique, pool.map(analyze_query, unique, chunksize)))
+    else:
+        analyzed = {query: analyze_query(query) for query in unique}
+    return [analyzed[query] for query in queries]
+
+
+def _collect(tokens, value, call):
+    if call and tokens:
+        tokens[-1] += value  # COUNT( stays one token
+    else:
+        tokens.append(value)
+
+
+def _text(tokens):
+    """Rebuild an expression from its token values with normal spacing."""
+    text = ""
+    glue = True
+    for value in tokens:
+        if not glue and value not in _NO_SPACE_BEFORE:
+            text += " "
+        text += value
+        glue = value[-1] in _NO_SPACE_AFTER
+    return text
+
+
+def _split_alias(tokens):
+    """Split `expr AS alias` or `expr alias` into (expression tokens, alias)."""
+    if len(tokens) >= 3 and tokens[-2].upper() == "AS":
+        return tokens[:-2], tokens[-1]
+    if len(tokens) >= 2 and tokens[-2] not in (".", "(") and tokens[-1] not in (")", "*") \
+            and tokens[-1][0].isalpha() and (tokens[-2][0].isalnum() or tokens[-2] == ")"):
+        return tokens[:-1], tokens[-1]
+    return tokens, None
+
+
+def _column(tokens):
+    expression, alias = _split_alias(tokens)
+    return Column(_text(expression), alias)
+
+
+def _table(tokens):
+    expression, alias = _split_alias(tokens)
+    return Table(_text(expression), alias)
+
+
+def _predicate(tokens):
+    text = _text(tokens)
+    words = [token.upper() for token in tokens]
+    for i, word in enumerate(words):
+        following = words[i + 1].split()[0] if i + 1 < len(words) else ""
+        if word in ("=", "<", ">", "<=", ">=", "<>", "!=") or word in _OPERATORS or f"{word} {following}" in _OPERATORS:
+            if i == 0:
+                break
+            operator, value = word, _text(tokens[i + 1:])
+            # Operators split over two tokens: NOT + IN, IS + NOT NULL
+            if f"{word} {following}" in _OPERATORS:
+                operator = f"{word} {following}"
+                rest = tokens[i + 1][len(following):].strip()
+                value = _text(([rest] if rest else []) + tokens[i + 2:])
+            return Predicate(text, _text(tokens[:i]), operator, value)
+    return Predicate(text, None, None, None)
+
+
+def _order_item(tokens):
+    if tokens[-1].upper() in ("ASC", "DESC"):
+        return OrderItem(_text(tokens[:-1]), tokens[-1].upper())
+    return OrderItem(_text(tokens), "ASC")
+
+
+class Rule:
+    """A suggestion shown when the query has every feature in requires and none in excludes.
+
+    with_column is an alternative text used when a schema names a column of the
+    query's tables that the query does not use yet; {column} is replaced by it.
+    """
+
+    __slots__ = ("text", "requires", "excludes", "with_column")
+
+    def __init__(self, text, requires=0, excludes=0, with_column=None):
+        self.text = text
+        self.requires = requires
+        self.excludes = excludes
+        self.with_column = with_column
+
+    def applies(self, features):
+        return features & self.requires == self.requires and not features & self.excludes
+
+    def render(self, info, schema=None):
+        if self.with_column is not None and schema:
+            column = unused_column(info, schema)
+            if column is not None:
+                return self.with_column.format(column=column)
+        return self.text
+
+
+RULES = [
+    Rule("Do you want to filter by another column?", requires=WHERE,
+         with_column="Do you want to filter by another column (e.g., {column})?"),
+    Rule("Would you like to group the data by a column (e.g., department)?", excludes=GROUP_BY,
+         with_column="Would you like to group the data by a column (e.g., {column})?"),
+    Rule("Do you want to sort the data in ascending or descending order?", excludes=ORDER_BY),
+    Rule("Would you like to add a condition (e.g., WHERE clause)?", excludes=WHERE,
+         with_column="Would you like to add a condition (e.g., WHERE {column} = ...)?"),
+    Rule("Do you want to include only distinct values?", excludes=DISTINCT | GROUP_BY | AGGREGATE),
+    Rule("Would you like to join another table to fetch more details?", excludes=JOIN),
+    Rule("Do you want to calculate aggregates like COUNT, SUM, or AVG?", excludes=AGGREGATE),
+    Rule("Would you like to add a LIMIT to restrict the number of rows returned?", excludes=LIMIT),
+    Rule("Do you want to exclude certain rows (e.g., using NOT or EXCEPT)?", excludes=NEGATION),
+    Rule("Would you like to add a CASE statement for conditional logic?", excludes=CASE),
+    Rule("Do you need results grouped by multiple columns?", requires=GROUP_BY, excludes=MULTI_GROUP),
+    Rule("Would you like to add an ORDER BY clause with multiple columns?", requires=ORDER_BY, excludes=MULTI_ORDER),
+    Rule("Do you want to use a pattern match (e.g., LIKE '%value%')?", excludes=PATTERN),
+    Rule("Would you like to filter the groups with a HAVING clause?", requires=GROUP_BY | AGGREGATE, excludes=HAVING),
+    Rule("Did you mean to add an ON condition to the join?", requires=JOIN_WITHOUT_ON),
+    Rule("Do you want to select only the columns you need instead of *?", requires=STAR,
+         with_column="Do you want to select only the columns you need (e.g., {column}) instead of *?"),
+]
+
+
+class SuggestionIndex:
+    """Maps a feature mask to the rules that apply to it, computed once per distinct mask."""
+
+    def __init__(self, rules=RULES):
+        self.rules = list(rules)
+        self._by_features = {}
+
+    def rules_for(self, features):
+        rules = self._by_features.get(features)
+        if rules is None:
+            rules = self._by_features[features] = tuple(rule for rule in self.rules if rule.applies(features))
+        return rules
+
+    def suggest(self, info, schema=None):
+        """Suggestions for an analyzed query; schema ({table: [columns]}) lets them name real columns."""
+        return [rule.render(info, schema) for rule in self.rules_for(info.features)]
+
+
+def unused_column(info, schema):
+    """First column of the query's tables (per schema) that the query doesn't mention."""
+    for table in info.tables + tuple(Table(join.table, join.alias) for join in info.joins):
+        for column in schema.get(table.name, ()):
+            if column.lower() not in info.names:
+                return column
+    return None
+
+
+suggestion_index = SuggestionIndex()
+
+
+def suggest_batch(queries, schema=None, workers=None):
+    """Suggestions for many queries, in input order."""
+    return [suggestion_index.suggest(info, schema) for info in analyze_batch(queries, workers)]
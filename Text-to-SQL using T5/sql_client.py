@@ -0,0 +1,92 @@
+"""Small HTTP client for sql_server.py, used by the CLI and the load generator."""
+import codecs
+import http.client
+import json
+from urllib.parse import urlsplit
+
+
+class ServerError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+class TextToSQLClient:
+    """Keeps one persistent connection to the server; not thread-safe, use one client per thread."""
+
+    def __init__(self, base_url="http://127.0.0.1:8000", timeout=60.0):
+        url = urlsplit(base_url)
+        self.host = url.hostname or "127.0.0.1"
+        self.port = url.port or 80
+        self.timeout = timeout
+        self._connection = None
+
+    def translate(self, english_query):
+        return self._request("POST", "/translate", {"query": english_query})["sql"]
+
+    def translate_stream(self, english_query):
+        """Yield fragments of the SQL as the server generates them."""
+        response = self._send("POST", "/translate/stream", {"query": english_query})
+        if response.status != 200:
+            result = json.loads(response.read())
+            raise ServerError(response.status, result.get("error", response.reason))
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        try:
+            while True:
+                data = response.read1(4096)
+                if not data:
+                    break
+                text = decoder.decode(data)
+                if text:
+                    yield text
+        except http.client.IncompleteRead:
+            self.close()
+            raise ServerError(500, "Translation stream ended early") from None
+        if response.getheader("Connection", "").lower() == "close":
+            self.close()
+
+    def explain(self, sql_query):
+        return self._request("POST", "/explain", {"sql": sql_query})["explanation"]
+
+    def suggest(self, sql_query):
+        return self._request("POST", "/suggest", {"sql": sql_query})["suggestions"]
+
+    def health(self):
+        return self._request("GET", "/health")
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _send(self, method, path, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        for attempt in range(2):
+            if self._connection is None:
+                self._connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self._connection.request(method, path, body, headers)
+                return self._connection.getresponse()
+            except (ConnectionError, http.client.BadStatusLine):
+                # The server closed an idle keep-alive connection; reconnect once
+                self.close()
+                if attempt:
+                    raise
+
+    def _request(self, method, path, payload=None):
+        response = self._send(method, path, payload)
+        data = response.read()
+        if response.getheader("Connection", "").lower() == "close":
+            self.close()
+
+        result = json.loads(data)
+        if response.status != 200:
+            raise ServerError(response.status, result.get("error", response.reason))
+        return result
@@ -0,0 +1,197 @@
+"""Opt-in instrumentation for the Text-to-SQL pipeline.
+
+Stages (encode, generate, decode, explain, io, and whole HTTP requests) are
+timed into histograms and counters track tokens in and out, batches and cache
+hits. Everything is off by default: metrics.stage() then returns a shared
+no-op context manager and metrics.count() returns immediately, so instrumented
+code pays one attribute check per call. Enable with TEXT_TO_SQL_METRICS=1 or
+metrics.enable().
+
+    with metrics.stage("generate"):
+        outputs = model.generate(...)
+    metrics.count("tokens_out", n)
+
+metrics.prometheus_text() renders the Prometheus text format (served on
+GET /metrics by sql_server.py) and start_dump() prints a summary periodically.
+"""
+import bisect
+import os
+import sys
+import threading
+import time
+
+STAGES = ("encode", "generate", "decode", "explain", "io", "request")
+# Histogram upper bounds in seconds, and for batch sizes
+TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+COUNTERS = ("tokens_in", "tokens_out", "translations", "batches", "requests")
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "total", "count", "maximum")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # The last one is +Inf
+        self.total = 0.0
+        self.count = 0
+        self.maximum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+        if value > self.maximum:
+            self.maximum = value
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe_stage(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """Stage timings, counters and the batch size histogram of one process."""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._dump_thread = None
+        self.reset()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def reset(self):
+        with self._lock:
+            self.stages = {stage: Histogram(TIME_BUCKETS) for stage in STAGES}
+            self.batch_sizes = Histogram(SIZE_BUCKETS)
+            self.counters = {name: 0 for name in COUNTERS}
+            self.started = time.time()
+
+    def stage(self, name):
+        """Context manager timing a stage; a shared no-op when metrics are disabled."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def observe_stage(self, name, seconds):
+        with self._lock:
+            histogram = self.stages.get(name)
+            if histogram is None:
+                histogram = self.stages[name] = Histogram(TIME_BUCKETS)
+            histogram.observe(seconds)
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe_batch(self, size):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.batch_sizes.observe(size)
+            self.counters["batches"] += 1
+
+    def prometheus_text(self, cache_stats=None):
+        """Prometheus exposition format; cache_stats (TranslationCache.stats()) adds the cache counters."""
+        lines = []
+        with self._lock:
+            lines.append("# HELP text_to_sql_stage_seconds Time spent per pipeline stage.")
+            lines.append("# TYPE text_to_sql_stage_seconds histogram")
+            for stage, histogram in self.stages.items():
+                lines.extend(_histogram_lines("text_to_sql_stage_seconds", histogram, f'stage="{stage}",'))
+            lines.append("# HELP text_to_sql_batch_size Queries per model.generate call.")
+            lines.append("# TYPE text_to_sql_batch_size histogram")
+            lines.extend(_histogram_lines("text_to_sql_batch_size", self.batch_sizes, ""))
+            for name, value in self.counters.items():
+                lines.append(f"# TYPE text_to_sql_{name}_total counter")
+                lines.append(f"text_to_sql_{name}_total {value}")
+        for name, value in (cache_stats or {}).items():
+            kind = "gauge" if name == "entries" else "counter"
+            metric = f"text_to_sql_cache_{name}" + ("" if kind == "gauge" else "_total")
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """One-line-per-stage human readable summary."""
+        with self._lock:
+            elapsed = max(time.time() - self.started, 1e-9)
+            lines = [f"Text-to-SQL metrics over {elapsed:.0f}s:"]
+            for stage, histogram in self.stages.items():
+                if histogram.count:
+                    mean = histogram.total / histogram.count
+                    lines.append(f"  {stage:<9} {histogram.count:>8} calls  mean {mean * 1000:8.2f} ms"
+                                 f"  max {histogram.maximum * 1000:8.2f} ms  total {histogram.total:8.2f} s")
+            counters = self.counters
+            batches = self.batch_sizes
+            mean_batch = batches.total / batches.count if batches.count else 0.0
+            lines.append(f"  tokens in {counters['tokens_in']}, out {counters['tokens_out']} "
+                         f"({counters['tokens_out'] / elapsed:.1f}/s), translations {counters['translations']}, "
+                         f"batches {counters['batches']} (mean size {mean_batch:.1f})")
+        return "\n".join(lines)
+
+    def start_dump(self, interval=60.0, stream=None, cache_stats=None):
+        """Print summary() every interval seconds from a daemon thread.
+
+        cache_stats is a callable returning TranslationCache.stats(), or None.
+        """
+        if self._dump_thread is not None:
+            return self._dump_thread
+
+        def dump():
+            while True:
+                time.sleep(interval)
+                text = self.summary()
+                stats = cache_stats() if cache_stats is not None else None
+                if stats:
+                    text += f"\n  cache hits {stats['hits']}, misses {stats['misses']}"
+                print(text, file=stream or sys.stderr, flush=True)
+
+        self._dump_thread = threading.Thread(target=dump, name="metrics-dump", daemon=True)
+        self._dump_thread.start()
+        return self._dump_thread
+
+
+def _histogram_lines(name, histogram, labels):
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.bounds, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels}le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels}le="+Inf"}} {histogram.count}')
+    labels = labels.rstrip(",")
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{name}_sum{suffix} {histogram.total}")
+    lines.append(f"{name}_count{suffix} {histogram.count}")
+    return lines
+
+
+metrics = Metrics(enabled=os.environ.get("TEXT_TO_SQL_METRICS", "") not in ("", "0"))
@@ -0,0 +1,396 @@
+"""Asyncio HTTP service for the Text-to-SQL model.
+
+Endpoints (JSON in, JSON out):
+    POST /translate  {"query": "..."}  -> {"sql": "..."}
+    POST /translate/stream {"query": "..."} -> the SQL as chunked text/plain, sent as it is generated
+    POST /explain    {"sql": "..."}    -> {"explanation": "..."}
+    POST /suggest    {"sql": "..."}    -> {"query_info": {...}, "suggestions": [...]}
+    GET  /health                       -> backend, model state, pending requests, cache stats
+    GET  /metrics                      -> stage timings and counters in Prometheus text format
+
+Translations run off the event loop on a MicroBatcher, so concurrent requests
+are batched together. At most max_pending translations may be waiting; beyond
+that the server answers 503 straight away instead of queueing without bound.
+Streamed translations count towards the same limit until their generation has
+stopped. They generate on a fixed number of threads and stop at the next token
+when the client goes away or times out. A translation that takes longer than
+the request timeout gets a 504. SIGINT or SIGTERM stop accepting connections,
+let running requests finish (for up to shutdown_grace seconds) and then stop
+the batcher.
+
+Usage:
+    python sql_server.py --port 8000 --max-pending 64 --timeout 30
+    python sql_server.py --cache-entries 0  # Every translation runs the model (for load tests)
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import time
+
+import text_to_sql
+from sql_metrics import metrics
+
+MAX_BODY = 64 * 1024
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error", 503: "Service Unavailable", 504: "Gateway Timeout"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class TextToSQLServer:
+    """HTTP front-end for translate_to_sql, explain_sql and generate_suggestions."""
+
+    def __init__(self, host="127.0.0.1", port=8000, max_batch_size=16, max_wait=0.01, max_pending=64, timeout=30.0,
+                 shutdown_grace=10.0):
+        self.host = host
+        self.port = port
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.shutdown_grace = shutdown_grace
+
+        self.pending = 0  # Translations submitted and not finished yet
+        self.active = 0  # Requests being handled
+        self.requests = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.batcher = None
+        self._server = None
+        self._stopping = None
+        self._idle = None
+        self._connections = {}  # Writer -> task handling the connection
+        self._busy = set()  # Writers with a request in flight
+
+    async def start(self):
+        """Start listening; the model is loaded in the background meanwhile."""
+        self._stopping = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.batcher = text_to_sql.MicroBatcher(self.max_batch_size, self.max_wait)
+        text_to_sql.model_loader.warm_up()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        """Serve until SIGINT/SIGTERM or stop(), then shut down gracefully."""
+        if self._server is None:
+            await self.start()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass  # Not available on this platform or thread
+        print(f"Serving Text-to-SQL on http://{self.host}:{self.port} (backend: {text_to_sql.model_loader.backend})")
+        await self._stopping.wait()
+        await self.shutdown()
+
+    def stop(self):
+        self._stopping.set()
+
+    async def shutdown(self):
+        """Stop accepting connections, wait for running requests, then stop the batcher.
+
+        Idle keep-alive connections are closed at once; connections with a request
+        in flight close after their response, or are cut after shutdown_grace.
+        Server.wait_closed() waits for every connection from Python 3.12.1 on, so
+        it is only awaited once they are all gone.
+        """
+        self._stopping.set()
+        self._server.close()
+        for writer, task in list(self._connections.items()):
+            if writer not in self._busy:
+                task.cancel()  # Parked in _read_request waiting for a next request
+        try:
+            await asyncio.wait_for(self._idle.wait(), self.shutdown_grace)
+        except asyncio.TimeoutError:
+            print(f"Shutdown: {self.active} requests still running after {self.shutdown_grace}s")
+        tasks = list(self._connections.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._server.wait_closed()
+        # Waits for translations already handed to the batcher
+        await asyncio.get_running_loop().run_in_executor(None, self.batcher.close)
+
+    async def _handle_connection(self, reader, writer):
+        self._connections[writer] = asyncio.current_task()
+        try:
+            keep_alive = True
+            while keep_alive and not self._stopping.is_set():
+                try:
+                    request = await _read_request(reader)
+                except HTTPError as exc:
+                    await _write_response(writer, exc.status, {"error": str(exc)}, False)
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                self._busy.add(writer)
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+                self._begin()
+                start = time.perf_counter()
+                try:
+                    status, payload = await self._dispatch(method, path, body)
+                    keep_alive = keep_alive and not self._stopping.is_set()
+                    if hasattr(payload, "__aiter__"):
+                        keep_alive = await _write_stream(writer, payload, keep_alive)
+                    else:
+                        await _write_response(writer, status, payload, keep_alive)
+                    if metrics.enabled:
+                        metrics.count("requests")
+                        metrics.observe_stage("request", time.perf_counter() - start)
+                finally:
+                    self._busy.discard(writer)
+                    self._end()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass  # The client went away, or shutdown() cut the connection
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+
+    def _begin(self):
+        self.active += 1
+        self.requests += 1
+        self._idle.clear()
+
+    def _end(self):
+        self.active -= 1
+        if not self.active:
+            self._idle.set()
+
+    async def _dispatch(self, method, path, body):
+        routes = {
+            "/translate": ("POST", self._translate),
+            "/translate/stream": ("POST", self._translate_stream),
+            "/explain": ("POST", self._explain),
+            "/suggest": ("POST", self._suggest),
+            "/health": ("GET", self._health),
+            "/metrics": ("GET", self._metrics),
+        }
+        try:
+            if path not in routes:
+                raise HTTPError(404, f"Unknown endpoint {path}")
+            expected, handler = routes[path]
+            if method != expected:
+                raise HTTPError(405, f"{path} expects {expected}")
+            payload = _parse_json(body) if expected == "POST" else {}
+            return 200, await handler(payload)
+        except HTTPError as exc:
+            return exc.status, {"error": str(exc)}
+        except Exception as exc:
+            return 500, {"error": f"{type(exc).__name__}: {exc}"}
+
+    def _reserve(self):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPError(503, "Too many pending translations, retry later")
+        self.pending += 1
+
+    def _release(self, future=None):
+        self.pending -= 1
+        if future is not None and not future.cancelled():
+            future.exception()  # Retrieved, so a failure after a timeout is not reported as unhandled
+
+    async def _translate(self, payload):
+        query = _text_field(payload, "query")
+        self._reserve()
+        try:
+            future = asyncio.wrap_future(self.batcher.submit(query))
+        except BaseException:
+            self._release()
+            raise
+        # A timed-out translation keeps its place in the batch, so it stays pending until the batch is done
+        future.add_done_callback(self._release)
+        try:
+            sql = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise HTTPError(504, f"Translation took longer than {self.timeout}s") from None
+        return {"sql": sql}
+
+    async def _translate_stream(self, payload):
+        query = _text_field(payload, "query")
+        self._reserve()
+        try:
+            fragments, job = text_to_sql.start_stream_async(query)
+        except BaseException:
+            self._release()
+            raise
+        # Like _translate: the slot is freed when generation has ended, not when the client goes away
+        asyncio.wrap_future(job.done).add_done_callback(self._release)
+        return self._stream_fragments(fragments, job)
+
+    async def _stream_fragments(self, fragments, job):
+        # Streams bypass the batcher; they generate on the fixed stream threads (--stream-workers)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(fragments.__anext__(), self.timeout)
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    self.timeouts += 1
+                    raise
+        finally:
+            job.cancel()  # Timed out or the client went away: stop generating at the next token
+            await fragments.aclose()
+
+    async def _explain(self, payload):
+        return {"explanation": text_to_sql.explain_sql(_text_field(payload, "sql"))}
+
+    async def _suggest(self, payload):
+        query_info = text_to_sql.extract_query_info(_text_field(payload, "sql"))
+        return {"query_info": query_info.as_dict(), "suggestions": text_to_sql.generate_suggestions(query_info)}
+
+    async def _metrics(self, payload):
+        cache = text_to_sql.translation_cache
+        return metrics.prometheus_text(cache.stats() if cache is not None else None)
+
+    async def _health(self, payload):
+        cache = text_to_sql.translation_cache
+        return {
+            "backend": text_to_sql.model_loader.backend,
+            "model_loaded": text_to_sql.model_loader.is_loaded(),
+            "pending": self.pending,
+            "active": self.active,
+            "requests": self.requests,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "cache": cache.stats() if cache is not None else None,
+        }
+
+
+async def _read_request(reader):
+    """Read one HTTP/1.1 request; None when the client closed the connection."""
+    try:
+        line = await reader.readline()
+    except ValueError:
+        raise HTTPError(400, "Request line too long") from None
+    if not line:
+        return None
+    try:
+        method, target, _version = line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(400, "Malformed request line") from None
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPError(400, "Content-Length is not a number") from None
+    if length < 0:
+        raise HTTPError(400, "Content-Length is negative")
+    if length > MAX_BODY:
+        raise HTTPError(413, f"Request body larger than {MAX_BODY} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target.split("?", 1)[0], headers, body
+
+
+async def _write_response(writer, status, payload, keep_alive):
+    # Strings (the /metrics page) are sent as plain text, everything else as JSON
+    if isinstance(payload, str):
+        body, content_type = payload.encode(), "text/plain; version=0.0.4"
+    else:
+        body, content_type = json.dumps(payload).encode(), "application/json"
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n")
+    if status == 503:
+        head += "Retry-After: 1\r\n"
+    with metrics.stage("io"):
+        writer.write(head.encode() + b"\r\n" + body)
+        await writer.drain()
+
+
+async def _write_stream(writer, fragments, keep_alive):
+    """Send fragments with chunked encoding; returns whether the connection can be reused.
+
+    The status line is already sent when generation fails or times out, so the
+    response is cut short without its final chunk and the connection is closed.
+    """
+    writer.write(b"HTTP/1.1 200 OK\r\n"
+                 b"Content-Type: text/plain; charset=utf-8\r\n"
+                 b"Transfer-Encoding: chunked\r\n" +
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode())
+    try:
+        async for fragment in fragments:
+            data = fragment.encode()
+            writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            await writer.drain()
+    except Exception:
+        return False
+    finally:
+        await fragments.aclose()
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+    return keep_alive
+
+
+def _parse_json(body):
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        raise HTTPError(400, "Body is not valid JSON") from None
+    if not isinstance(payload, dict):
+        raise HTTPError(400, "Body must be a JSON object")
+    return payload
+
+
+def _text_field(payload, name):
+    value = payload.get(name)
+    if not isinstance(value, str) or not value.strip():
+        raise HTTPError(400, f"Missing string field {name!r}")
+    return value.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Text-to-SQL model over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument("--max-batch-size", type=int, default=16, help="Largest translation micro-batch")
+    parser.add_argument("--max-wait", type=float, default=0.01, help="Seconds to wait for a micro-batch to fill")
+    parser.add_argument("--max-pending", type=int, default=64, help="Pending translations before answering 503")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds before a translation gets a 504")
+    parser.add_argument("--shutdown-grace", type=float, default=10.0, help="Seconds to let requests finish on exit")
+    parser.add_argument("--stream-workers", type=int, default=2,
+                        help="Streamed translations generating at once; others wait (within --max-pending)")
+    parser.add_argument("--cache-entries", type=int, default=1024,
+                        help="Translations kept in the in-memory cache (0 disables the cache)")
+    parser.add_argument("--metrics", action="store_true", help="Collect stage timings and counters (GET /metrics)")
+    parser.add_argument("--metrics-interval", type=float, default=0,
+                        help="Print a metrics summary every N seconds (implies --metrics)")
+    args = parser.parse_args()
+
+    text_to_sql.configure_cache(args.cache_entries, os.environ.get("TEXT_TO_SQL_CACHE"))
+    text_to_sql.configure_streams(args.stream_workers)
+    if args.metrics or args.metrics_interval:
+        metrics.enable()
+    if args.metrics_interval:
+        cache_stats = lambda: text_to_sql.translation_cache.stats() if text_to_sql.translation_cache else None
+        metrics.start_dump(args.metrics_interval, cache_stats=cache_stats)
+
+    server = TextToSQLServer(args.host, args.port, args.max_batch_size, args.max_wait, args.max_pending, args.timeout,
+                             args.shutdown_grace)
+    asyncio.run(server.serve_forever())
+
+
+if __name__ == "__main__":
+    main()
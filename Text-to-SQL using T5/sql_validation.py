@@ -0,0 +1,200 @@
+"""Check generated SQL against a local SQLite copy of the schema.
+
+Every query is first compiled with EXPLAIN, which catches syntax errors and
+unknown tables or columns without running anything, and then executed with a
+time limit and a row limit. Connections are opened read-only and kept in a
+pool, so validation can run on several threads while the model keeps
+generating (see translate_and_validate in the main script).
+
+Build the database once from a schema file, then validate against it:
+
+    build_database("schema.db", open("schema.sql").read())
+    validator = SQLValidator("schema.db")
+    validator.validate("SELECT name FROM employees")
+"""
+import os
+import queue
+import sqlite3
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+# Stage a query reached: failed to compile, failed or timed out while running, or fine
+INVALID, FAILED, TIMEOUT, VALID = "invalid", "failed", "timeout", "valid"
+
+
+def build_database(path, schema_sql, data_sql=None):
+    """Create (or replace) a SQLite database from DDL and optional sample data statements."""
+    if os.path.exists(path):
+        os.remove(path)
+    connection = sqlite3.connect(path)
+    try:
+        connection.executescript(schema_sql)
+        if data_sql:
+            connection.executescript(data_sql)
+        connection.commit()
+    finally:
+        connection.close()
+
+
+class ConnectionPool:
+    """Fixed set of read-only SQLite connections shared between threads."""
+
+    def __init__(self, path, size=4):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Validation database not found: {path}")
+        self.path = path
+        self.size = size
+        self._idle = queue.Queue()
+        for _ in range(size):
+            connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            connection.execute("PRAGMA query_only = ON")
+            self._idle.put(connection)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection, waiting for one to be returned if all are in use."""
+        connection = self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def close(self):
+        for _ in range(self.size):
+            self._idle.get().close()
+
+
+class ValidationResult:
+    __slots__ = ("sql", "status", "error", "rows", "truncated", "explain_time", "execute_time")
+
+    def __init__(self, sql, status, error=None, rows=None, truncated=False, explain_time=0.0, execute_time=0.0):
+        self.sql = sql
+        self.status = status
+        self.error = error
+        self.rows = rows
+        self.truncated = truncated
+        self.explain_time = explain_time
+        self.execute_time = execute_time
+
+    @property
+    def valid(self):
+        return self.status == VALID
+
+    def __repr__(self):
+        detail = f"{len(self.rows)} rows" if self.rows is not None else self.error
+        return f"ValidationResult({self.status}, {detail!r})"
+
+
+class SQLValidator:
+    """Validates SQL on a pool of read-only connections.
+
+    timeout is the wall-clock limit for executing one query, max_rows the number
+    of rows fetched before the result is cut off. execute=False only runs the
+    EXPLAIN check.
+    """
+
+    def __init__(self, path, pool_size=4, timeout=1.0, max_rows=1000, execute=True):
+        self.pool = ConnectionPool(path, pool_size)
+        self.timeout = timeout
+        self.max_rows = max_rows
+        self.execute = execute
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="sql-validate")
+
+    def validate(self, sql):
+        """Validate one statement in the calling thread."""
+        sql = sql.strip().rstrip(";")
+        if not sql:
+            return ValidationResult(sql, INVALID, "Empty query")
+
+        with self.pool.connection() as connection:
+            start = time.perf_counter()
+            try:
+                connection.execute(f"EXPLAIN {sql}").fetchall()
+            except (sqlite3.Error, sqlite3.Warning) as exc:
+                return ValidationResult(sql, INVALID, str(exc), explain_time=time.perf_counter() - start)
+            explain_time = time.perf_counter() - start
+            if not self.execute:
+                return ValidationResult(sql, VALID, explain_time=explain_time)
+
+            deadline = time.perf_counter() + self.timeout
+            # Called every 1000 SQLite VM instructions; a true result aborts the query
+            connection.set_progress_handler(lambda: time.perf_counter() > deadline, 1000)
+            start = time.perf_counter()
+            try:
+                cursor = connection.execute(sql)
+                rows = cursor.fetchmany(self.max_rows + 1)
+                cursor.close()
+            except sqlite3.OperationalError as exc:
+                status = TIMEOUT if time.perf_counter() > deadline else FAILED
+                return ValidationResult(sql, status, str(exc), explain_time=explain_time,
+                                        execute_time=time.perf_counter() - start)
+            except (sqlite3.Error, sqlite3.Warning) as exc:
+                return ValidationResult(sql, FAILED, str(exc), explain_time=explain_time,
+                                        execute_time=time.perf_counter() - start)
+            finally:
+                connection.set_progress_handler(None, 0)
+            execute_time = time.perf_counter() - start
+
+        truncated = len(rows) > self.max_rows
+        return ValidationResult(sql, VALID, rows=rows[:self.max_rows], truncated=truncated,
+                                explain_time=explain_time, execute_time=execute_time)
+
+    def submit(self, sql):
+        """Validate on the validator's threads; returns a Future of the ValidationResult."""
+        return self._executor.submit(self.validate, sql)
+
+    def validate_batch(self, sql_queries):
+        """Validate many statements concurrently and return a ValidationReport."""
+        start = time.perf_counter()
+        results = [future.result() for future in [self.submit(sql) for sql in sql_queries]]
+        return ValidationReport(results, time.perf_counter() - start)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ValidationReport:
+    """Validity rate and execution-time metrics of a batch of ValidationResults."""
+
+    def __init__(self, results, wall_time=None):
+        self.results = list(results)
+        self.wall_time = wall_time
+        self.counts = {status: 0 for status in (VALID, INVALID, FAILED, TIMEOUT)}
+        for result in self.results:
+            self.counts[result.status] += 1
+
+    @property
+    def validity_rate(self):
+        return self.counts[VALID] / len(self.results) if self.results else 0.0
+
+    def metrics(self):
+        """Dict of counts, validity rate and EXPLAIN / execution times in milliseconds."""
+        executed = sorted(result.execute_time * 1000 for result in self.results if result.valid)
+        explained = [result.explain_time * 1000 for result in self.results]
+        return {
+            "queries": len(self.results),
+            **self.counts,
+            "validity_rate": self.validity_rate,
+            "truncated": sum(result.truncated for result in self.results),
+            "explain_ms_mean": statistics.fmean(explained) if explained else 0.0,
+            "execute_ms_mean": statistics.fmean(executed) if executed else 0.0,
+            "execute_ms_p50": executed[len(executed) // 2] if executed else 0.0,
+            "execute_ms_p95": executed[min(len(executed) - 1, int(len(executed) * 0.95))] if executed else 0.0,
+            "execute_ms_max": executed[-1] if executed else 0.0,
+            "wall_s": self.wall_time,
+        }
+
+    def summary(self):
+        m = self.metrics()
+        return (f"{m['queries']} queries: {m['validity_rate']:.1%} valid ({m['invalid']} invalid, {m['failed']} failed, "
+                f"{m['timeout']} timed out); execution mean {m['execute_ms_mean']:.2f} ms, "
+                f"p95 {m['execute_ms_p95']:.2f} ms, max {m['execute_ms_max']:.2f} ms")
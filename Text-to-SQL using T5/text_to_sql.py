@@ -0,0 +1,14 @@
+"""Importable name for the "Text-to-SQL with T5.py" script.
+
+The script's file name is not a valid module name, so the other scripts in this
+folder use `import text_to_sql` to get its functions.
+"""
+import importlib.util
+import os
+import sys
+
+_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Text-to-SQL with T5.py")
+_spec = importlib.util.spec_from_file_location(__name__, _path)
+_module = importlib.util.module_from_spec(_spec)
+sys.modules[__name__] = _module
+_spec.loader.exec_module(_module)
@@ -0,0 +1,189 @@
+"""Cache of English -> SQL translations for the Text-to-SQL CLI.
+
+Entries are keyed by a normalized form of the question plus a fingerprint of the
+model checkpoint directory and the inference backend (variant) used. A bounded
+in-memory LRU sits in front of an optional SQLite store that survives restarts.
+When the files of the checkpoint change, the fingerprint changes and every
+cached translation is dropped.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Quotes that open and close outside words; the apostrophes of "What's" or "Employees'" are not quotes
+_QUOTED = re.compile(r"((?<!\w)'[^']*'(?!\w)|\"[^\"]*\")")
+_SPACES = re.compile(r"\s+")
+_QUESTION_MARKS = re.compile(r"[?!]+")
+# Commas, colons and semicolons get one space after them, except inside numbers (1,000)
+_SEPARATORS = re.compile(r"\s*([,;:])\s*(?!\d)|(?<!\d)\s*([,;:])\s*")
+
+
+def normalize_question(question):
+    """Normalize whitespace, case and punctuation of a question.
+
+    Quoted values ('Sales', "New York") are kept as written, since they end up
+    verbatim in the generated SQL.
+    """
+    parts = _QUOTED.split(question)
+    for i in range(0, len(parts), 2):  # Even parts are outside quotes
+        part = _QUESTION_MARKS.sub(" ", parts[i].lower())
+        part = _SEPARATORS.sub(lambda match: (match.group(1) or match.group(2)) + " ", part)
+        parts[i] = _SPACES.sub(" ", part)
+    parts[-1] = parts[-1].rstrip(" .")  # A trailing full stop
+    return "".join(parts).strip()
+
+
+def checkpoint_fingerprint(model_path):
+    """Hash of the names, sizes and modification times of the files in a checkpoint directory."""
+    digest = hashlib.sha1()
+    if not os.path.isdir(model_path):
+        digest.update(b"missing")
+        return digest.hexdigest()
+    for root, dirs, files in os.walk(model_path):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            digest.update(f"{os.path.relpath(path, model_path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+class TranslationCache:
+    """Thread-safe LRU cache of translations with an optional SQLite store.
+
+    max_entries bounds the in-memory LRU. path enables the on-disk store. The
+    checkpoint fingerprint is re-checked at most every check_interval seconds;
+    when it changes the cache is cleared and on_change() is called. variant names
+    the backend the translations come from; each variant has its own entries.
+    """
+
+    def __init__(self, model_path, max_entries=1024, path=None, check_interval=5.0, on_change=None,
+                 variant="eager"):
+        self.model_path = model_path
+        self.variant = variant
+        self.max_entries = max_entries
+        self.path = path
+        self.check_interval = check_interval
+        self.on_change = on_change
+
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()
+        self.hits = self.misses = self.evictions = self.disk_hits = self.invalidations = 0
+
+        self.checkpoint = checkpoint_fingerprint(model_path)
+        self.fingerprint = f"{self.checkpoint}:{variant}"
+        self._checked_at = time.monotonic()
+
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "fingerprint TEXT NOT NULL, question TEXT NOT NULL, sql TEXT NOT NULL, "
+                "PRIMARY KEY (fingerprint, question))"
+            )
+            # Rows written for older checkpoints can never be hit again
+            self._db.execute("DELETE FROM translations WHERE fingerprint NOT LIKE ?", (self.checkpoint + ":%",))
+            self._db.commit()
+
+    def key(self, question):
+        """The cache key of a question (its normalized form)."""
+        return normalize_question(question)
+
+    def get(self, question):
+        """Return the cached SQL for a question, or None."""
+        key = normalize_question(question)
+        with self._lock:
+            self._check_checkpoint()
+            sql = self._entries.get(key)
+            if sql is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return sql
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT sql FROM translations WHERE fingerprint = ? AND question = ?", (self.fingerprint, key)
+                ).fetchone()
+                if row is not None:
+                    self.hits += 1
+                    self.disk_hits += 1
+                    self._remember(key, row[0])
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, question, sql):
+        key = normalize_question(question)
+        with self._lock:
+            self._remember(key, sql)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO translations (fingerprint, question, sql) VALUES (?, ?, ?)",
+                    (self.fingerprint, key, sql),
+                )
+                self._db.commit()
+
+    def set_variant(self, variant):
+        """Switch to the entries of another backend of the same checkpoint."""
+        with self._lock:
+            if variant != self.variant:
+                self.variant = variant
+                self.fingerprint = f"{self.checkpoint}:{variant}"
+                self._entries.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM translations")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_hits": self.disk_hits,
+                "invalidations": self.invalidations,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key, sql):
+        self._entries[key] = sql
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _check_checkpoint(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        checkpoint = checkpoint_fingerprint(self.model_path)
+        if checkpoint == self.checkpoint:
+            return
+
+        self.checkpoint = checkpoint
+        self.fingerprint = f"{checkpoint}:{self.variant}"
+        self.invalidations += 1
+        self.clear()
+        if self.on_change is not None:
+            self.on_change()